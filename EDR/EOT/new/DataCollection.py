@@ -1,43 +1,136 @@
+import atexit
+import hashlib
 import logging
+import queue
+import threading
+from array import array
+from collections import defaultdict
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (s) da descarga periódica do buffer do log: limita o que se perde
+# (falhas de autenticação incluídas) se o processo morrer sem passar pelo atexit
+LOG_FLUSH_INTERVAL_S = 1.0
+
+# Configuração única do log de eventos de sessão (evita reconfigurar a cada instância).
+# Os registros vão para uma fila e uma thread em segundo plano grava em lote no
+# arquivo, tirando a escrita em disco do caminho de autenticação.
+if not logger.handlers:
+    _file_handler = logging.FileHandler('session_events.log')
+    _file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    _buffer_handler = MemoryHandler(capacity=512, flushLevel=logging.ERROR, target=_file_handler)
+    _log_queue = queue.Queue(-1)
+    _listener = QueueListener(_log_queue, _buffer_handler, respect_handler_level=True)
+    _listener.start()
+
+    _flush_stop = threading.Event()
+
+    def _flush_log_buffer_periodically():
+        while not _flush_stop.wait(LOG_FLUSH_INTERVAL_S):
+            _buffer_handler.flush()
+
+    threading.Thread(target=_flush_log_buffer_periodically, name='session-log-flush', daemon=True).start()
+
+    def _shutdown_log_listener():
+        _flush_stop.set()
+        _listener.stop()
+        _buffer_handler.flush()
+
+    atexit.register(_shutdown_log_listener)
+
+    logger.addHandler(QueueHandler(_log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Limites de falhas consecutivas para decisões de rate limiting
+MAX_FAILED_ATTEMPTS_PER_IP = 10
+MAX_FAILED_ATTEMPTS_PER_USER = 5
+
+# Limite do escore de popularidade acumulado por usuário (Ψ). Falhas com senhas
+# populares (típicas de ataques de adivinhação) pesam mais que erros de digitação.
+PSI_THRESHOLD = 20
+
+
+class CountMinSketch:
+    # Estrutura probabilística de contagem com memória fixa: consulta e
+    # atualização em O(depth), superestimando (nunca subestimando) contagens.
+    def __init__(self, width=4096, depth=4):
+        self.width = width
+        self.depth = depth
+        self._rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+
+    def _indexes(self, item):
+        if isinstance(item, str):
+            item = item.encode('utf-8')
+        digest = hashlib.blake2b(item, digest_size=4 * self.depth).digest()
+        return [int.from_bytes(digest[4 * i:4 * i + 4], 'little') % self.width for i in range(self.depth)]
+
+    def add(self, item, count=1):
+        for row, index in zip(self._rows, self._indexes(item)):
+            row[index] = min(row[index] + count, 0xFFFFFFFF)
+
+    def query(self, item):
+        return min(row[index] for row, index in zip(self._rows, self._indexes(item)))
+
 
 class Rastreador_de_Sessão_e_Autenticação:
-    def __init__(self):
-        self.login_attempts_by_ip = {}
-        self.login_attempts_by_user = {}
+    def __init__(self, popular_passwords=None):
+        self.login_attempts_by_ip = defaultdict(int)
+        self.login_attempts_by_user = defaultdict(int)
 
-        logging.basicConfig(
-            filename='session_events.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        # Popularidade de senhas (hashes pré-calculados) e escore acumulado por usuário
+        self._popularity_cms = CountMinSketch(width=4096, depth=4)
+        self._psi = defaultdict(int)
+        if popular_passwords:
+            self.load_popular_passwords(popular_passwords)
+
+    def load_popular_passwords(self, entries):
+        # entries: hashes de senhas populares ou pares (hash, peso)
+        for entry in entries:
+            if isinstance(entry, (tuple, list)):
+                self._popularity_cms.add(entry[0], int(entry[1]))
+            else:
+                self._popularity_cms.add(entry)
 
     def log_session_start(self, user_id):
-        logging.info(f"Session started for user: {user_id}")
+        logger.info("Session started for user: %s", user_id)
 
     def log_session_end(self, user_id):
-        logging.info(f"Session ended for user: {user_id}")
+        logger.info("Session ended for user: %s", user_id)
 
     def log_token_revocation(self, user_id, token_id):
-        logging.info(f"Token revoked for user: {user_id}, token: {token_id}")
-
-    def record_login_attempt(self, user_id, ip_address, success, login_method, failure_reason=None):
-        if ip_address not in self.login_attempts_by_ip:
-            self.login_attempts_by_ip[ip_address] = 0
-
-        if user_id not in self.login_attempts_by_user:
-            self.login_attempts_by_user[user_id] = 0
+        logger.info("Token revoked for user: %s, token: %s", user_id, token_id)
 
+    def record_login_attempt(self, user_id, ip_address, success, login_method, failure_reason=None,
+                             password_hash=None):
         if success:
-            self.login_attempts_by_ip[ip_address] = 0
-            self.login_attempts_by_user[user_id] = 0
-            logging.info(
-                f"Authentication SUCCESS for user: {user_id} from IP: {ip_address} using method: {login_method}"
+            # Sucesso zera os contadores: remover a chave mantém os dicionários pequenos
+            self.login_attempts_by_ip.pop(ip_address, None)
+            self.login_attempts_by_user.pop(user_id, None)
+            self._psi.pop(user_id, None)
+            logger.info(
+                "Authentication SUCCESS for user: %s from IP: %s using method: %s",
+                user_id, ip_address, login_method
             )
         else:
-            self.login_attempts_by_ip[ip_address] += 1
-            self.login_attempts_by_user[user_id] += 1
-            logging.warning(
-                f"Authentication FAILURE for user: {user_id} from IP: {ip_address} using method: {login_method} "
-                f"(Attempt {self.login_attempts_by_user[user_id]} for user, {self.login_attempts_by_ip[ip_address]} for IP). "
-                f"Reason: {failure_reason if failure_reason else 'Unknown'}"
-            )
+            ip_cnt = self.login_attempts_by_ip[ip_address] = self.login_attempts_by_ip[ip_address] + 1
+            user_cnt = self.login_attempts_by_user[user_id] = self.login_attempts_by_user[user_id] + 1
+            if password_hash is not None:
+                self._psi[user_id] += self._popularity_cms.query(password_hash)
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    "Authentication FAILURE for user: %s from IP: %s using method: %s "
+                    "(Attempt %d for user, %d for IP). Reason: %s",
+                    user_id, ip_address, login_method, user_cnt, ip_cnt,
+                    failure_reason or 'Unknown'
+                )
+
+    def is_rate_limited(self, user_id, ip_address):
+        # Verifica o IP primeiro e só consulta o usuário se necessário.
+        # Usa .get para não criar entradas vazias nos defaultdicts.
+        if self.login_attempts_by_ip.get(ip_address, 0) >= MAX_FAILED_ATTEMPTS_PER_IP:
+            return True
+        # K-strike legado ou escore de popularidade acima do limite
+        return (self.login_attempts_by_user.get(user_id, 0) >= MAX_FAILED_ATTEMPTS_PER_USER
+                or self._psi.get(user_id, 0) > PSI_THRESHOLD)
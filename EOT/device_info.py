@@ -1,17 +1,164 @@
 import platform
 import socket
-import psutil
-import requests
+import statistics
 import json
+import csv
+import io
 import time
 import subprocess
+import threading
 import uuid
 import locale
 import datetime
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, Tuple
-import netifaces
 import re
 
+# netifaces, psutil e requests são importados sob demanda nos métodos que os
+# utilizam, reduzindo o custo de importação deste módulo
+
+
+# Tempo de validade (segundos) do cache de IP público e dados do ISP
+NETWORK_CACHE_TTL = 300
+NETWORK_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.device_info_cache.json')
+
+# Tempo de validade (segundos) do cache de DNS e tipo de conexão
+LOCAL_NETWORK_CACHE_TTL = 60
+
+
+def _ttl_cache(ttl: float):
+    """
+    Memoiza um método sem argumentos por instância durante `ttl` segundos.
+    Usado para consultas que dependem de subprocessos ou arquivos do sistema
+    e que mudam em escala humana (DNS, tipo de conexão).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self):
+            now = time.monotonic()
+            cache = self.__dict__.setdefault('_ttl_cache', {})
+            entry = cache.get(func.__name__)
+            if entry is not None and now - entry[0] < ttl:
+                return entry[1]
+            value = func(self)
+            cache[func.__name__] = (now, value)
+            return value
+        return wrapper
+    return decorator
+
+
+# Informações de plataforma não mudam durante a vida do processo:
+# são consultadas uma única vez e reaproveitadas em todas as coletas
+@functools.cache
+def _system() -> str:
+    """Nome do sistema operacional (platform.system())"""
+    return platform.system()
+
+
+@functools.cache
+def _machine() -> str:
+    """Arquitetura da máquina (platform.machine())"""
+    return platform.machine()
+
+
+@functools.cache
+def _uname() -> platform.uname_result:
+    """Informações completas do sistema (platform.uname())"""
+    return platform.uname()
+
+
+@functools.cache
+def _node() -> int:
+    """Identificador de hardware do dispositivo (uuid.getnode())"""
+    return uuid.getnode()
+
+
+@functools.cache
+def _default_locale() -> Tuple[Optional[str], Optional[str]]:
+    """Idioma e codificação padrão do sistema"""
+    return locale.getdefaultlocale()
+
+
+@functools.cache
+def _detect_container() -> bool:
+    """Detecta uma única vez se o processo roda em container (Docker, Kubernetes)"""
+    # Arquivos marcadores do Docker: a simples existência já é conclusiva
+    if os.path.exists('/.dockerenv') or os.path.exists('/.dockerinit'):
+        return True
+    
+    try:
+        with open('/proc/1/cgroup', 'rb') as f:
+            content = f.read(4096)
+        return b'docker' in content or b'kubepods' in content
+    except OSError:
+        return False
+
+
+# Expressões usadas na leitura dos servidores DNS
+_DNS_WIN_RE = re.compile(r'DNS Servers[^:]*:\s*([\d.]+)')
+_DNS_UNIX_RE = re.compile(r'nameserver\s+([\d.]+)')
+
+
+# Hipervisores comuns (system info, DMI e nomes de processos)
+_HV_RE = re.compile(r'vmware|virtualbox|kvm|xen|hyper-v|qemu', re.IGNORECASE)
+
+
+@functools.cache
+def _detect_virtual_machine() -> bool:
+    """Detecta uma única vez se o processo roda em máquina virtual"""
+    # Verifica através de informações do sistema
+    system_info = _uname()
+    if _HV_RE.search(system_info.version) or _HV_RE.search(system_info.release):
+        return True
+    
+    # Verifica através de dispositivos virtuais (Linux)
+    if _system().lower() == 'linux':
+        try:
+            with open('/sys/class/dmi/id/product_name', 'r') as f:
+                if _HV_RE.search(f.read()):
+                    return True
+        except OSError:
+            pass
+    
+    # Verifica através de processos relacionados a virtualização
+    if _system().lower() == 'linux':
+        return _scan_proc_comm()
+    
+    import psutil
+    for proc in psutil.process_iter(['name']):
+        if _HV_RE.search(proc.info['name'] or ''):
+            return True
+    
+    return False
+
+
+def _scan_proc_comm() -> bool:
+    """Procura processos de hipervisor lendo /proc/<pid>/comm diretamente (Linux)"""
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/comm', 'rb') as f:
+                name = f.read(16)
+        except OSError:
+            continue
+        if _HV_RE.search(name.decode(errors='ignore')):
+            return True
+    return False
+
+
+@functools.cache
+def _has_display() -> bool:
+    """Verifica uma única vez se o sistema possui interface gráfica"""
+    if _system().lower() == 'windows':
+        return True
+    
+    # Para Linux/Unix, verifica se há display configurado
+    return 'DISPLAY' in os.environ and os.environ['DISPLAY'] != ''
+
+
 class DeviceEnvironmentSDK:
     """
     SDK para coleta de dados do dispositivo e ambiente
@@ -27,8 +174,110 @@ class DeviceEnvironmentSDK:
 
     def __init__(self):
         """Inicializa o SDK com configurações básicas"""
-        self.session = requests.Session()
         self.cache_data = {}  # Para armazenar dados em cache entre chamadas
+        mac = '%012x' % _node()
+        self._mac = ':'.join(mac[i:i + 2] for i in range(0, 12, 2))
+        
+        # O sistema operacional não muda: resolve as implementações específicas uma única vez
+        self._os = _system()
+        self._detect_connection_type = {
+            'Windows': self._detect_connection_type_windows,
+            'Linux': self._detect_connection_type_linux,
+            'Darwin': self._detect_connection_type_mac
+        }.get(self._os, lambda: "unknown")
+        self._read_dns_servers = (
+            self._read_dns_servers_windows if self._os == 'Windows' else self._read_dns_servers_unix
+        )
+        
+        # Cache (timestamp, valor) para consultas externas que mudam raramente
+        self._cache_lock = threading.Lock()
+        self._session = None  # Criada sob _cache_lock no primeiro uso (ver session)
+        persisted = self._load_network_cache()
+        self._pubip_cache: Tuple[float, Any] = persisted['public_ip']
+        self._isp_cache: Tuple[float, Any] = persisted['isp_info']
+    
+    @property
+    def session(self):
+        """Sessão HTTP criada no primeiro uso (requests só é importado se necessário)"""
+        # Verificação dupla: collect_all_data consulta rede e ISP em paralelo, e só uma
+        # das threads pode criar o pool de conexões
+        session = self._session
+        if session is None:
+            with self._cache_lock:
+                session = self._session
+                if session is None:
+                    session = self._session = self._build_session()
+        return session
+    
+    def _build_session(self):
+        """Cria a sessão HTTP com pool de conexões keep-alive e retry"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        session = requests.Session()
+        # Pool de conexões keep-alive: reutiliza TCP+TLS entre chamadas ao mesmo host
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8,
+                              max_retries=Retry(total=1, backoff_factor=0))
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+        return session
+    
+    def _load_network_cache(self) -> Dict[str, Tuple[float, Any]]:
+        """
+        Carrega o cache de rede persistido em disco (se existir)
+        Cada entrada deve ser [timestamp, valor]; qualquer outro conteúdo
+        (arquivo corrompido ou editado) é descartado como (0, None).
+        """
+        try:
+            with open(NETWORK_CACHE_FILE, 'r', encoding='utf-8') as f:
+                persisted = json.load(f)
+        except Exception:
+            persisted = None
+        if not isinstance(persisted, dict):
+            persisted = {}
+        
+        cache = {}
+        for key, value_type in (('public_ip', str), ('isp_info', dict)):
+            entry = persisted.get(key)
+            if (isinstance(entry, list) and len(entry) == 2
+                    and isinstance(entry[0], (int, float)) and not isinstance(entry[0], bool)
+                    and isinstance(entry[1], value_type)):
+                cache[key] = (float(entry[0]), entry[1])
+            else:
+                cache[key] = (0, None)
+        return cache
+    
+    def _save_network_cache(self):
+        """Persiste o cache de rede em disco para reuso entre execuções"""
+        try:
+            with self._cache_lock:
+                with open(NETWORK_CACHE_FILE, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'public_ip': list(self._pubip_cache),
+                        'isp_info': list(self._isp_cache)
+                    }, f)
+        except Exception:
+            pass
+    
+    def _get_public_ip(self, refresh: bool = False) -> Optional[str]:
+        """Obtém o IP público, reutilizando o valor em cache dentro do TTL"""
+        now = time.time()
+        ts, value = self._pubip_cache
+        if not refresh and value and now - ts < NETWORK_CACHE_TTL:
+            return value
+        
+        try:
+            response = self.session.get('https://api.ipify.org?format=json', timeout=5)
+            public_ip = response.json().get('ip')
+        except Exception:
+            return None
+        
+        if public_ip:
+            self._pubip_cache = (now, public_ip)
+            self._save_network_cache()
+        return public_ip
         
     def detect_device_type(self) -> str:
         """
@@ -39,8 +288,8 @@ class DeviceEnvironmentSDK:
         o tipo de dispositivo em que o código está sendo executado.
         """
         try:
-            system = platform.system().lower()
-            machine = platform.machine().lower()
+            system = _system().lower()
+            machine = _machine().lower()
             
             # Verifica se é container (Docker, Kubernetes)
             if self._is_container():
@@ -48,7 +297,7 @@ class DeviceEnvironmentSDK:
             
             # Verifica se é VM através de várias técnicas de detecção
             if self._is_virtual_machine():
-                return "desktop"
+                return "vm"
             
             # Verifica se é servidor (normalmente sem interface gráfica ou headless)
             if system == "linux" or system == "windows" and not self._has_gui():
@@ -72,55 +321,14 @@ class DeviceEnvironmentSDK:
     def _is_container(self) -> bool:
         """Verifica se está rodando em container (Docker, Kubernetes, etc.)"""
         try:
-            # Verifica arquivos comuns em containers
-            container_indicators = [
-                '/.dockerenv',
-                '/.dockerinit',
-                '/proc/1/cgroup'
-            ]
-            
-            for indicator in container_indicators:
-                try:
-                    with open(indicator, 'r') as f:
-                        content = f.read()
-                        if 'docker' in content.lower() or 'kubepods' in content.lower():
-                            return True
-                except:
-                    continue
-            
-            return False
+            return _detect_container()
         except:
             return False
     
     def _is_virtual_machine(self) -> bool:
         """Verifica se está rodando em máquina virtual através de múltiplas técnicas"""
         try:
-            # Verifica através de informações do sistema
-            system_info = platform.uname()
-            
-            # Hipervisores comuns em system info
-            hypervisors = ['vmware', 'virtualbox', 'kvm', 'xen', 'hyper-v', 'qemu']
-            
-            for hv in hypervisors:
-                if hv in system_info.version.lower() or hv in system_info.release.lower():
-                    return False
-            
-            # Verifica através de dispositivos virtuais (Linux)
-            if platform.system().lower() == 'linux':
-                try:
-                    with open('/sys/class/dmi/id/product_name', 'r') as f:
-                        product_name = f.read().lower()
-                        if any(hv in product_name for hv in hypervisors):
-                            return False
-                except:
-                    pass
-            
-            # Verifica através de processos relacionados a virtualização
-            for proc in psutil.process_iter(['name']):
-                if any(hv in proc.info['name'].lower() for hv in hypervisors):
-                    return True
-            
-            return False
+            return _detect_virtual_machine()
         except:
             return False
 
@@ -130,12 +338,7 @@ class DeviceEnvironmentSDK:
     def _has_gui(self) -> bool:
         """Verifica se o sistema possui interface gráfica"""
         try:
-            if platform.system().lower() == 'windows':
-                return True
-            
-            # Para Linux/Unix, verifica se há display configurado
-            import os
-            return 'DISPLAY' in os.environ and os.environ['DISPLAY'] != ''
+            return _has_display()
         except:
             return False
     
@@ -148,6 +351,7 @@ class DeviceEnvironmentSDK:
         detalhadas sobre o uso de memória do sistema.
         """
         try:
+            import psutil
             memory = psutil.virtual_memory()
             return {
                 'total_memory_gb': round(memory.total / (1024**3), 2),
@@ -168,14 +372,15 @@ class DeviceEnvironmentSDK:
         ajudam a identificar unicamente o dispositivo.
         """
         try:
+            system_info = _uname()
             return {
                 'hostname': socket.gethostname(),
-                'operating_system': platform.system(),
-                'os_version': platform.version(),
-                'architecture': platform.machine(),
+                'operating_system': system_info.system,
+                'os_version': system_info.version,
+                'architecture': system_info.machine,
                 'platform': platform.platform(),
-                'processor': platform.processor(),
-                'unique_id': str(uuid.getnode())  # Identificador único do dispositivo
+                'processor': system_info.processor,
+                'unique_id': str(_node())  # Identificador único do dispositivo
             }
         except Exception as e:
             return {'error': f'Erro ao obter informações do host: {str(e)}'}
@@ -190,7 +395,7 @@ class DeviceEnvironmentSDK:
         """
         try:
             # Idioma e localização
-            lang, encoding = locale.getdefaultlocale()
+            lang, encoding = _default_locale()
             
             # Timezone
             timezone = datetime.datetime.now(datetime.timezone.utc).astimezone().tzname()
@@ -205,21 +410,27 @@ class DeviceEnvironmentSDK:
         except Exception as e:
             return {'error': f'Erro ao obter informações de localização: {str(e)}'}
     
-    def get_network_info(self) -> Dict[str, Any]:
+    def get_network_info(self, refresh: bool = False) -> Dict[str, Any]:
         """
         Obtém informações detalhadas de rede
         Retorna: interfaces, IPs, gateway, DNS, endereço MAC
         
         Coleta informações completas sobre todas as interfaces de rede
         disponíveis no dispositivo, incluindo IPv4 e IPv6.
+        O IP público é reaproveitado do cache por até NETWORK_CACHE_TTL
+        segundos; use refresh=True para forçar nova consulta.
         """
         try:
+            import netifaces
             interfaces = {}
+            ip_set = set()
             default_gateway = netifaces.gateways().get('default', {})
 
             for interface in netifaces.interfaces():
                 addrs = netifaces.ifaddresses(interface)
                 interfaces[interface] = {}
+                for family in (netifaces.AF_INET, netifaces.AF_INET6):
+                    ip_set.update(a['addr'] for a in addrs.get(family, ()) if a.get('addr'))
                 if netifaces.AF_INET in addrs:
                     ipv4_info = addrs[netifaces.AF_INET][0]
                     interfaces[interface]['ipv4'] = ipv4_info.get('addr')
@@ -230,29 +441,23 @@ class DeviceEnvironmentSDK:
                     interfaces[interface]['ipv6'] = ipv6_info.get('addr')
 
             # Obtém IP local principal
+            hostname = socket.gethostname()
             try:
-                hostname = socket.gethostname()
                 local_ipv4 = socket.gethostbyname(hostname)
             except Exception:
                 local_ipv4 = None
 
-            # Coleta todos os IPs do host
-            ip_list = []
-            try:
-                for info in socket.getaddrinfo(hostname, None):
-                    ip = info[4][0]
-                    if ip not in ip_list:
-                        ip_list.append(ip)
-            except Exception:
-                pass
+            # Coleta todos os IPs do host: as interfaces já cobrem os endereços,
+            # a resolução de nome só é usada se nenhuma interface foi listada
+            if not ip_set:
+                try:
+                    ip_set.update(info[4][0] for info in socket.getaddrinfo(hostname, None))
+                except Exception:
+                    pass
+            ip_list = sorted(ip_set)
 
             # Obtém IP público
-            public_ip = None
-            try:
-                response = self.session.get('https://api.ipify.org?format=json', timeout=5)
-                public_ip = response.json().get('ip')
-            except Exception:
-                public_ip = None
+            public_ip = self._get_public_ip(refresh)
 
             return {
                 'local_ipv4': local_ipv4,
@@ -271,25 +476,30 @@ class DeviceEnvironmentSDK:
     def _get_mac_address(self) -> str:
         """Obtém endereço MAC da interface principal"""
         try:
-            return ':'.join(re.findall('..', '%012x' % uuid.getnode()))
+            return self._mac
         except:
             return "unknown"
     
+    @_ttl_cache(LOCAL_NETWORK_CACHE_TTL)
     def _get_dns_servers(self) -> list:
         """Obtém servidores DNS configurados no sistema"""
         try:
-            if platform.system() == 'Windows':
-                output = subprocess.check_output(['ipconfig', '/all']).decode()
-                dns_servers = re.findall(r'DNS Servers[^:]*:\s*([\d.]+)', output)
-            else:
-                with open('/etc/resolv.conf', 'r') as f:
-                    content = f.read()
-                    dns_servers = re.findall(r'nameserver\s+([\d.]+)', content)
-            
-            return dns_servers
+            return self._read_dns_servers()
         except:
             return []
     
+    def _read_dns_servers_windows(self) -> list:
+        """Lê servidores DNS no Windows via ipconfig"""
+        output = subprocess.check_output(['ipconfig', '/all']).decode()
+        return _DNS_WIN_RE.findall(output)
+    
+    def _read_dns_servers_unix(self) -> list:
+        """Lê servidores DNS em sistemas Unix via /etc/resolv.conf"""
+        with open('/etc/resolv.conf', 'r') as f:
+            content = f.read()
+        return _DNS_UNIX_RE.findall(content)
+    
+    @_ttl_cache(LOCAL_NETWORK_CACHE_TTL)
     def get_connection_type(self) -> str:
         """
         Detecta o tipo de conexão de rede ativa
@@ -299,14 +509,7 @@ class DeviceEnvironmentSDK:
         para determinar o tipo de conexão de rede.
         """
         try:
-            if platform.system() == 'Windows':
-                return self._detect_connection_type_windows()
-            elif platform.system() == 'Linux':
-                return self._detect_connection_type_linux()
-            elif platform.system() == 'Darwin':
-                return self._detect_connection_type_mac()
-            else:
-                return "unknown"
+            return self._detect_connection_type()
         except Exception as e:
             return f"unknown (erro: {str(e)})"
     
@@ -333,10 +536,18 @@ class DeviceEnvironmentSDK:
     def _detect_connection_type_linux(self) -> str:
         """Detecta tipo de conexão no Linux analisando interfaces de rede"""
         try:
-            # Verifica interfaces wireless
-            output = subprocess.check_output(['iwconfig']).decode()
-            if 'ESSID' in output:
-                return "wi-fi"
+            # Verifica interfaces wireless pelo sysfs (sem subprocesso): vale a interface
+            # da rota padrão; sem ela, qualquer interface wireless com operstate "up"
+            # (um adaptador Wi-Fi presente mas desconectado não conta)
+            default_iface = self._default_route_interface_linux()
+            if default_iface is not None:
+                if os.path.isdir(os.path.join('/sys/class/net', default_iface, 'wireless')):
+                    return "wi-fi"
+            else:
+                for interface in os.listdir('/sys/class/net'):
+                    if (os.path.isdir(os.path.join('/sys/class/net', interface, 'wireless'))
+                            and self._read_operstate_linux(interface) == "up"):
+                        return "wi-fi"
             
             # Verifica conexões móveis
             output = subprocess.check_output(['mmcli', '-L']).decode()
@@ -347,6 +558,28 @@ class DeviceEnvironmentSDK:
         except:
             return "ethernet"
     
+    def _default_route_interface_linux(self) -> Optional[str]:
+        """Interface da rota padrão IPv4 (/proc/net/route) ou None"""
+        try:
+            with open('/proc/net/route') as f:
+                next(f, None)  # Cabeçalho
+                for line in f:
+                    fields = line.split()
+                    # Destino 00000000 com a flag RTF_UP (0x1)
+                    if len(fields) > 3 and fields[1] == '00000000' and int(fields[3], 16) & 1:
+                        return fields[0]
+        except (OSError, ValueError):
+            pass
+        return None
+    
+    def _read_operstate_linux(self, interface: str) -> str:
+        """Estado operacional da interface no sysfs ("up", "down", ...)"""
+        try:
+            with open(os.path.join('/sys/class/net', interface, 'operstate')) as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+    
     def _detect_connection_type_mac(self) -> str:
         """Detecta tipo de conexão no macOS usando comandos nativos"""
         try:
@@ -375,24 +608,41 @@ class DeviceEnvironmentSDK:
                 '208.67.222.222'  # OpenDNS
             ]
             
+            def _probe(server: str) -> float:
+                start_time = time.perf_counter()
+                socket.create_connection((server, 53), timeout=5).close()
+                return (time.perf_counter() - start_time) * 1000  # ms
+            
+            # Dispara os testes em paralelo: o tempo total passa a ser ~max(RTT)
+            # em vez da soma das latências (ou dos timeouts) de cada servidor.
+            # Os resultados são lidos na ordem de submissão (não de conclusão),
+            # pois o jitter compara latências de servidores consecutivos
             latencies = []
-            for server in test_servers:
-                try:
-                    start_time = time.time()
-                    socket.create_connection((server, 53), timeout=5).close()
-                    latency = (time.time() - start_time) * 1000  # ms
-                    latencies.append(latency)
-                except:
-                    continue
+            with ThreadPoolExecutor(max_workers=len(test_servers)) as executor:
+                futures = [executor.submit(_probe, server) for server in test_servers]
+                for future in futures:
+                    try:
+                        latencies.append(future.result())
+                    except Exception:
+                        continue
             
             if not latencies:
                 return {'online': False, 'latency': None, 'jitter': None}
             
-            avg_latency = sum(latencies) / len(latencies)
-            max_latency = max(latencies)
-            
-            # Calcula jitter (variação de latência)
-            jitter = sum(abs(latencies[i] - latencies[i-1]) for i in range(1, len(latencies))) / (len(latencies) - 1) if len(latencies) > 1 else 0
+            # Calcula média, máximo e jitter (variação de latência);
+            # usa numpy quando disponível e statistics.fmean como alternativa
+            try:
+                import numpy as np
+                lat = np.asarray(latencies, dtype=np.float64)
+                avg_latency = float(lat.mean())
+                max_latency = float(lat.max())
+                jitter = float(np.abs(np.diff(lat)).mean()) if lat.size > 1 else 0.0
+            except ImportError:
+                avg_latency = statistics.fmean(latencies)
+                max_latency = max(latencies)
+                jitter = statistics.fmean(
+                    abs(b - a) for a, b in zip(latencies, latencies[1:])
+                ) if len(latencies) > 1 else 0.0
             
             return {
                 'online': True,
@@ -406,7 +656,7 @@ class DeviceEnvironmentSDK:
         except Exception as e:
             return {'online': False, 'error': str(e)}
     
-    def get_isp_info(self) -> Dict[str, Any]:
+    def get_isp_info(self, refresh: bool = False) -> Dict[str, Any]:
         """
         Obtém informações do provedor de internet e localização geográfica
         Retorna: ASN, ISP, país, cidade, coordenadas
@@ -414,13 +664,20 @@ class DeviceEnvironmentSDK:
         Utiliza API pública para obter informações baseadas no IP público
         do dispositivo. Essas informações são úteis para geolocalização
         e análise de tráfego de rede.
+        O resultado é reaproveitado do cache por até NETWORK_CACHE_TTL
+        segundos; use refresh=True para forçar nova consulta.
         """
+        now = time.time()
+        ts, cached = self._isp_cache
+        if not refresh and cached and now - ts < NETWORK_CACHE_TTL:
+            return cached
+        
         try:
             # Usa serviço externo para obter informações do IP
             response = self.session.get('https://ipapi.co/json/', timeout=10)
             data = response.json()
             
-            return {
+            isp_info = {
                 'ip': data.get('ip'),
                 'asn': data.get('asn'),
                 'asn_organization': data.get('org'),
@@ -433,6 +690,11 @@ class DeviceEnvironmentSDK:
                 'latitude': data.get('latitude'),
                 'longitude': data.get('longitude')
             }
+            
+            if isp_info['ip']:
+                self._isp_cache = (now, isp_info)
+                self._save_network_cache()
+            return isp_info
         except Exception as e:
             return {'error': f'Erro ao obter informações do ISP: {str(e)}'}
     
@@ -470,16 +732,27 @@ class DeviceEnvironmentSDK:
         """
         timestamp = datetime.datetime.now().isoformat()
         
+        # Coletores independentes (rede, subprocessos, psutil) rodam em paralelo;
+        # o tempo total fica limitado pela coleta mais lenta
+        tasks = {
+            'memory_info': self.get_memory_info,
+            'host_info': self.get_host_info,
+            'language_location': self.get_language_location,
+            'network_info': self.get_network_info,
+            'connection_type': self.get_connection_type,
+            'connection_status': self.get_connection_status,
+            'isp_info': self.get_isp_info,
+        }
+        
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = {key: executor.submit(collector) for key, collector in tasks.items()}
+            device_type = self.detect_device_type()
+            results = {key: future.result() for key, future in futures.items()}
+        
         data = {
             'timestamp': timestamp,
-            'device_type': self.detect_device_type(),
-            'memory_info': self.get_memory_info(),
-            'host_info': self.get_host_info(),
-            'language_location': self.get_language_location(),
-            'network_info': self.get_network_info(),
-            'connection_type': self.get_connection_type(),
-            'connection_status': self.get_connection_status(),
-            'isp_info': self.get_isp_info(),
+            'device_type': device_type,
+            **results,
             'browser_info': self.get_browser_info(),
             'sdk_version': '1.0.0',
             'collection_id': str(uuid.uuid4())  # ID único para esta coleta
@@ -488,10 +761,11 @@ class DeviceEnvironmentSDK:
         self.cache_data = data  # Armazena em cache para possível reuso
         return data
     
-    def export_data(self, format_type: str = 'json') -> str:
+    def export_data(self, format_type: str = 'json', pretty: bool = False) -> str:
         """
         Exporta os dados coletados em diferentes formatos
         Parâmetros: json, csv (implementar outros se necessário)
+        pretty: JSON indentado (para leitura humana); por padrão é compacto
         
         Útil para integração com outros sistemas ou para debug
         durante o desenvolvimento do SDK.
@@ -500,18 +774,25 @@ class DeviceEnvironmentSDK:
             self.collect_all_data()
         
         if format_type.lower() == 'json':
-            return json.dumps(self.cache_data, indent=2, ensure_ascii=False)
+            if pretty:
+                return json.dumps(self.cache_data, indent=2, ensure_ascii=False)
+            try:
+                import orjson
+                return orjson.dumps(self.cache_data, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+            except (ImportError, TypeError):  # orjson ausente ou tipo não suportado
+                return json.dumps(self.cache_data, ensure_ascii=False, separators=(',', ':'))
         elif format_type.lower() == 'csv':
-            # Implementação básica para CSV - pode ser expandida
-            csv_lines = ["Category,Key,Value"]
+            # csv.writer cuida do escape de vírgulas, aspas e quebras de linha nos valores
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerow(('Category', 'Key', 'Value'))
             for category, data in self.cache_data.items():
                 if isinstance(data, dict):
-                    for key, value in data.items():
-                        csv_lines.append(f"{category},{key},{value}")
+                    writer.writerows((category, key, value) for key, value in data.items())
                 else:
-                    csv_lines.append(f"{category},,{data}")
+                    writer.writerow((category, '', data))
             
-            return "\n".join(csv_lines)
+            return buffer.getvalue().rstrip('\n')
         else:
             return "Formato não suportado"
 
@@ -530,7 +811,7 @@ if __name__ == "__main__":
     
     # Exporta para diferentes formatos
     print("\n=== EXPORT JSON ===")
-    print(sdk.export_data('json'))
+    print(sdk.export_data('json', pretty=True))
     
     print("\n=== EXPORT CSV ===")
     print(sdk.export_data('csv'))
\ No newline at end of file
@@ -4,40 +4,177 @@ Servidor Flask para Sistema de Reconhecimento Facial
 Integra a interface web com o sistema de reconhecimento facial em tempo real
 """
 
+import os
+
+# Orçamento de threads entre os estágios: 1 para captura, 1 para codificação e o
+# restante para inferência. As variáveis precisam existir antes de importar
+# numpy/cv2/tensorflow, senão cada biblioteca cria um pool com todos os núcleos.
+_CPU_COUNT = os.cpu_count() or 1
+_INFERENCE_THREADS = max(1, _CPU_COUNT - 2)
+_OPENCV_THREADS = min(2, _CPU_COUNT)
+for _var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_var, str(min(4, _INFERENCE_THREADS)))
+os.environ.setdefault('TF_NUM_INTRAOP_THREADS', str(_INFERENCE_THREADS))
+os.environ.setdefault('TF_NUM_INTEROP_THREADS', '1')
+
 from flask import Flask, render_template, request, jsonify, Response
 import cv2
 import numpy as np
+import atexit
 import base64
+import hashlib
 import json
-import os
+import queue
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import threading
 import time
-from deepface import DeepFace
 import logging
 
+# Reduzir logs do TensorFlow (precisa ser definido antes da importação)
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+import tensorflow as tf
+from deepface import DeepFace
+
+# Paralelismo do TensorFlow limitado à fatia de inferência; o OpenCV (detecção,
+# resize) fica com poucas threads para não disputar núcleos com o VGG-Face
+tf.config.threading.set_intra_op_parallelism_threads(_INFERENCE_THREADS)
+tf.config.threading.set_inter_op_parallelism_threads(1)
+cv2.setNumThreads(_OPENCV_THREADS)
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Encoder JPEG com libjpeg-turbo (SIMD) para o streaming; cv2.imencode como alternativa
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _tj = TurboJPEG()
+except (ImportError, RuntimeError, OSError):
+    _tj = None
+
+JPEG_QUALITY = 80
+
+def _encode_jpeg(frame):
+    """Codifica um frame BGR em JPEG, retornando bytes ou None"""
+    if _tj is not None:
+        return _tj.encode(frame, quality=JPEG_QUALITY, pixel_format=TJPF_BGR)
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    return buffer.tobytes() if ret else None
+
+# Garantir os caminhos otimizados (SIMD) do OpenCV
+cv2.setUseOptimized(True)
+
+# Detector YuNet (ONNX, backend DNN do OpenCV); sem o modelo usa-se o Haar Cascade
+YUNET_MODEL_PATH = os.environ.get('YUNET_MODEL_PATH', 'face_detection_yunet_2023mar.onnx')
+YUNET_SCORE_THRESHOLD = 0.7
+
+# Arquivo de face conhecida: "<nome>[_<timestamp>].(png|jpg|jpeg)"
+_FACE_RE = re.compile(r'^(.+?)(?:_[^_]*)?\.(?:png|jpe?g)$', re.IGNORECASE)
+
+# Delimitadores pré-montados de cada parte do stream multipart MJPEG
+_BOUNDARY_HDR = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+_TAIL = b'\r\n'
+
+# Cada cliente da página mantém duas conexões sem fim (/video_feed e /api/events) e,
+# no waitress, cada uma ocupa uma thread do pool enquanto o cliente estiver conectado.
+# O pool reserva 2 threads por cliente de streaming e mais API_WORKER_THREADS para a
+# API; acima de MAX_STREAM_CLIENTS os streams recebem 503 em vez de esgotar o pool
+MAX_STREAM_CLIENTS = int(os.environ.get('MAX_STREAM_CLIENTS', '8'))
+API_WORKER_THREADS = 8
+SERVER_THREADS = 2 * MAX_STREAM_CLIENTS + API_WORKER_THREADS
+_stream_slots = threading.BoundedSemaphore(2 * MAX_STREAM_CLIENTS)
+
+# Modelo usado para os embeddings (também invalida o cache em disco se mudar)
+EMBEDDING_MODEL_NAME = "VGG-Face"
+
+# Kernel JIT (Numba) para o produto int8 da galeria de faces; sem Numba, usa NumPy
+try:
+    from numba import njit, prange
+
+    @njit('i4[::1](i1[:, ::1], i1[::1])', fastmath=True, cache=True, parallel=True)
+    def _int8_gallery_dots(matrix, query):
+        """Produto escalar int8 (acumulação int32) da consulta com cada linha da galeria"""
+        dots = np.empty(matrix.shape[0], dtype=np.int32)
+        for i in prange(matrix.shape[0]):
+            acc = np.int32(0)
+            for j in range(matrix.shape[1]):
+                acc += np.int32(matrix[i, j]) * np.int32(query[j])
+            dots[i] = acc
+        return dots
+except ImportError:
+    def _int8_gallery_dots(matrix, query):
+        """Produto escalar int8 (acumulação int32) da consulta com cada linha da galeria"""
+        return np.matmul(matrix, query, dtype=np.int32)
+
+
 class FaceRecognitionServer:
     def __init__(self):
         self.known_faces = {}
-        # Carregar o classificador Haar Cascade para detecção de faces
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        # Carregar o detector de faces: YuNet quando disponível, senão Haar Cascade
+        self.face_detector = self._create_yunet_detector()
+        self._detector_lock = threading.Lock()
+        self.face_cascade = None
+        if self.face_detector is None:
+            self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        # Modelo VGG-Face construído uma única vez e reutilizado em todas as inferências
+        self._vgg_model = DeepFace.build_model(EMBEDDING_MODEL_NAME)
+        self._vgg_keras = getattr(self._vgg_model, 'model', self._vgg_model)
+        self._vgg_input_size = tuple(self._vgg_keras.input_shape[1:3])
+        # Grafo compilado uma única vez (batch variável, sem retracing) em vez de predict()
+        height, width = self._vgg_input_size
+        self._embed_fn = tf.function(
+            lambda x: self._vgg_keras(x, training=False),
+            input_signature=[tf.TensorSpec([None, height, width, 3], tf.float32)]
+        )
+        # Buffers pré-alocados do lote de ROIs (crescem conforme o número de faces)
+        self._roi_buffer = np.empty((0, height, width, 3), dtype=np.uint8)
+        self._batch_buffer = np.empty((0, height, width, 3), dtype=np.float32)
+        self._embed_lock = threading.Lock()  # Buffers compartilhados entre upload e reconhecimento
         self.cap = None
         self.is_running = False
+        # Pipeline captura -> reconhecimento -> codificação com filas limitadas (back-pressure)
+        self._cap_q = queue.Queue(maxsize=2)
+        self._out_q = queue.Queue(maxsize=4)
+        self._stop_event = threading.Event()
+        self._pipeline_threads = []
+        # Publicados por troca atômica de referência (snapshots imutáveis, sem locks)
         self.current_frame = None
-        self.recognition_results = []
+        self.recognition_results = ()
+        # Assinantes do stream SSE de resultados (uma fila por cliente conectado)
+        self._result_subscribers = set()
+        self._subscribers_lock = threading.Lock()
+        self._last_results_key = None
+        self._last_results_payload = json.dumps([])
         self.faces_directory = "known_faces"
-        self.recognition_threshold = 1.0  # Threshold para distância euclidiana (ajustável)
+        self.detection_scale = 0.5  # Fator de redução do frame para a detecção
+        self._gray_buffer = None  # Buffer reutilizado para o frame em escala de cinza
+        # Rastreamento de faces entre frames: o VGG-Face roda só a cada N frames ou para faces novas
+        self.recognize_every = 5
+        self.track_iou_threshold = 0.3
+        self.max_track_missed = 10
+        self._tracks = []
+        self._frame_idx = 0
+        self.recognition_cos_threshold = 0.40  # Threshold para distância de cosseno (ajustável, VGG-Face)
+        # Índice contíguo dos embeddings conhecidos (normalizados e quantizados em int8,
+        # com escala por linha) para busca vetorizada (uma GEMV por face). Publicado como
+        # uma única tupla (nomes, matriz, escalas): quem lê pega a referência uma vez e
+        # nunca combina partes de reconstruções diferentes
+        self._emb_index = ([], np.empty((0, 0), dtype=np.int8), np.empty(0, dtype=np.float32))
         
         # Criar diretório para faces conhecidas se não existir
         if not os.path.exists(self.faces_directory):
             os.makedirs(self.faces_directory)
             
+        # Cache persistente de embeddings indexado pelo hash do conteúdo de cada imagem
+        self._cache_path = os.path.join(self.faces_directory, '.embeddings.npz')
+        self._embedding_cache = self._load_embedding_cache()
+        self._embedding_cache_dirty = False
+        atexit.register(self._save_embedding_cache)
+            
         # Carregar faces conhecidas existentes
         self.load_known_faces()
         
@@ -45,34 +182,47 @@ class FaceRecognitionServer:
         """Carrega faces conhecidas do diretório"""
         logger.info("Carregando faces conhecidas...")
         try:
-            for filename in os.listdir(self.faces_directory):
-                if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+            to_load = []
+            with os.scandir(self.faces_directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
                     # O nome da pessoa é o nome do arquivo sem extensão e sem o timestamp
-                    name = os.path.splitext(filename)[0].rsplit('_', 1)[0] 
-                    image_path = os.path.join(self.faces_directory, filename)
-                    logger.info(f"Tentando adicionar face: {name} de {image_path}")
-                    self._add_face_to_memory(name, image_path)
+                    match = _FACE_RE.match(entry.name)
+                    if match:
+                        to_load.append((match.group(1), entry.path))
+            
+            def load(item):
+                name, image_path = item
+                logger.info(f"Tentando adicionar face: {name} de {image_path}")
+                self._add_face_to_memory(name, image_path, rebuild_index=False)
+            
+            # Leitura, decodificação e detecção em paralelo (a inferência é serializada no modelo)
+            with ThreadPoolExecutor(max_workers=min(8, _CPU_COUNT)) as executor:
+                list(executor.map(load, to_load))
+            self._rebuild_embedding_index()
+            self._save_embedding_cache()
             logger.info(f"Total de {len(self.known_faces)} faces conhecidas carregadas.")
         except Exception as e:
             logger.error(f"Erro ao carregar faces conhecidas: {e}")
 
-    def _add_face_to_memory(self, name, image_path):
+    def _add_face_to_memory(self, name, image_path, rebuild_index=True, image_bytes=None):
         """Adiciona uma face (embedding) à memória do sistema"""
         try:
-            # Extrair embedding usando DeepFace
-            # enforce_detection=True garante que uma face seja detectada na imagem
-            embedding_objs = DeepFace.represent(
-                img_path=image_path, 
-                model_name="VGG-Face", 
-                enforce_detection=True
-            )
-            if embedding_objs:
-                embedding = embedding_objs[0]["embedding"]
+            # Conteúdo já em memória (upload) dispensa reler o arquivo do disco
+            if image_bytes is None:
+                with open(image_path, 'rb') as f:
+                    image_bytes = f.read()
+            embedding = self._embedding_for_image(image_bytes)
+            if embedding is not None:
                 self.known_faces[name] = {
                     'embedding': embedding,
                     'image_path': image_path,
                     'added_at': datetime.now().isoformat()
                 }
+                if rebuild_index:
+                    self._rebuild_embedding_index()
+                    self._save_embedding_cache()
                 logger.info(f"Face de '{name}' adicionada com sucesso à memória.")
                 return True
             else:
@@ -82,6 +232,184 @@ class FaceRecognitionServer:
             logger.error(f"Erro ao extrair embedding para {name} de {image_path}: {e}")
             return False
     
+    def _embedding_for_image(self, image_bytes):
+        """
+        Retorna o embedding normalizado da face em uma imagem (bytes codificados),
+        consultando primeiro o cache em disco pelo hash SHA-1 do conteúdo.
+        """
+        digest = hashlib.sha1(image_bytes).hexdigest()
+        cached = self._embedding_cache.get(digest)
+        if cached is not None:
+            return cached
+        
+        # Extrair embedding com o modelo VGG-Face já carregado (mesmo pré-processamento
+        # usado no reconhecimento); uma face precisa ser detectada na imagem
+        image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        face_roi = self._largest_face_roi(image)
+        if face_roi is None:
+            return None
+        # Armazenado em float16 (memória e cache em disco); a busca usa o índice int8
+        embedding = self._normalize_embedding(self._embed_faces([face_roi])[0]).astype(np.float16)
+        self._embedding_cache[digest] = embedding
+        self._embedding_cache_dirty = True
+        return embedding
+
+    def _load_embedding_cache(self):
+        """Carrega o cache de embeddings do disco (descartado se gerado por outro modelo)"""
+        try:
+            with np.load(self._cache_path, allow_pickle=False) as data:
+                if str(data['model_name']) != EMBEDDING_MODEL_NAME:
+                    logger.info("Cache de embeddings gerado por outro modelo; será recriado.")
+                    return {}
+                embeddings = data['embeddings'].astype(np.float16, copy=False)
+                return {str(h): emb for h, emb in zip(data['hashes'], embeddings)}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Não foi possível ler o cache de embeddings: {e}")
+            return {}
+
+    def _save_embedding_cache(self):
+        """Persiste o cache de embeddings em disco se houve alterações"""
+        if not self._embedding_cache_dirty or not self._embedding_cache:
+            return
+        try:
+            hashes = list(self._embedding_cache.keys())
+            np.savez_compressed(
+                self._cache_path,
+                model_name=np.array(EMBEDDING_MODEL_NAME),
+                hashes=np.array(hashes),
+                embeddings=np.vstack([self._embedding_cache[h] for h in hashes])
+            )
+            self._embedding_cache_dirty = False
+        except Exception as e:
+            logger.warning(f"Não foi possível salvar o cache de embeddings: {e}")
+
+    @staticmethod
+    def _create_yunet_detector():
+        """Cria o detector YuNet se o OpenCV e o modelo ONNX estiverem disponíveis"""
+        if not hasattr(cv2, 'FaceDetectorYN') or not os.path.exists(YUNET_MODEL_PATH):
+            logger.info("Detector YuNet indisponível; usando Haar Cascade.")
+            return None
+        try:
+            detector = cv2.FaceDetectorYN.create(
+                YUNET_MODEL_PATH, '', (320, 320), score_threshold=YUNET_SCORE_THRESHOLD,
+                backend_id=cv2.dnn.DNN_BACKEND_OPENCV, target_id=cv2.dnn.DNN_TARGET_CPU
+            )
+            logger.info(f"Detector YuNet carregado de {YUNET_MODEL_PATH}")
+            return detector
+        except Exception as e:
+            logger.warning(f"Falha ao carregar o detector YuNet ({e}); usando Haar Cascade.")
+            return None
+
+    def _detect_faces(self, image, scale=1.0, min_size=50):
+        """
+        Detecta faces na imagem (reduzida por `scale`) e retorna as caixas (x, y, w, h)
+        em int32 nas coordenadas da imagem original.
+        """
+        small = image
+        if scale != 1.0:
+            small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        if self.face_detector is not None:
+            # YuNet trabalha direto no BGR, sem conversão para cinza
+            with self._detector_lock:
+                self.face_detector.setInputSize((small.shape[1], small.shape[0]))
+                _, dets = self.face_detector.detect(small)
+            faces = np.empty((0, 4), dtype=np.float32) if dets is None else dets[:, :4]
+        else:
+            min_px = max(1, int(min_size * scale))
+            with self._detector_lock:
+                if self._gray_buffer is None or self._gray_buffer.shape != small.shape[:2]:
+                    self._gray_buffer = np.empty(small.shape[:2], dtype=np.uint8)
+                # Converter para escala de cinza reutilizando o mesmo buffer a cada frame
+                cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray_buffer)
+                faces = self.face_cascade.detectMultiScale(self._gray_buffer, 1.1, 4, minSize=(min_px, min_px))
+        
+        # Reescalar as caixas para as coordenadas da imagem original
+        faces = (np.asarray(faces, dtype=np.float32).reshape(-1, 4) / scale).astype(np.int32)
+        # O YuNet pode retornar caixas parcialmente fora da imagem
+        np.maximum(faces[:, :2], 0, out=faces[:, :2])
+        return faces
+
+    def _largest_face_roi(self, image):
+        """Retorna a maior face detectada na imagem, ou None"""
+        if image is None:
+            return None
+        faces = self._detect_faces(image)
+        if len(faces) == 0:
+            return None
+        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+        return image[y:y+h, x:x+w]
+
+    @staticmethod
+    def _normalize_embedding(embedding):
+        """Converte o embedding para float32 com norma L2 unitária"""
+        emb = np.asarray(embedding, dtype=np.float32).copy()
+        emb /= (np.linalg.norm(emb) + 1e-12)
+        return emb
+
+    @staticmethod
+    def _quantize_int8(values):
+        """
+        Quantiza vetores float32 para int8 com escala por linha.
+        Retorna (valores_int8, fator_de_dequantização).
+        """
+        max_abs = np.abs(values).max(axis=-1, keepdims=True)
+        scale = 127.0 / np.maximum(max_abs, 1e-12)
+        quantized = np.round(values * scale).astype(np.int8)
+        return quantized, (1.0 / scale).squeeze(-1).astype(np.float32)
+
+    def _rebuild_embedding_index(self):
+        """Reconstrói a matriz (N, D) int8 de embeddings conhecidos (já normalizados)"""
+        names = list(self.known_faces.keys())
+        if not names:
+            self._emb_index = ([], np.empty((0, 0), dtype=np.int8), np.empty(0, dtype=np.float32))
+            return
+        # Embeddings guardados em float16 são promovidos a float32 para a quantização
+        matrix = np.vstack([self.known_faces[name]['embedding'] for name in names]).astype(np.float32)
+        quantized, scales = self._quantize_int8(matrix)
+        self._emb_index = (names, np.ascontiguousarray(quantized), scales)
+
+    def _find_nearest_face(self, face_embedding):
+        """
+        Retorna (nome, distância de cosseno) da face conhecida mais próxima.
+        Com embeddings normalizados, a similaridade com todas as faces é um
+        único produto matriz-vetor: distância = 1 - M·q. O produto é feito em
+        int8 com acumulação int32 e só o melhor resultado é dequantizado.
+        """
+        names, matrix_i8, scales = self._emb_index
+        if not names:
+            return "Unknown", float('inf')
+        q_i8, q_scale = self._quantize_int8(self._normalize_embedding(face_embedding))
+        dots = _int8_gallery_dots(matrix_i8, np.ascontiguousarray(q_i8))
+        idx = int((dots * scales).argmax())
+        similarity = float(dots[idx]) * float(scales[idx]) * float(q_scale)
+        return names[idx], 1.0 - similarity
+
+    def _embed_faces(self, face_rois):
+        """
+        Gera os embeddings VGG-Face de várias faces (ROIs BGR) em uma única
+        chamada ao modelo: redimensiona, converte BGR→RGB e normaliza para 0..1.
+        """
+        with self._embed_lock:
+            return self._embed_faces_locked(face_rois)
+
+    def _embed_faces_locked(self, face_rois):
+        k = len(face_rois)
+        if self._roi_buffer.shape[0] < k:
+            # Crescer em potências de 2 para não realocar a cada variação de faces
+            capacity = 1 << (k - 1).bit_length()
+            self._roi_buffer = np.empty((capacity,) + self._roi_buffer.shape[1:], dtype=np.uint8)
+            self._batch_buffer = np.empty((capacity,) + self._batch_buffer.shape[1:], dtype=np.float32)
+        height, width = self._vgg_input_size
+        for i, roi in enumerate(face_rois):
+            cv2.resize(roi, (width, height), dst=self._roi_buffer[i])
+        # BGR→RGB (fatia invertida) e normalização em uma única operação sobre o lote
+        batch = self._batch_buffer[:k]
+        np.multiply(self._roi_buffer[:k, :, :, ::-1], np.float32(1.0 / 255.0), out=batch)
+        return self._embed_fn(tf.constant(batch)).numpy()
+
     def add_known_face(self, name, image_path):
         """Adiciona uma face conhecida ao sistema (para uso externo) """
         # Este método é mais para compatibilidade, o _add_face_to_memory faz o trabalho real
@@ -99,69 +427,79 @@ class FaceRecognitionServer:
             filename = f"{name}_{int(time.time())}.jpg"
             filepath = os.path.join(self.faces_directory, filename)
             
-            with open(filepath, 'wb') as f:
-                f.write(image_bytes)
-            
-            logger.info(f"Imagem salva em: {filepath}")
-            # Adicionar ao sistema de reconhecimento
-            success = self._add_face_to_memory(name, filepath)
+            # Adicionar ao sistema de reconhecimento direto dos bytes decodificados
+            success = self._add_face_to_memory(name, filepath, image_bytes=image_bytes)
+            if success:
+                # Gravar o JPEG original em segundo plano para não segurar a resposta HTTP
+                threading.Thread(
+                    target=self._write_uploaded_image, args=(filepath, image_bytes), daemon=True
+                ).start()
             return success, filepath
             
         except Exception as e:
             logger.error(f"Erro ao salvar face enviada: {e}")
             return False, None
     
+    @staticmethod
+    def _write_uploaded_image(filepath, image_bytes):
+        try:
+            with open(filepath, 'wb') as f:
+                f.write(image_bytes)
+            logger.info(f"Imagem salva em: {filepath}")
+        except Exception as e:
+            logger.error(f"Erro ao gravar imagem {filepath}: {e}")
+    
     def recognize_face_in_frame(self, frame):
         """Detecta e reconhece faces em um frame da câmera"""
         results = []
-        processed_frame = frame.copy() # Trabalhar em uma cópia para desenhar
+        processed_frame = frame # Só copiado quando houver faces para desenhar
 
         try:
-            # Converter para escala de cinza para detecção com Haar Cascade
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4, minSize=(100, 100)) # Aumentar minSize para reduzir falsos positivos
+            # Detectar em resolução reduzida (custo da detecção é proporcional aos pixels);
+            # minSize alto para reduzir falsos positivos do Haar Cascade
+            faces = self._detect_faces(frame, self.detection_scale, min_size=100)
             
-            for (x, y, w, h) in faces:
-                # Extrair região da face (ROI)
-                face_roi = frame[y:y+h, x:x+w]
-                recognized_name = "Unknown"
-                
-                if self.known_faces:
-                    try:
-                        # DeepFace.represent espera imagem em BGR (padrão do OpenCV)
-                        face_embedding_objs = DeepFace.represent(
-                            img_path=face_roi, 
-                            model_name="VGG-Face", 
-                            enforce_detection=False # Já detectamos com Haar Cascade
-                        )
+            self._frame_idx += 1
+            names = ["Unknown"] * len(faces)
+            distances = [None] * len(faces)
+            
+            # Reaproveitar o reconhecimento das faces rastreadas; o VGG-Face só roda
+            # para faces novas ou a cada `recognize_every` frames
+            matches = self._match_tracks(faces)
+            refresh_all = self._frame_idx % self.recognize_every == 0
+            to_embed = []
+            for i, track_idx in enumerate(matches):
+                if track_idx >= 0 and not refresh_all:
+                    names[i] = self._tracks[track_idx]['name']
+                    distances[i] = self._tracks[track_idx]['distance']
+                else:
+                    to_embed.append(i)
+            
+            if self.known_faces and to_embed:
+                try:
+                    # Extrair regiões das faces (ROIs) e gerar todos os embeddings em uma única inferência
+                    rois = [frame[y:y+h, x:x+w] for (x, y, w, h) in faces[to_embed]]
+                    embeddings = self._embed_faces(rois)
+                    
+                    for i, face_embedding in zip(to_embed, embeddings):
+                        # Calcular distância de cosseno para todas as faces conhecidas de uma vez
+                        temp_recognized_name, min_distance = self._find_nearest_face(face_embedding)
                         
-                        if face_embedding_objs:
-                            face_embedding = face_embedding_objs[0]["embedding"]
-                            
-                            min_distance = float('inf')
-                            temp_recognized_name = "Unknown"
-                            
-                            for name, face_data in self.known_faces.items():
-                                known_embedding = face_data['embedding']
-                                
-                                # Calcular distância euclidiana entre os embeddings
-                                distance = np.linalg.norm(np.array(face_embedding) - np.array(known_embedding))
-                                
-                                if distance < min_distance:
-                                    min_distance = distance
-                                    temp_recognized_name = name
-                            
-                            if min_distance < self.recognition_threshold:
-                                recognized_name = temp_recognized_name
-                                logger.info(f"Face reconhecida: {recognized_name} com distância {min_distance:.2f}")
-                            else:
-                                logger.info(f"Face detectada, mas não reconhecida (distância {min_distance:.2f} > threshold {self.recognition_threshold})")
+                        if min_distance < self.recognition_cos_threshold:
+                            names[i] = temp_recognized_name
+                            distances[i] = round(min_distance, 2)
+                            logger.info(f"Face reconhecida: {temp_recognized_name} com distância {min_distance:.2f}")
                         else:
-                            logger.warning("DeepFace não conseguiu extrair embedding da face detectada pelo Haar Cascade.")
-                            
-                    except Exception as e:
-                        logger.error(f"Erro durante o reconhecimento DeepFace para face em ({x},{y}): {e}")
-
+                            logger.info(f"Face detectada, mas não reconhecida (distância {min_distance:.2f} > threshold {self.recognition_cos_threshold})")
+                        
+                except Exception as e:
+                    logger.error(f"Erro durante o reconhecimento VGG-Face das faces do frame: {e}")
+            
+            self._update_tracks(faces, matches, names, distances)
+            
+            if len(faces):
+                processed_frame = frame.copy() # Trabalhar em uma cópia para desenhar
+            for (x, y, w, h), recognized_name, distance in zip(faces, names, distances):
                 # Desenhar retângulo e nome no frame processado
                 color = (0, 255, 0) if recognized_name != "Unknown" else (0, 0, 255) # Verde para conhecido, Vermelho para desconhecido
                 cv2.rectangle(processed_frame, (x, y), (x+w, y+h), color, 2)
@@ -171,7 +509,7 @@ class FaceRecognitionServer:
                 results.append({
                     'name': recognized_name,
                     'bbox': [int(x), int(y), int(w), int(h)],
-                    'distance': round(min_distance, 2) if recognized_name != "Unknown" else None
+                    'distance': distance
                 })
             
             return results, processed_frame
@@ -180,6 +518,48 @@ class FaceRecognitionServer:
             logger.error(f"Erro geral no reconhecimento de faces no frame: {e}")
             return [], processed_frame
     
+    @staticmethod
+    def _iou_matrix(boxes_a, boxes_b):
+        """IoU entre todas as caixas (x, y, w, h) de A e B, vetorizado -> matriz (len(A), len(B))"""
+        a = boxes_a.astype(np.float32)[:, None, :]
+        b = boxes_b.astype(np.float32)[None, :, :]
+        inter_w = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+        inter_h = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+        inter = inter_w * inter_h
+        union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - inter
+        return inter / np.maximum(union, 1e-6)
+
+    def _match_tracks(self, faces):
+        """Associa cada face detectada a uma trilha existente (índice) ou -1 se for nova"""
+        matches = [-1] * len(faces)
+        if not self._tracks or len(faces) == 0:
+            return matches
+        track_boxes = np.array([t['bbox'] for t in self._tracks], dtype=np.int32)
+        iou = self._iou_matrix(faces, track_boxes)
+        used = set()
+        for i in range(len(faces)):
+            for j in np.argsort(-iou[i]):
+                if iou[i, j] < self.track_iou_threshold:
+                    break
+                if j not in used:
+                    used.add(int(j))
+                    matches[i] = int(j)
+                    break
+        return matches
+
+    def _update_tracks(self, faces, matches, names, distances):
+        """Atualiza trilhas com as faces do frame e descarta as perdidas há muitos frames"""
+        matched = set(m for m in matches if m >= 0)
+        tracks = [
+            {'bbox': face, 'name': name, 'distance': distance, 'missed': 0}
+            for face, name, distance in zip(faces, names, distances)
+        ]
+        for j, track in enumerate(self._tracks):
+            if j not in matched and track['missed'] < self.max_track_missed:
+                track['missed'] += 1
+                tracks.append(track)
+        self._tracks = tracks
+
     def recognize_face(self, face_img):
         """Método auxiliar para reconhecimento de uma única face (não usado no loop principal) """
         # Este método é mantido para compatibilidade, mas a lógica principal está em recognize_face_in_frame
@@ -187,29 +567,11 @@ class FaceRecognitionServer:
             return "Unknown"
         
         try:
-            face_embedding_objs = DeepFace.represent(
-                img_path=face_img, 
-                model_name="VGG-Face", 
-                enforce_detection=False
-            )
+            face_embedding = self._embed_faces([face_img])[0]
             
-            if not face_embedding_objs:
-                return "Unknown"
-                
-            face_embedding = face_embedding_objs[0]["embedding"]
-            
-            min_distance = float('inf')
-            recognized_name = "Unknown"
+            recognized_name, min_distance = self._find_nearest_face(face_embedding)
             
-            for name, face_data in self.known_faces.items():
-                known_embedding = face_data['embedding']
-                distance = np.linalg.norm(np.array(face_embedding) - np.array(known_embedding))
-                
-                if distance < min_distance:
-                    min_distance = distance
-                    recognized_name = name
-            
-            if min_distance < self.recognition_threshold:
+            if min_distance < self.recognition_cos_threshold:
                 return recognized_name
             else:
                 return "Unknown"
@@ -219,7 +581,9 @@ class FaceRecognitionServer:
             return "Error"
     
     def start_camera(self):
-        """Inicia captura da câmera"""
+        """Inicia captura da câmera e as threads do pipeline de processamento"""
+        if self.is_running:
+            return True
         try:
             self.cap = cv2.VideoCapture(0) # 0 para webcam padrão
             if not self.cap.isOpened():
@@ -227,6 +591,14 @@ class FaceRecognitionServer:
                 return False
                 
             self.is_running = True
+            self._stop_event.clear()
+            # A captura do OpenCV não é thread-safe: fica isolada em uma única thread
+            self._pipeline_threads = [
+                threading.Thread(target=self._capture_loop, name="camera-capture", daemon=True),
+                threading.Thread(target=self._recognition_loop, name="face-recognition", daemon=True)
+            ]
+            for thread in self._pipeline_threads:
+                thread.start()
             logger.info("Câmera iniciada com sucesso.")
             return True
             
@@ -235,30 +607,103 @@ class FaceRecognitionServer:
             return False
     
     def stop_camera(self):
-        """Para captura da câmera"""
+        """Para captura da câmera e encerra o pipeline"""
         self.is_running = False
+        self._stop_event.set()
+        for thread in self._pipeline_threads:
+            thread.join(timeout=2)
+        self._pipeline_threads = []
         if self.cap:
             self.cap.release()
+        # Descartar frames pendentes
+        for q in (self._cap_q, self._out_q):
+            while not q.empty():
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
         logger.info("Câmera parada.")
     
-    def get_frame(self):
-        """Obtém frame atual da câmera, processa e retorna"""
-        if not self.cap or not self.is_running:
-            return None
+    def _put_until_stopped(self, q, item):
+        """Insere na fila bloqueando (back-pressure) até haver espaço ou o pipeline parar"""
+        while not self._stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _capture_loop(self):
+        """Estágio 1: lê frames da câmera"""
+        while not self._stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                logger.warning("Falha ao ler frame da câmera.")
+                time.sleep(0.05)
+                continue
+            self._put_until_stopped(self._cap_q, frame)
+    
+    def _recognition_loop(self):
+        """Estágio 2: detecta e reconhece faces nos frames capturados"""
+        while not self._stop_event.is_set():
+            try:
+                frame = self._cap_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
             
-        ret, frame = self.cap.read()
-        if not ret:
-            logger.warning("Falha ao ler frame da câmera.")
-            return None
+            # Reconhecer faces no frame
+            results, processed_frame = self.recognize_face_in_frame(frame)
             
-        # Reconhecer faces no frame
-        results, processed_frame = self.recognize_face_in_frame(frame)
-        
-        # Armazenar resultados para a API
-        self.recognition_results = results
-        self.current_frame = processed_frame
-        
-        return processed_frame
+            # Armazenar resultados para a API: publica um novo snapshot imutável,
+            # leitores concorrentes veem o anterior ou o novo, nunca um estado parcial
+            self.recognition_results = tuple(results)
+            self.current_frame = processed_frame
+            self._publish_results(results)
+            
+            self._put_until_stopped(self._out_q, processed_frame)
+    
+    def _publish_results(self, results):
+        """Envia os resultados aos assinantes SSE apenas quando mudarem"""
+        key = (tuple(sorted(r['name'] for r in results)), len(results))
+        if key == self._last_results_key:
+            return
+        self._last_results_key = key
+        payload = json.dumps(results)  # Serializado uma única vez para todos os clientes
+        self._last_results_payload = payload
+        with self._subscribers_lock:
+            subscribers = tuple(self._result_subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                # Cliente lento: descartar o resultado antigo e manter só o mais recente
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait(payload)
+    
+    def subscribe_results(self):
+        """Registra um assinante de resultados; retorna a fila que receberá os payloads JSON"""
+        q = queue.Queue(maxsize=1)
+        q.put_nowait(self._last_results_payload)
+        with self._subscribers_lock:
+            self._result_subscribers.add(q)
+        return q
+    
+    def unsubscribe_results(self, q):
+        with self._subscribers_lock:
+            self._result_subscribers.discard(q)
+    
+    def get_frame(self, timeout=0.1):
+        """Obtém o próximo frame processado pelo pipeline (estágio 3 codifica e envia)"""
+        if not self.is_running:
+            return None
+        try:
+            return self._out_q.get(timeout=timeout)
+        except queue.Empty:
+            return None
     
     def get_known_faces_list(self):
         """Retorna lista de faces conhecidas"""
@@ -332,7 +777,39 @@ def get_faces_api():
 def get_recognition_results_api():
     """API para obter resultados do reconhecimento"""
     # logger.debug("Requisição para obter resultados de reconhecimento.") # Pode ser muito verboso
-    return jsonify({'results': face_server.recognition_results})
+    results = face_server.recognition_results  # Lido uma única vez (snapshot)
+    return jsonify({'results': list(results)})
+
+def _streaming_response(generator, **kwargs):
+    """Response de streaming que ocupa uma vaga até o servidor fechar a conexão (ou 503)"""
+    if not _stream_slots.acquire(blocking=False):
+        generator.close()
+        return Response('Limite de clientes de streaming atingido', status=503,
+                        headers={'Retry-After': '5'})
+    response = Response(generator, **kwargs)
+    response.call_on_close(_stream_slots.release)
+    return response
+
+def event_stream():
+    """Gerador de eventos SSE com os resultados de reconhecimento (só quando mudam)"""
+    q = face_server.subscribe_results()
+    try:
+        while True:
+            try:
+                payload = q.get(timeout=15)
+            except queue.Empty:
+                # Comentário SSE para manter a conexão e detectar clientes desconectados
+                yield ': keep-alive\n\n'
+                continue
+            yield f'data: {payload}\n\n'
+    finally:
+        face_server.unsubscribe_results(q)
+
+@app.route('/api/events')
+def events_api():
+    """Stream SSE (Server-Sent Events) dos resultados do reconhecimento"""
+    return _streaming_response(event_stream(), mimetype='text/event-stream',
+                               headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 def generate_frames():
     """Gerador de frames para streaming de vídeo"""
@@ -340,19 +817,21 @@ def generate_frames():
         frame = face_server.get_frame()
         if frame is not None:            
             # Codificar frame como JPEG
-            ret, buffer = cv2.imencode('.jpg', frame)
-            if ret:
-                frame_bytes = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            frame_bytes = _encode_jpeg(frame)
+            if frame_bytes is not None:
+                # Enviar as partes separadas evita concatenar o JPEG inteiro a cada frame
+                yield _BOUNDARY_HDR
+                yield frame_bytes
+                yield _TAIL
         else:
             time.sleep(0.05) # Pequeno delay para evitar uso excessivo da CPU quando a câmera não está ativa
 
 @app.route('/video_feed')
 def video_feed():
     """Streaming de vídeo"""
-    return Response(generate_frames(),
-                    mimetype='multipart/x-mixed-replace; boundary=frame')
+    return _streaming_response(generate_frames(),
+                               mimetype='multipart/x-mixed-replace; boundary=frame',
+                               direct_passthrough=True)
 
 # Criar template HTML se não existir
 template_dir = 'templates'
@@ -508,7 +987,7 @@ html_template = '''
 
     <script>
         let isCameraRunning = false;
-        let recognitionUpdateInterval;
+        let recognitionEvents;
 
         function updateStatus(message, type = '') {
             const status = document.getElementById('status');
@@ -547,7 +1026,7 @@ html_template = '''
                 document.getElementById('stopBtn').style.display = 'none';
                 updateStatus('Câmera parada', 'warning');
                 isCameraRunning = false;
-                clearInterval(recognitionUpdateInterval);
+                stopRecognitionUpdates();
             } catch (error) {
                 console.error('Erro ao parar câmera:', error);
                 updateStatus('Erro ao parar câmera.', 'error');
@@ -638,19 +1117,25 @@ html_template = '''
             }
         }
 
-        function startRecognitionUpdates() {
-            if (recognitionUpdateInterval) {
-                clearInterval(recognitionUpdateInterval);
+        function stopRecognitionUpdates() {
+            if (recognitionEvents) {
+                recognitionEvents.close();
+                recognitionEvents = null;
             }
-            recognitionUpdateInterval = setInterval(async () => {
+        }
+
+        function startRecognitionUpdates() {
+            stopRecognitionUpdates();
+            // O servidor envia os resultados (SSE) apenas quando eles mudam
+            recognitionEvents = new EventSource('/api/events');
+            recognitionEvents.onmessage = (event) => {
                 if (!isCameraRunning) return;
                 
                 try {
-                    const response = await fetch('/api/recognition_results');
-                    const data = await response.json();
+                    const results = JSON.parse(event.data);
                     
-                    if (data.results && data.results.length > 0) {
-                        const recognizedNames = data.results.filter(r => r.name !== "Unknown").map(r => r.name);
+                    if (results && results.length > 0) {
+                        const recognizedNames = results.filter(r => r.name !== "Unknown").map(r => r.name);
                         if (recognizedNames.length > 0) {
                             updateStatus(`Detectado: ${recognizedNames.join(', ')}`, 'success');
                         } else {
@@ -663,7 +1148,7 @@ html_template = '''
                     console.error('Erro ao obter resultados de reconhecimento:', error);
                     updateStatus('Erro ao obter resultados de reconhecimento.', 'error');
                 }
-            }, 1000); // Atualiza a cada segundo
+            };
         }
 
         // Carregar faces ao inicializar
@@ -683,9 +1168,19 @@ if __name__ == '__main__':
     print("🔍 Sistema pronto para reconhecimento facial em tempo real!")
     
     try:
-        # Usar debug=False e threaded=False para evitar problemas em alguns ambientes
-        # Para desenvolvimento, debug=True pode ser útil, mas pode causar recarregamento duplo
-        app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+        # Servidor WSGI de produção (pool fixo de threads) em vez do servidor de
+        # desenvolvimento do Werkzeug; o face_server é um singleton do processo.
+        # O pool tem SERVER_THREADS threads (2 por cliente de streaming + API); ajuste
+        # MAX_STREAM_CLIENTS para o número esperado de páginas abertas.
+        # Com gunicorn use 1 worker (a câmera é única), --preload e o mesmo total:
+        #   gunicorn -w 1 -k gthread --threads 24 --preload face_recognition_server:app
+        try:
+            from waitress import serve
+        except ImportError:
+            logger.warning("waitress não instalado; usando o servidor de desenvolvimento do Flask.")
+            app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+        else:
+            serve(app, host='0.0.0.0', port=5000, threads=SERVER_THREADS, connection_limit=256)
     except KeyboardInterrupt:
         print("\n⏹️ Servidor interrompido pelo usuário")
         face_server.stop_camera()
@@ -1,6 +1,3 @@
-import requests
-from device_info import DeviceEnvironmentSDK
-
 """
 IP Location SDK - Coleta de Dados com Geolocalização
 Desenvolvido para TCC - Curso de Cyber Segurança
@@ -13,22 +10,51 @@ Funcionalidades:
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Union, Any
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple
+from collections import OrderedDict, deque
+import bisect
 from datetime import datetime, timedelta
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
 from enum import Enum
-import hashlib
+import secrets
 import time
-from device_info import DeviceEnvironmentSDK
+import asyncio
+import ipaddress
+import threading
+from itertools import islice
+from urllib.parse import urlsplit
+try:
+    from itertools import batched
+except ImportError:  # Python < 3.12
+    def batched(iterable, n):
+        it = iter(iterable)
+        while chunk := tuple(islice(it, n)):
+            yield chunk
+
+# aiohttp é opcional: habilita consultas concorrentes (get_ip_locations_bulk)
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# orjson (C) para decodificar as respostas dos provedores e serializar relatórios;
+# json da biblioteca padrão como alternativa
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-session_id = "sess_" + hashlib.md5(str(time.time()).encode()).hexdigest()[:8]
-
 
 class AuthMethod(Enum):
     """Métodos de autenticação suportados"""
@@ -47,24 +73,24 @@ class AuthResult(Enum):
     EXPIRED = "expired"
 
 
+@dataclass(slots=True)
 class GeoLocationData:
     """Classe para padronizar dados de geolocalização"""
     
-    def __init__(self):
-        self.ip: str = ""
-        self.country: str = ""
-        self.country_code: str = ""
-        self.city: str = ""
-        self.region: str = ""
-        self.latitude: float = 0.0
-        self.longitude: float = 0.0
-        self.timezone: str = ""
-        self.isp: str = ""
-        self.organization: str = ""
-        self.is_proxy: bool = False
-        self.is_vpn: bool = False
-        self.threat_level: str = "low"
-        self.timestamp: datetime = datetime.now()
+    ip: str = ""
+    country: str = ""
+    country_code: str = ""
+    city: str = ""
+    region: str = ""
+    latitude: float = 0.0
+    longitude: float = 0.0
+    timezone: str = ""
+    isp: str = ""
+    organization: str = ""
+    is_proxy: bool = False
+    is_vpn: bool = False
+    threat_level: str = "low"
+    timestamp: datetime = field(default_factory=datetime.now)
     
     def to_dict(self) -> Dict[str, Any]:
         """Converte para dicionário"""
@@ -86,17 +112,20 @@ class GeoLocationData:
         }
 
 
+@dataclass(slots=True)
 class SessionData:
     """Classe para dados da sessão do usuário"""
     
-    def __init__(self, session_id: str):
-        self.session_id = session_id
-        self.start_time = datetime.now()
-        self.last_activity = datetime.now()
-        self.duration = timedelta(0)
-        self.page_views = 0
-        self.actions_count = 0
-        self.is_active = True
+    session_id: str
+    start_time: datetime = field(default_factory=datetime.now)
+    last_activity: datetime = field(init=False)
+    duration: timedelta = field(default_factory=timedelta)
+    page_views: int = 0
+    actions_count: int = 0
+    is_active: bool = True
+    
+    def __post_init__(self):
+        self.last_activity = self.start_time
     
     def update_activity(self):
         """Atualiza última atividade e calcula duração"""
@@ -133,28 +162,117 @@ class RequestOriginData:
         self.timestamp: datetime = datetime.now()
 
 
+@dataclass(slots=True)
 class AuthenticationData:
     """Classe para dados de autenticação"""
     
-    def __init__(self):
-        self.user_id: Optional[str] = None
-        self.username: Optional[str] = None
-        self.auth_method: AuthMethod = AuthMethod.PASSWORD
-        self.auth_result: AuthResult = AuthResult.FAILED
-        self.failure_reason: Optional[str] = None
-        self.consecutive_failures: int = 0
-        self.last_success: Optional[datetime] = None
-        self.last_failure: Optional[datetime] = None
-        self.ip_address: str = ""
-        self.timestamp: datetime = datetime.now()
-        self.session_id: Optional[str] = None
+    user_id: Optional[str] = None
+    username: Optional[str] = None
+    auth_method: AuthMethod = AuthMethod.PASSWORD
+    auth_result: AuthResult = AuthResult.FAILED
+    failure_reason: Optional[str] = None
+    consecutive_failures: int = 0
+    last_success: Optional[datetime] = None
+    last_failure: Optional[datetime] = None
+    ip_address: str = ""
+    timestamp: datetime = field(default_factory=datetime.now)
+    session_id: Optional[str] = None
+    
+    @property
+    def timestamp_epoch(self) -> float:
+        """Instante da tentativa em epoch (float), sempre derivado de timestamp"""
+        return self.timestamp.timestamp()
+
+
+# Máximo de tentativas mantidas por usuário (buffer circular)
+MAX_AUTH_HISTORY_PER_USER = 1024
+
+
+@dataclass(slots=True)
+class UserAuthState:
+    """Histórico limitado de autenticação de um usuário com contadores incrementais"""
+    
+    # Tentativas em ordem cronológica, com os instantes (epoch) em paralelo para busca
+    # binária e o número de falhas anteriores a cada uma (prefixo):
+    # falhas na janela = failure_total - failure_prefix[início da janela]
+    attempts: deque = field(default_factory=lambda: deque(maxlen=MAX_AUTH_HISTORY_PER_USER))
+    timestamps: deque = field(default_factory=lambda: deque(maxlen=MAX_AUTH_HISTORY_PER_USER))
+    failure_prefix: deque = field(default_factory=lambda: deque(maxlen=MAX_AUTH_HISTORY_PER_USER))
+    failure_total: int = 0
+    failure_streak: int = 0  # Falhas seguidas desde o último sucesso
+    
+    def add(self, auth_data: AuthenticationData, failed: bool):
+        """Insere mantendo a ordem cronológica (normalmente é um append; no limite o mais antigo sai)"""
+        ts = auth_data.timestamp_epoch
+        if not self.timestamps or ts >= self.timestamps[-1]:
+            self.attempts.append(auth_data)
+            self.timestamps.append(ts)
+            self.failure_prefix.append(self.failure_total)
+        else:
+            if len(self.timestamps) == self.timestamps.maxlen:
+                self.pop_oldest()
+            idx = bisect.bisect_right(self.timestamps, ts)
+            self.attempts.insert(idx, auth_data)
+            self.timestamps.insert(idx, ts)
+            self.failure_prefix.insert(idx, self.failure_prefix[idx] if idx < len(self.failure_prefix)
+                                       else self.failure_total)
+            if failed:
+                for j in range(idx + 1, len(self.failure_prefix)):
+                    self.failure_prefix[j] += 1
+        if failed:
+            self.failure_total += 1
+            self.failure_streak += 1
+        else:
+            self.failure_streak = 0
+    
+    def pop_oldest(self):
+        self.timestamps.popleft()
+        self.attempts.popleft()
+        self.failure_prefix.popleft()
+    
+    def prune(self, cutoff: float):
+        """Descarta tentativas até o instante `cutoff`"""
+        while self.timestamps and self.timestamps[0] <= cutoff:
+            self.pop_oldest()
+    
+    def window_start(self, cutoff: float) -> int:
+        return bisect.bisect_right(self.timestamps, cutoff)
+    
+    def recent(self, cutoff: float) -> List[AuthenticationData]:
+        return list(islice(self.attempts, self.window_start(cutoff), None))
+    
+    def count_failures(self, cutoff: float) -> int:
+        idx = self.window_start(cutoff)
+        if idx >= len(self.failure_prefix):
+            return 0
+        return self.failure_total - self.failure_prefix[idx]
+
+
+def is_valid_ip(ip_address: str) -> bool:
+    """Valida localmente um endereço IPv4/IPv6 (evita gastar uma requisição com lixo)"""
+    try:
+        ipaddress.ip_address(ip_address)
+        return True
+    except ValueError:
+        return False
 
 
 # ============= PROVIDER INTERFACE =============
 
+class ProviderRequestError(Exception):
+    """Falha na requisição ao provedor (rede, HTTP ou resposta ilegível).
+    
+    Respostas válidas sem localização (IPs privados/reservados) não geram este erro:
+    voltam como GeoLocationData vazio e não colocam o provedor em espera.
+    """
+
+
 class GeoLocationProviderInterface(ABC):
     """Interface abstrata para provedores de geolocalização"""
     
+    # Provedores de fallback (dados simulados): resultados nunca entram no cache
+    is_fallback = False
+    
     @abstractmethod
     def get_location(self, ip_address: str) -> GeoLocationData:
         """Método abstrato para obter localização por IP"""
@@ -169,16 +287,49 @@ class GeoLocationProviderInterface(ABC):
     def get_provider_name(self) -> str:
         """Retorna nome do provedor"""
         pass
+    
+    async def get_location_async(self, ip_address: str, session) -> GeoLocationData:
+        """Versão assíncrona de get_location (padrão: delega para a versão síncrona)"""
+        return self.get_location(ip_address)
 
 
 # ============= IMPLEMENTAÇÕES DE PROVEDORES =============
 
-class IPInfoProvider(GeoLocationProviderInterface):
+class PooledHTTPProvider(GeoLocationProviderInterface):
+    """Base para provedores HTTP: reutiliza conexões keep-alive via requests.Session"""
+    
+    # Máximo de IPs por requisição nos provedores com endpoint de lote (get_locations_batch)
+    BATCH_SIZE = 100
+    
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10, pool_maxsize=20,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        # Monta na origem (esquema + host) para cobrir também os endpoints fora de base_url
+        # (ex.: http://ip-api.com/batch quando base_url é http://ip-api.com/json)
+        parts = urlsplit(base_url)
+        self._session.mount(f"{parts.scheme}://{parts.netloc}/", adapter)
+    
+    def close(self):
+        """Fecha as conexões mantidas pelo provedor"""
+        self._session.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class IPInfoProvider(PooledHTTPProvider):
     """Provedor usando IPInfo.io"""
     
     def __init__(self, api_key: Optional[str] = None):
+        super().__init__("https://ipinfo.io")
         self.api_key = api_key
-        self.base_url = "https://ipinfo.io"
     
     def get_location(self, ip_address: str) -> GeoLocationData:
         """Obtém localização usando IPInfo"""
@@ -189,36 +340,88 @@ class IPInfoProvider(GeoLocationProviderInterface):
             url = f"{self.base_url}/{ip_address}/json"
             params = {"token": self.api_key} if self.api_key else {}
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._session.get(url, params=params, timeout=10)
             response.raise_for_status()
             
-            data = response.json()
+            self._parse_response(_json_loads(response.content), geo_data)
+            logger.info(f"IPInfo: Localização obtida para IP {ip_address}")
             
-            # Mapear dados do IPInfo para nosso formato
-            geo_data.country = data.get("country", "")
-            geo_data.city = data.get("city", "")
-            geo_data.region = data.get("region", "")
+        except Exception as e:
+            logger.error(f"Erro ao consultar IPInfo para IP {ip_address}: {str(e)}")
+            raise ProviderRequestError(str(e)) from e
             
-            # Processar coordenadas
-            if "loc" in data:
-                coords = data["loc"].split(",")
-                geo_data.latitude = float(coords[0]) if len(coords) > 0 else 0.0
-                geo_data.longitude = float(coords[1]) if len(coords) > 1 else 0.0
+        return geo_data
+    
+    async def get_location_async(self, ip_address: str, session) -> GeoLocationData:
+        """Obtém localização usando IPInfo (aiohttp)"""
+        geo_data = GeoLocationData()
+        geo_data.ip = ip_address
+        
+        try:
+            url = f"{self.base_url}/{ip_address}/json"
+            params = {"token": self.api_key} if self.api_key else {}
             
-            geo_data.timezone = data.get("timezone", "")
-            geo_data.isp = data.get("org", "")
+            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                data = _json_loads(await response.read())
             
+            self._parse_response(data, geo_data)
             logger.info(f"IPInfo: Localização obtida para IP {ip_address}")
             
         except Exception as e:
             logger.error(f"Erro ao consultar IPInfo para IP {ip_address}: {str(e)}")
+            raise ProviderRequestError(str(e)) from e
             
         return geo_data
     
+    def get_locations_batch(self, ip_addresses: List[str]) -> List[GeoLocationData]:
+        """Obtém a localização de até BATCH_SIZE IPs em uma única requisição (requer token)"""
+        geo_list = []
+        for ip_address in ip_addresses:
+            geo_data = GeoLocationData()
+            geo_data.ip = ip_address
+            geo_list.append(geo_data)
+        
+        try:
+            params = {"token": self.api_key} if self.api_key else {}
+            response = self._session.post(f"{self.base_url}/batch", params=params,
+                                          json=list(ip_addresses), timeout=10)
+            response.raise_for_status()
+            
+            # Resposta: {"<ip>": {...}} na mesma chave enviada
+            data = _json_loads(response.content)
+            for geo_data in geo_list:
+                entry = data.get(geo_data.ip)
+                if isinstance(entry, dict):
+                    self._parse_response(entry, geo_data)
+            logger.info(f"IPInfo: Lote de {len(geo_list)} IPs consultado")
+            
+        except Exception as e:
+            logger.error(f"Erro ao consultar lote no IPInfo: {str(e)}")
+            raise ProviderRequestError(str(e)) from e
+            
+        return geo_list
+    
+    @staticmethod
+    def _parse_response(data: Dict[str, Any], geo_data: GeoLocationData):
+        """Mapeia dados do IPInfo para nosso formato"""
+        geo_data.country = data.get("country", "")
+        geo_data.city = data.get("city", "")
+        geo_data.region = data.get("region", "")
+        
+        # Processar coordenadas
+        if "loc" in data:
+            lat_s, _, lon_s = data["loc"].partition(",")
+            geo_data.latitude = float(lat_s) if lat_s else 0.0
+            geo_data.longitude = float(lon_s) if lon_s else 0.0
+        
+        geo_data.timezone = data.get("timezone", "")
+        geo_data.isp = data.get("org", "")
+    
     def is_available(self) -> bool:
         """Testa disponibilidade do IPInfo"""
         try:
-            response = requests.get(f"{self.base_url}/8.8.8.8/json", timeout=5)
+            response = self._session.get(f"{self.base_url}/8.8.8.8/json", timeout=5)
             return response.status_code == 200
         except:
             return False
@@ -227,11 +430,14 @@ class IPInfoProvider(GeoLocationProviderInterface):
         return "IPInfo.io"
 
 
-class IPAPIProvider(GeoLocationProviderInterface):
+class IPAPIProvider(PooledHTTPProvider):
     """Provedor usando IP-API.com"""
     
+    FIELDS = "status,message,query,country,countryCode,region,city,lat,lon,timezone,isp,org,proxy"
+    
     def __init__(self):
-        self.base_url = "http://ip-api.com/json"
+        super().__init__("http://ip-api.com/json")
+        self.batch_url = "http://ip-api.com/batch"
     
     def get_location(self, ip_address: str) -> GeoLocationData:
         """Obtém localização usando IP-API"""
@@ -240,41 +446,89 @@ class IPAPIProvider(GeoLocationProviderInterface):
         
         try:
             url = f"{self.base_url}/{ip_address}"
-            params = {
-                "fields": "status,message,country,countryCode,region,city,lat,lon,timezone,isp,org,proxy"
-            }
+            params = {"fields": self.FIELDS}
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._session.get(url, params=params, timeout=10)
             response.raise_for_status()
             
-            data = response.json()
-            
-            if data.get("status") == "success":
-                geo_data.country = data.get("country", "")
-                geo_data.country_code = data.get("countryCode", "")
-                geo_data.city = data.get("city", "")
-                geo_data.region = data.get("region", "")
-                geo_data.latitude = data.get("lat", 0.0)
-                geo_data.longitude = data.get("lon", 0.0)
-                geo_data.timezone = data.get("timezone", "")
-                geo_data.isp = data.get("isp", "")
-                geo_data.organization = data.get("org", "")
-                geo_data.is_proxy = data.get("proxy", False)
+            self._parse_response(_json_loads(response.content), geo_data)
                 
-                logger.info(f"IP-API: Localização obtida para IP {ip_address}")
-            else:
-                logger.warning(f"IP-API retornou erro para IP {ip_address}: {data.get('message', 'Unknown error')}")
+        except Exception as e:
+            logger.error(f"Erro ao consultar IP-API para IP {ip_address}: {str(e)}")
+            raise ProviderRequestError(str(e)) from e
+            
+        return geo_data
+    
+    async def get_location_async(self, ip_address: str, session) -> GeoLocationData:
+        """Obtém localização usando IP-API (aiohttp)"""
+        geo_data = GeoLocationData()
+        geo_data.ip = ip_address
+        
+        try:
+            url = f"{self.base_url}/{ip_address}"
+            params = {"fields": self.FIELDS}
+            
+            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                data = _json_loads(await response.read())
+            
+            self._parse_response(data, geo_data)
                 
         except Exception as e:
             logger.error(f"Erro ao consultar IP-API para IP {ip_address}: {str(e)}")
+            raise ProviderRequestError(str(e)) from e
             
         return geo_data
     
+    def get_locations_batch(self, ip_addresses: List[str]) -> List[GeoLocationData]:
+        """Obtém a localização de até BATCH_SIZE IPs em uma única requisição"""
+        geo_list = []
+        for ip_address in ip_addresses:
+            geo_data = GeoLocationData()
+            geo_data.ip = ip_address
+            geo_list.append(geo_data)
+        
+        try:
+            response = self._session.post(
+                self.batch_url, params={"fields": self.FIELDS},
+                json=[{"query": ip} for ip in ip_addresses], timeout=10
+            )
+            response.raise_for_status()
+            
+            # A resposta é uma lista na mesma ordem da requisição
+            for geo_data, entry in zip(geo_list, _json_loads(response.content)):
+                self._parse_response(entry, geo_data)
+                
+        except Exception as e:
+            logger.error(f"Erro ao consultar lote no IP-API: {str(e)}")
+            raise ProviderRequestError(str(e)) from e
+            
+        return geo_list
+    
+    @staticmethod
+    def _parse_response(data: Dict[str, Any], geo_data: GeoLocationData):
+        """Mapeia dados do IP-API para nosso formato"""
+        if data.get("status") == "success":
+            geo_data.country = data.get("country", "")
+            geo_data.country_code = data.get("countryCode", "")
+            geo_data.city = data.get("city", "")
+            geo_data.region = data.get("region", "")
+            geo_data.latitude = data.get("lat", 0.0)
+            geo_data.longitude = data.get("lon", 0.0)
+            geo_data.timezone = data.get("timezone", "")
+            geo_data.isp = data.get("isp", "")
+            geo_data.organization = data.get("org", "")
+            geo_data.is_proxy = data.get("proxy", False)
+            
+            logger.info(f"IP-API: Localização obtida para IP {geo_data.ip}")
+        else:
+            logger.warning(f"IP-API retornou erro para IP {geo_data.ip}: {data.get('message', 'Unknown error')}")
+    
     def is_available(self) -> bool:
         """Testa disponibilidade do IP-API"""
         try:
-            response = requests.get(f"{self.base_url}/8.8.8.8", timeout=5)
-            data = response.json()
+            response = self._session.get(f"{self.base_url}/8.8.8.8", timeout=5)
+            data = _json_loads(response.content)
             return data.get("status") == "success"
         except:
             return False
@@ -286,6 +540,8 @@ class IPAPIProvider(GeoLocationProviderInterface):
 class MockGeoProvider(GeoLocationProviderInterface):
     """Provedor mock para testes e desenvolvimento"""
     
+    is_fallback = True
+    
     def get_location(self, ip_address: str) -> GeoLocationData:
         """Retorna dados simulados"""
         geo_data = GeoLocationData()
@@ -314,27 +570,87 @@ class MockGeoProvider(GeoLocationProviderInterface):
 class IPLocationSDK:
     """SDK principal para coleta de dados de geolocalização e sessão"""
     
-    def __init__(self):
-        self.providers: List[GeoLocationProviderInterface] = []
+    def __init__(self, cache_ttl: float = 3600, cache_maxsize: int = 10_000):
+        # Instâncias ou fábricas (classes/callables) instanciadas só no primeiro uso
+        self.providers: List[Any] = []
         self.sessions: Dict[str, SessionData] = {}
-        self.auth_attempts: Dict[str, List[AuthenticationData]] = {}
+        # Estado de autenticação por usuário (buffer circular + contadores incrementais);
+        # auth_attempts expõe os mesmos deques de tentativas
+        self._auth_state: Dict[str, UserAuthState] = {}
+        self.auth_attempts: Dict[str, deque] = {}
+        self.auth_history_retention = timedelta(hours=24)
         self.default_provider_index = 0
         
+        # Cache LRU com TTL das localizações por IP: (instante monotônico, dados)
+        self.cache_ttl = cache_ttl
+        self.cache_maxsize = cache_maxsize
+        self._geo_cache: "OrderedDict[str, Tuple[float, GeoLocationData]]" = OrderedDict()
+        self._geo_cache_lock = threading.Lock()
+        
+        # Provedores que falharam ficam em espera por alguns segundos (sem sondagem prévia)
+        self.provider_cooldown_seconds = 30
+        self._provider_cooldown: Dict[str, float] = {}
+        
         # Configurar provedores padrão
         self._setup_default_providers()
     
     def _setup_default_providers(self):
-        """Configura provedores padrão"""
+        """Configura provedores padrão (instanciados sob demanda)"""
         self.providers = [
-            IPAPIProvider(),
-            IPInfoProvider(),
-            MockGeoProvider()  # Fallback
+            IPAPIProvider,
+            IPInfoProvider,
+            MockGeoProvider  # Fallback
         ]
     
-    def add_provider(self, provider: GeoLocationProviderInterface):
-        """Adiciona um novo provedor"""
+    def _iter_providers(self):
+        """Percorre os provedores em ordem, instanciando cada fábrica ao chegar nela"""
+        for i in range(len(self.providers)):
+            entry = self.providers[i]
+            if not isinstance(entry, GeoLocationProviderInterface):
+                entry = entry()
+                self.providers[i] = entry
+            yield entry
+    
+    def _get_cached_location(self, ip_address: str) -> Optional[GeoLocationData]:
+        """Retorna a localização em cache se ainda estiver dentro do TTL"""
+        with self._geo_cache_lock:
+            entry = self._geo_cache.get(ip_address)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.cache_ttl:
+                del self._geo_cache[ip_address]
+                return None
+            self._geo_cache.move_to_end(ip_address)
+            return entry[1]
+    
+    def _cache_location(self, ip_address: str, location_data: GeoLocationData):
+        """Armazena a localização, descartando as menos recentes acima do limite"""
+        with self._geo_cache_lock:
+            self._geo_cache[ip_address] = (time.monotonic(), location_data)
+            self._geo_cache.move_to_end(ip_address)
+            while len(self._geo_cache) > self.cache_maxsize:
+                self._geo_cache.popitem(last=False)
+    
+    def _is_cooling_down(self, provider: GeoLocationProviderInterface) -> bool:
+        """Indica se o provedor falhou recentemente e deve ser pulado"""
+        return self._provider_cooldown.get(provider.get_provider_name(), 0.0) > time.monotonic()
+    
+    def _mark_provider_failure(self, provider: GeoLocationProviderInterface):
+        """Coloca o provedor em espera após uma falha de requisição"""
+        self._provider_cooldown[provider.get_provider_name()] = time.monotonic() + self.provider_cooldown_seconds
+    
+    def clear_location_cache(self):
+        """Limpa o cache de localizações"""
+        with self._geo_cache_lock:
+            self._geo_cache.clear()
+    
+    def add_provider(self, provider):
+        """Adiciona um novo provedor (instância ou fábrica, instanciada no primeiro uso)"""
         self.providers.append(provider)
-        logger.info(f"Provedor adicionado: {provider.get_provider_name()}")
+        if isinstance(provider, GeoLocationProviderInterface):
+            logger.info(f"Provedor adicionado: {provider.get_provider_name()}")
+        else:
+            logger.info(f"Provedor adicionado: {getattr(provider, '__name__', provider)}")
     
     def get_ip_location(self, ip_address: str, retry_on_failure: bool = True) -> Optional[GeoLocationData]:
         """
@@ -347,23 +663,146 @@ class IPLocationSDK:
         Returns:
             GeoLocationData ou None se falhar
         """
+        cached = self._get_cached_location(ip_address)
+        if cached is not None:
+            return cached
+        
+        if not is_valid_ip(ip_address):
+            logger.warning(f"Endereço IP inválido: {ip_address!r}")
+            return None
+        
         if not self.providers:
             logger.error("Nenhum provedor de geolocalização configurado")
             return None
         
-        # Tentar provedor padrão primeiro
-        for i, provider in enumerate(self.providers):
+        # Tentar provedor padrão primeiro; a própria consulta indica a indisponibilidade
+        for provider in self._iter_providers():
+            if self._is_cooling_down(provider):
+                logger.debug(f"Provedor {provider.get_provider_name()} em espera após falha recente")
+                continue
             try:
-                if provider.is_available():
-                    location_data = provider.get_location(ip_address)
-                    if location_data and location_data.country:  # Verificar se obteve dados válidos
-                        logger.info(f"Localização obtida via {provider.get_provider_name()}")
-                        return location_data
-                else:
-                    logger.warning(f"Provedor {provider.get_provider_name()} não está disponível")
+                location_data = provider.get_location(ip_address)
+                if location_data and location_data.country:  # Verificar se obteve dados válidos
+                    logger.info(f"Localização obtida via {provider.get_provider_name()}")
+                    if not provider.is_fallback:
+                        self._cache_location(ip_address, location_data)
+                    return location_data
+                # Resposta sem país (ex.: IP privado) não é falha do provedor: sem espera
                     
+            except ProviderRequestError:
+                self._mark_provider_failure(provider)  # Erro já registrado pelo provedor
+            except Exception as e:
+                logger.error(f"Erro ao usar provedor {provider.get_provider_name()}: {str(e)}")
+                self._mark_provider_failure(provider)
+                
+            if not retry_on_failure:
+                break
+        
+        logger.error(f"Falha ao obter localização para IP {ip_address} com todos os provedores")
+        return None
+    
+    def get_ip_locations(self, ip_addresses: List[str]) -> List[Optional[GeoLocationData]]:
+        """
+        Obtém a localização de vários IPs, usando os endpoints de lote dos provedores
+        (⌈N/BATCH_SIZE⌉ requisições) e consulta individual nos que não os suportam
+        
+        Args:
+            ip_addresses: IPs para localizar
+            
+        Returns:
+            Lista na mesma ordem da entrada (None para IPs não localizados)
+        """
+        found: Dict[str, GeoLocationData] = {}
+        pending = []
+        for ip_address in dict.fromkeys(ip_addresses):
+            cached = self._get_cached_location(ip_address)
+            if cached is not None:
+                found[ip_address] = cached
+            elif is_valid_ip(ip_address):
+                pending.append(ip_address)
+            else:
+                logger.warning(f"Endereço IP inválido: {ip_address!r}")
+        
+        for provider in self._iter_providers():
+            if not pending:
+                break
+            if self._is_cooling_down(provider):
+                continue
+            try:
+                batch_method = getattr(provider, "get_locations_batch", None)
+                if batch_method is not None:
+                    located = [geo for chunk in batched(pending, provider.BATCH_SIZE)
+                               for geo in batch_method(list(chunk))]
+                else:
+                    located = [provider.get_location(ip_address) for ip_address in pending]
+            except ProviderRequestError:
+                self._mark_provider_failure(provider)  # Erro já registrado pelo provedor
+                continue
             except Exception as e:
                 logger.error(f"Erro ao usar provedor {provider.get_provider_name()}: {str(e)}")
+                self._mark_provider_failure(provider)
+                continue
+            
+            # Os IPs sem dados válidos seguem para o próximo provedor
+            pending = []
+            for geo_data in located:
+                if geo_data and geo_data.country:
+                    found[geo_data.ip] = geo_data
+                    if not provider.is_fallback:
+                        self._cache_location(geo_data.ip, geo_data)
+                else:
+                    pending.append(geo_data.ip)
+        
+        if pending:
+            logger.error(f"Falha ao obter localização para {len(pending)} IP(s) com todos os provedores")
+        return [found.get(ip_address) for ip_address in ip_addresses]
+    
+    async def get_ip_location_async(self, ip_address: str, session=None,
+                                    retry_on_failure: bool = True) -> Optional[GeoLocationData]:
+        """
+        Versão assíncrona de get_ip_location (requer aiohttp)
+        
+        Args:
+            ip_address: IP para localizar
+            session: aiohttp.ClientSession compartilhada (criada se omitida)
+            retry_on_failure: Se deve tentar outros provedores em caso de falha
+            
+        Returns:
+            GeoLocationData ou None se falhar
+        """
+        cached = self._get_cached_location(ip_address)
+        if cached is not None:
+            return cached
+        
+        if not is_valid_ip(ip_address):
+            logger.warning(f"Endereço IP inválido: {ip_address!r}")
+            return None
+        
+        if session is None:
+            async with self._create_async_session() as session:
+                return await self.get_ip_location_async(ip_address, session, retry_on_failure)
+        
+        if not self.providers:
+            logger.error("Nenhum provedor de geolocalização configurado")
+            return None
+        
+        # Sem sondagem prévia de disponibilidade: a própria consulta indica a falha
+        for provider in self._iter_providers():
+            if self._is_cooling_down(provider):
+                continue
+            try:
+                location_data = await provider.get_location_async(ip_address, session)
+                if location_data and location_data.country:  # Verificar se obteve dados válidos
+                    logger.info(f"Localização obtida via {provider.get_provider_name()}")
+                    if not provider.is_fallback:
+                        self._cache_location(ip_address, location_data)
+                    return location_data
+                # Resposta sem país (ex.: IP privado) não é falha do provedor: sem espera
+            except ProviderRequestError:
+                self._mark_provider_failure(provider)  # Erro já registrado pelo provedor
+            except Exception as e:
+                logger.error(f"Erro ao usar provedor {provider.get_provider_name()}: {str(e)}")
+                self._mark_provider_failure(provider)
                 
             if not retry_on_failure:
                 break
@@ -371,6 +810,25 @@ class IPLocationSDK:
         logger.error(f"Falha ao obter localização para IP {ip_address} com todos os provedores")
         return None
     
+    async def get_ip_locations_bulk(self, ip_addresses: List[str]) -> List[Optional[GeoLocationData]]:
+        """Localiza vários IPs concorrentemente em uma única sessão HTTP (mesma ordem da entrada)"""
+        async with self._create_async_session() as session:
+            return await asyncio.gather(
+                *(self.get_ip_location_async(ip, session) for ip in ip_addresses)
+            )
+    
+    def get_ip_locations_bulk_sync(self, ip_addresses: List[str]) -> List[Optional[GeoLocationData]]:
+        """Wrapper síncrono de get_ip_locations_bulk"""
+        return asyncio.run(self.get_ip_locations_bulk(ip_addresses))
+    
+    @staticmethod
+    def _create_async_session():
+        """Cria a sessão aiohttp com pool de conexões e cache de DNS"""
+        if aiohttp is None:
+            raise RuntimeError("aiohttp não está instalado; use get_ip_location")
+        connector = aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector)
+    
     def create_session(self, session_id: str) -> SessionData:
         """Cria uma nova sessão"""
         session = SessionData(session_id)
@@ -397,34 +855,50 @@ class IPLocationSDK:
         """Registra tentativa de autenticação"""
         user_key = auth_data.username or auth_data.ip_address
         
-        if user_key not in self.auth_attempts:
-            self.auth_attempts[user_key] = []
+        state = self._auth_state.get(user_key)
+        if state is None:
+            state = self._auth_state[user_key] = UserAuthState()
+            self.auth_attempts[user_key] = state.attempts
+        
+        now = time.time()
+        failed = auth_data.auth_result is AuthResult.FAILED
         
-        # Calcular tentativas consecutivas de falha
-        if auth_data.auth_result == AuthResult.FAILED:
-            recent_attempts = [a for a in self.auth_attempts[user_key] 
-                             if a.timestamp > datetime.now() - timedelta(hours=1)]
-            consecutive_failures = len([a for a in recent_attempts 
-                                      if a.auth_result == AuthResult.FAILED])
-            auth_data.consecutive_failures = consecutive_failures + 1
+        # Calcular tentativas consecutivas de falha (contagem O(log n) pelos prefixos)
+        if failed:
+            auth_data.consecutive_failures = state.count_failures(now - 3600.0) + 1
         else:
             auth_data.consecutive_failures = 0
         
-        self.auth_attempts[user_key].append(auth_data)
+        state.add(auth_data, failed)
+        
+        # Descartar tentativas fora da janela de retenção para limitar a memória
+        state.prune(now - self.auth_history_retention.total_seconds())
         
         logger.info(f"Tentativa de auth registrada: {auth_data.auth_result.value} - "
                    f"Falhas consecutivas: {auth_data.consecutive_failures}")
     
-    def get_user_auth_history(self, user_identifier: str, hours: int = 24) -> List[AuthenticationData]:
-        """Obtém histórico de autenticação do usuário"""
-        if user_identifier not in self.auth_attempts:
+    def _recent_attempts(self, user_key: str, window_seconds: float,
+                         now: Optional[float] = None) -> List[AuthenticationData]:
+        """Tentativas do usuário nos últimos `window_seconds`, via busca binária nos instantes"""
+        state = self._auth_state.get(user_key)
+        if state is None:
             return []
-        
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        return [auth for auth in self.auth_attempts[user_identifier] 
-                if auth.timestamp > cutoff_time]
+        return state.recent((time.time() if now is None else now) - window_seconds)
+    
+    def _count_recent_failures(self, user_key: str, window_seconds: float,
+                               now: Optional[float] = None) -> int:
+        """Número de falhas do usuário nos últimos `window_seconds` sem percorrer o histórico"""
+        state = self._auth_state.get(user_key)
+        if state is None:
+            return 0
+        return state.count_failures((time.time() if now is None else now) - window_seconds)
     
-    def analyze_security_risk(self, ip_address: str, session_id: str) -> Dict[str, Any]:
+    def get_user_auth_history(self, user_identifier: str, hours: int = 24) -> List[AuthenticationData]:
+        """Obtém histórico de autenticação do usuário (limitado a auth_history_retention)"""
+        return self._recent_attempts(user_identifier, hours * 3600.0)
+    
+    def analyze_security_risk(self, ip_address: str, session_id: str,
+                              geo_data: Optional[GeoLocationData] = None) -> Dict[str, Any]:
         """Análise de risco de segurança baseada nos dados coletados"""
         risk_analysis = {
             "ip_address": ip_address,
@@ -435,8 +909,9 @@ class IPLocationSDK:
             "timestamp": datetime.now().isoformat()
         }
         
-        # Obter dados de localização
-        geo_data = self.get_ip_location(ip_address)
+        # Obter dados de localização (reaproveita os já obtidos pelo chamador)
+        if geo_data is None:
+            geo_data = self.get_ip_location(ip_address)
         if geo_data:
             if geo_data.is_proxy or geo_data.is_vpn:
                 risk_analysis["risk_factors"].append("Uso de proxy/VPN detectado")
@@ -445,14 +920,14 @@ class IPLocationSDK:
         # Analisar sessão
         session = self.get_session(session_id)
         if session:
-            if session.get_session_time_minutes() < 1:
+            session_minutes = session.get_session_time_minutes()
+            if session_minutes < 1:
                 risk_analysis["risk_factors"].append("Sessão muito curta")
-            elif session.get_session_time_minutes() > 480:  # 8 horas
+            elif session_minutes > 480:  # 8 horas
                 risk_analysis["risk_factors"].append("Sessão excessivamente longa")
         
         # Analisar tentativas de autenticação
-        auth_history = self.get_user_auth_history(ip_address, 1)
-        failed_attempts = len([a for a in auth_history if a.auth_result == AuthResult.FAILED])
+        failed_attempts = self._count_recent_failures(ip_address, 3600.0)
         
         if failed_attempts > 5:
             risk_analysis["risk_factors"].append(f"Múltiplas falhas de autenticação ({failed_attempts})")
@@ -499,11 +974,12 @@ class IPLocationSDK:
         
         # Dados de sessão
         session = self.get_session(session_id)
+        session_minutes = session.get_session_time_minutes() if session else 0
         if session:
             report["session_data"] = {
                 "session_id": session.session_id,
                 "start_time": session.start_time.isoformat(),
-                "duration_minutes": session.get_session_time_minutes(),
+                "duration_minutes": session_minutes,
                 "page_views": session.page_views,
                 "actions_count": session.actions_count,
                 "is_active": session.is_active
@@ -523,13 +999,13 @@ class IPLocationSDK:
         ]
         
         # Análise de segurança
-        report["security_analysis"] = self.analyze_security_risk(ip_address, session_id)
+        report["security_analysis"] = self.analyze_security_risk(ip_address, session_id, geo_data)
         
         # Resumo
         report["summary"] = {
             "total_auth_attempts": len(auth_history),
-            "failed_auth_attempts": len([a for a in auth_history if a.auth_result == AuthResult.FAILED]),
-            "session_duration_minutes": session.get_session_time_minutes() if session else 0,
+            "failed_auth_attempts": sum(1 for a in auth_history if a.auth_result is AuthResult.FAILED),
+            "session_duration_minutes": session_minutes,
             "location_detected": bool(geo_data and geo_data.country),
             "risk_level": report["security_analysis"]["risk_level"]
         }
@@ -537,12 +1013,32 @@ class IPLocationSDK:
         return report
 
 
+def report_to_json(report: Dict[str, Any], pretty: bool = False) -> str:
+    """Serializa um relatório (dicts, datetimes e dataclasses) para JSON"""
+    if orjson is not None:
+        try:
+            option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_DATACLASS
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(report, option=option).decode('utf-8')
+        except TypeError:  # tipo não suportado pelo orjson
+            pass
+    if pretty:
+        return json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    return json.dumps(report, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
 # ============= EXEMPLO DE USO =============
 
 def exemplo_uso():
     """Demonstração de uso da SDK"""
     print("=== Demonstração IP Location SDK ===\n")
     
+    # Importado aqui: só a demonstração coleta dados do dispositivo
+    from device_info import DeviceEnvironmentSDK
+    
+    session_id = "sess_" + secrets.token_hex(4)
+    
     # Inicializar SDK
     sdk = IPLocationSDK()
     
@@ -3,12 +3,24 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
 from .features import extract_all_features, FeatureSet
-from .rules import DEFAULT_WEIGHTS, weighted_sum, hard_rules
+from .rules import DEFAULT_WEIGHTS, hard_rules
 from .explainability import top_reason_codes
 
 logger = logging.getLogger(__name__)
 
+MODEL_VERSION = "v0.1.0"
+
+# Ordem canônica das features (índice de cada uma no vetor SoA float32)
+FEATURE_ORDER: Tuple[str, ...] = tuple(DEFAULT_WEIGHTS)
+
+# Cache dos pesos preparados por dicionário (id -> _PreparedWeights). A referência
+# aos pesos evita reaproveitamento do id após coleta; tamanho limitado.
+_WEIGHTS_CACHE: Dict[int, "_PreparedWeights"] = {}
+_WEIGHTS_CACHE_SIZE = 32
+
 
 # --------------------------
 # ENUMS
@@ -46,6 +58,14 @@ class ScoreResult:
     metadata: Dict[str, Any]
 
 
+@dataclass(frozen=True)
+class _PreparedWeights:
+    weights: Dict[str, float]
+    order: Tuple[str, ...]
+    vector: np.ndarray
+    dynamic_max: float
+
+
 # --------------------------
 # CORE FUNCTIONS
 # --------------------------
@@ -59,13 +79,70 @@ def _calibrate_score(score_raw: float, max_abs_weight: float) -> int:
     return int(round(scaled))
 
 
+def _prepare_weights(weights: Dict[str, float]) -> _PreparedWeights:
+#    Vetor de pesos alinhado à ordem das features e escala de calibração
+#    (metade da soma dos pesos absolutos), memoizados por dicionário.
+    prepared = _WEIGHTS_CACHE.get(id(weights))
+    if prepared is not None and prepared.weights is weights:
+        return prepared
+    order = FEATURE_ORDER if weights is DEFAULT_WEIGHTS else tuple(weights)
+    vector = np.fromiter((weights[k] for k in order), dtype=np.float32, count=len(order))
+    prepared = _PreparedWeights(
+        weights=weights,
+        order=order,
+        vector=vector,
+        dynamic_max=max(1.0, sum(abs(v) for v in weights.values()) / 2.0),
+    )
+    if len(_WEIGHTS_CACHE) >= _WEIGHTS_CACHE_SIZE:
+        _WEIGHTS_CACHE.clear()
+    _WEIGHTS_CACHE[id(weights)] = prepared
+    return prepared
+
+
+def _feature_vector(features: FeatureSet, order: Tuple[str, ...]) -> np.ndarray:
+#    Converte o FeatureSet para um vetor float32 na ordem dada (features ausentes = 0).
+    if order is FEATURE_ORDER and hasattr(features, "to_array"):
+        return features.to_array()
+    if hasattr(features, "get"):
+        values = (features.get(k, 0.0) for k in order)
+    else:
+        values = (getattr(features, k, 0.0) for k in order)
+    return np.fromiter((float(v or 0.0) for v in values), dtype=np.float32, count=len(order))
+
+
+# Núcleo do score (contribuições, soma e calibração em um único laço), compilado
+# com Numba quando disponível; senão a mesma conta vetorizada em NumPy.
+try:
+    from numba import njit
+
+    @njit(cache=True, fastmath=True)
+    def _score_core(feats, weights, dynamic_max):
+        contribs = np.empty(feats.shape[0], dtype=np.float32)
+        score_raw = 0.0
+        for i in range(feats.shape[0]):
+            c = feats[i] * weights[i]
+            contribs[i] = c
+            score_raw += c
+        normalized = min(max(score_raw / dynamic_max, -1.0), 1.0)
+        return int(np.rint((normalized + 1.0) * 50.0)), score_raw, contribs
+except ImportError:
+    def _score_core(feats, weights, dynamic_max):
+        contribs = feats * weights
+        score_raw = float(contribs.sum())
+        return _calibrate_score(score_raw, dynamic_max), score_raw, contribs
+
+
+# Faixas de score (<50, 50..74, >=75) indexadas pelo número de limites atingidos
+_BUCKETS: Tuple[Tuple[RiskStatus, RecommendedAction], ...] = (
+    (RiskStatus.ALTO_RISCO, RecommendedAction.BLOCK),
+    (RiskStatus.DESCONFIAVEL, RecommendedAction.STEP_UP_AUTH),
+    (RiskStatus.LEGITIMO, RecommendedAction.ALLOW),
+)
+
+
 def _map_to_status_action(score: int) -> Tuple[RiskStatus, RecommendedAction]:
 #    Mapeia score para status e ação.
-    if score >= 75:
-        return RiskStatus.LEGITIMO, RecommendedAction.ALLOW
-    if score >= 50:
-        return RiskStatus.DESCONFIAVEL, RecommendedAction.STEP_UP_AUTH
-    return RiskStatus.ALTO_RISCO, RecommendedAction.BLOCK
+    return _BUCKETS[(score >= 50) + (score >= 75)]
 
 
 # --------------------------
@@ -88,28 +165,86 @@ def calculate_score(
     # 2) Aplicar hard rules
     fired_rule, hard_code = hard_rules(features)
     logger.debug(f"Hard rule disparada: {fired_rule}, código: {hard_code}")
+    if fired_rule:
+        # Hard rule decide sozinha: pula score ponderado, calibração e explicabilidade
+        return _hard_rule_result(payload, fired_rule, hard_code)
 
-    # 3) Calcular score bruto
-    score_raw, contributions = weighted_sum(features, w)
+    # 3-4) Calcular score bruto e calibrar (vetores float32 em um núcleo compilado)
+    prepared = _prepare_weights(w)
+    score, score_raw, contribs = _score_core(
+        _feature_vector(features, prepared.order), prepared.vector, prepared.dynamic_max
+    )
+    contributions = dict(zip(prepared.order, contribs.tolist()))
     logger.debug(f"Score bruto: {score_raw}, Contribuições: {contributions}")
-
-    # 4) Calibrar score
-    dynamic_max = max(1.0, sum(abs(v) for v in w.values()) / 2.0)
-    score = _calibrate_score(score_raw, dynamic_max)
     logger.debug(f"Score calibrado: {score}")
 
+    # 5-7) Status, ação, razões e metadata
+    return _build_result(payload, score, contributions)
+
+
+def calculate_scores(
+    payloads: List[Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None
+) -> List[ScoreResult]:
+    """
+    Calcula o score de vários payloads de uma vez: as features são empilhadas
+    em uma matriz (N, K) e os scores saem de uma única operação matricial.
+    """
+    w = weights or DEFAULT_WEIGHTS
+    prepared = _prepare_weights(w)
+
+    results: List[Optional[ScoreResult]] = [None] * len(payloads)
+    rows: List[int] = []
+    vectors: List[np.ndarray] = []
+    for i, payload in enumerate(payloads):
+        features: FeatureSet = extract_all_features(payload)
+        fired_rule, hard_code = hard_rules(features)
+        if fired_rule:
+            results[i] = _hard_rule_result(payload, fired_rule, hard_code)
+        else:
+            rows.append(i)
+            vectors.append(_feature_vector(features, prepared.order))
+
+    if rows:
+        contribs = np.stack(vectors) * prepared.vector          # (N, K)
+        raw = contribs.sum(axis=1)
+        normalized = np.clip(raw / prepared.dynamic_max, -1.0, 1.0)
+        scores = np.round((normalized + 1.0) * 50.0).astype(np.int32).tolist()
+        for i, score, row in zip(rows, scores, contribs.tolist()):
+            results[i] = _build_result(payloads[i], score, dict(zip(prepared.order, row)))
+
+    return results
+
+
+def _hard_rule_result(payload: Dict[str, Any], fired_rule: Any, hard_code: Any) -> ScoreResult:
+#    Resultado forçado (bloqueio) quando uma hard rule dispara.
+    status, action = _BUCKETS[0]
+    logger.info(f"Score final: 0, Status: {status}, Ação: {action} (hard rule {hard_code})")
+    return ScoreResult(
+        score=0,
+        status=status,
+        recommended_action=action,
+        reason_codes=[{"code": hard_code, "contribution": -999.0}],
+        metadata={
+            "model_version": MODEL_VERSION,
+            "hard_rule_fired": fired_rule,
+            "context": payload.get("context", {}),
+        },
+    )
+
+
+def _build_result(payload: Dict[str, Any], score: int, contributions: Dict[str, float]) -> ScoreResult:
+#    Monta o ScoreResult a partir do score calibrado e das contribuições.
     # 5) Mapear para status e ação
     status, action = _map_to_status_action(score)
 
     # 6) Gerar razões (explainability)
     reasons = top_reason_codes(contributions, top_k=5)
-    if fired_rule:
-        reasons.insert(0, {"code": hard_code, "contribution": -999.0})
 
     # 7) Montar metadata
     metadata = {
-        "model_version": "v0.1.0",
-        "hard_rule_fired": fired_rule,
+        "model_version": MODEL_VERSION,
+        "hard_rule_fired": False,
         "context": payload.get("context", {}),
     }
 
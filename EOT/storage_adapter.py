@@ -5,30 +5,80 @@ Captura interações reais do usuário em tempo real em toda a tela
 """
 
 from dataclasses import dataclass, field
-import pygame
 import time
-from datetime import datetime
+import bisect
+from datetime import datetime, timedelta
 import json
 from typing import Dict, List, Optional, Any
 from enum import Enum
 import threading
-from collections import defaultdict, deque
+import atexit
+import queue
+from collections import deque
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import pyautogui
 from screeninfo import get_monitors
 from pynput import mouse, keyboard
 from pynput.mouse import Button, Controller as MouseController
 from pynput.keyboard import Key, Listener as KeyboardListener
-from device_info import DeviceEnvironmentSDK
-from ip_location import session_id, IPLocationSDK
-import cv2
 import numpy as np
+# orjson (C) serializa o resumo da sessão; json como alternativa
+try:
+    import orjson
+except ImportError:
+    orjson = None
 # from deepface import DeepFace # Removido DeepFace daqui, será usado apenas no servidor
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# Logger do módulo (a configuração de handlers fica a cargo da aplicação; veja
+# configure_queue_logging)
 logger = logging.getLogger(__name__)
 
+_log_listener: Optional[QueueListener] = None
+
+
+def configure_queue_logging(level: int = logging.INFO) -> QueueListener:
+    """Configura o logger raiz para enfileirar os registros (opcional, chamado pela aplicação)
+    
+    Uma thread em segundo plano escreve no console, tirando a I/O dos callbacks dos
+    listeners. Chamadas repetidas reaproveitam o mesmo listener.
+    """
+    global _log_listener
+    if _log_listener is None:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        log_queue = queue.Queue(-1)
+        _log_listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+        
+        root = logging.getLogger()
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(level)
+    return _log_listener
+
+# Quantidade máxima de eventos mantidos em memória (buffer circular; os mais antigos são descartados)
+MAX_EVENTS = 100_000
+
+# Tamanho do pool de objetos RealTimeEvent reaproveitados
+EVENT_POOL_SIZE = 1024
+
+# Tamanho das regiões de hotspot (px), quantidade reportada e capacidade inicial do buffer de cliques
+HOTSPOT_REGION_PX = 100
+HOTSPOT_TOP_K = 5
+CLICK_BUFFER_INITIAL = 1024
+
+# Intervalo mínimo entre movimentos de mouse registrados (20 ms = no máximo 50 por segundo)
+MOVE_MIN_INTERVAL_NS = 20_000_000
+
+# Limites de eventos por minuto (exclusivos) e o nível de atividade de cada faixa
+ACTIVITY_THRESH = (0, 10, 50, 100)
+ACTIVITY_LABELS = ("Nenhuma", "Baixa", "Média", "Alta", "Muito Alta")
+
+# Tipos das tuplas brutas (tipo, ts_ns, a, b, c) enfileiradas pelos callbacks dos listeners
+RAW_MOVE, RAW_CLICK, RAW_SCROLL, RAW_KEY = range(4)
+_RAW_STOP = None  # Sentinela que encerra a thread consumidora
+
 class EventType(Enum):
     MOUSE_CLICK = "mouse_click"
     MOUSE_MOVE = "mouse_move"
@@ -37,11 +87,19 @@ class EventType(Enum):
     SCROLL = "scroll"
     DRAG = "drag"
 
-@dataclass
+# Posição de cada tipo no vetor de contagens e nomes na mesma ordem
+EVENT_TYPE_IDX = {e: i for i, e in enumerate(EventType)}
+EVENT_NAMES = [e.value for e in EventType]
+
+# Nomes dos botões do mouse e das teclas especiais, calculados uma vez (evita str/split por evento)
+BUTTON_NAMES = {b: b.name.lower() for b in Button}
+SPECIAL_KEY_NAMES = {k: k.name.lower() for k in Key}
+
+@dataclass(slots=True)
 class RealTimeEvent:
     event_id: str
     event_type: EventType
-    timestamp: datetime
+    timestamp: int  # ns desde o início do monitoramento (time.monotonic_ns)
     position: Optional[Dict[str, int]] = None
     key: Optional[str] = None
     button: Optional[str] = None
@@ -54,16 +112,27 @@ class RealTimeEvent:
 # ser redesenhada para interagir com o servidor ou ser muito mais leve.
 
 class RealTimeMonitor:
-    def __init__(self):
-        self.events: List[RealTimeEvent] = []
+    def __init__(self, visualize: bool = False):
+        """visualize: abre a janela do pygame (inicializa o SDL apenas quando pedido)"""
+        self.events: deque = deque(maxlen=MAX_EVENTS)
+        self._event_seq = 0  # Total de eventos já registrados (ids únicos mesmo após descarte)
+        self._counts = [0] * len(EventType)  # Eventos por tipo, indexados por EVENT_TYPE_IDX
+        self._pool: deque = deque(maxlen=EVENT_POOL_SIZE)  # Eventos descartados prontos para reuso
         self.is_monitoring = False
-        self.monitor_thread = None
+        self.monitor_thread = None  # Consumidor da fila de eventos brutos
+        self._raw_q: queue.SimpleQueue = queue.SimpleQueue()
         self.mouse_listener = None
         self.keyboard_listener = None
         self.last_position = None
+        self._last_move_ts_ns = 0  # Último movimento registrado (time.monotonic_ns)
+        self._move_min_interval_ns = MOVE_MIN_INTERVAL_NS
         self.click_count = 0
+        # Coordenadas (x, y) de todos os cliques da sessão em colunas int32 (cresce dobrando)
+        self._click_xy = np.empty((CLICK_BUFFER_INITIAL, 2), dtype=np.int32)
+        self._n_clicks = 0
         self.keypress_count = 0
         self.start_time = None
+        self._t0_mono = 0  # time.monotonic_ns() no início do monitoramento (base dos timestamps)
         self.screen_width, self.screen_height = pyautogui.size()
         
         # Obter informações sobre todos os monitores
@@ -77,13 +146,21 @@ class RealTimeMonitor:
                 "name": str(m.name)
             })
         
+        # Metadata idêntica em todos os eventos: montada uma vez e compartilhada (somente leitura)
+        screen_size = {"width": self.screen_width, "height": self.screen_height}
+        self._event_metadata = {"screen_size": screen_size, "monitors": tuple(self.monitors)}
+        self._key_event_metadata = {"screen_size": screen_size}
+        
         logger.info(f"Tela detectada: {self.screen_width}x{self.screen_height}")
         logger.info(f"Monitores detectados: {len(self.monitors)}")
         
         # Configuração do pygame para visualização (opcional)
-        pygame.init()
-        self.screen = pygame.display.set_mode((300, 200))
-        pygame.display.set_caption("EyeOfToga Monitor")
+        self.screen = None
+        if visualize:
+            import pygame
+            pygame.init()
+            self.screen = pygame.display.set_mode((300, 200))
+            pygame.display.set_caption("EyeOfToga Monitor")
         # self.face_monitor = FaceRecognitionMonitor() # Removido, pois a lógica de face está no servidor
 
         
@@ -94,14 +171,19 @@ class RealTimeMonitor:
             return
         self.is_monitoring = True
         self.start_time = datetime.now()
+        self._t0_mono = time.monotonic_ns()
+        # Processamento dos eventos fora das threads dos listeners
+        self.monitor_thread = threading.Thread(target=self._drain, daemon=True)
+        self.monitor_thread.start()
         # Iniciar listeners para eventos globais
+        on_move, on_click, on_scroll, on_press = self._build_listener_callbacks()
         self.mouse_listener = mouse.Listener(
-            on_move=self._on_mouse_move,
-            on_click=self._on_mouse_click,
-            on_scroll=self._on_mouse_scroll
+            on_move=on_move,
+            on_click=on_click,
+            on_scroll=on_scroll
         )
         self.keyboard_listener = keyboard.Listener(
-            on_press=self._on_key_press
+            on_press=on_press
         )
         self.mouse_listener.start()
         self.keyboard_listener.start()
@@ -116,116 +198,232 @@ class RealTimeMonitor:
             self.mouse_listener.stop()
         if self.keyboard_listener:
             self.keyboard_listener.stop()
+        # Processar o que ainda está na fila antes de encerrar o consumidor
+        if self.monitor_thread is not None:
+            self._raw_q.put(_RAW_STOP)
+            self.monitor_thread.join()
+            self.monitor_thread = None
         # self.face_monitor.stop_recognition() # Removido
         logger.info("Monitoramento parado")
 
         
-    def _on_mouse_move(self, x, y):
-        """Callback para movimento do mouse em toda a tela"""
-        if not self.is_monitoring:
-            return
+    # Callbacks dos listeners: só enfileiram (tipo, ts_ns, a, b, c) e retornam, para não
+    # segurar o hook do sistema; a thread consumidora (_drain) faz todo o processamento.
+    # As assinaturas devem ter exatamente os parâmetros do pynput: a partir da 1.8 ele
+    # inspeciona a aridade e passaria o argumento extra "injected" a um parâmetro a mais.
+    
+    def _build_listener_callbacks(self):
+        """Callbacks entregues aos listeners, com a fila e o relógio em variáveis locais"""
+        put = self._raw_q.put_nowait
+        now = time.monotonic_ns
+        monitor = self
+        
+        def on_move(x, y):
+            if monitor.is_monitoring:
+                put((RAW_MOVE, now(), x, y, None))
+        
+        def on_click(x, y, button, pressed):
+            if monitor.is_monitoring and pressed:
+                put((RAW_CLICK, now(), x, y, button))
+        
+        def on_scroll(x, y, dx, dy):
+            if monitor.is_monitoring:
+                put((RAW_SCROLL, now(), x, y, dy))
+        
+        def on_press(key):
+            if monitor.is_monitoring:
+                put((RAW_KEY, now(), key, None, None))
+        
+        return on_move, on_click, on_scroll, on_press
+    
+    def _drain(self):
+        """Thread consumidora: processa os eventos brutos em lotes até a sentinela"""
+        raw_q = self._raw_q
+        handlers = (self._handle_mouse_move, self._handle_mouse_click,
+                    self._handle_mouse_scroll, self._handle_key_press)
+        while True:
+            batch = [raw_q.get()]
+            while True:
+                try:
+                    batch.append(raw_q.get_nowait())
+                except queue.Empty:
+                    break
             
+            for item in batch:
+                if item is _RAW_STOP:
+                    return
+                kind, ts_ns, a, b, c = item
+                try:
+                    handlers[kind](ts_ns, a, b, c)
+                except Exception as e:
+                    logger.error(f"Erro ao processar evento: {str(e)}")
+    
+    # Os handlers recebem funções e constantes globais como argumentos padrão:
+    # no caminho quente viram variáveis locais em vez de buscas globais/atributos
+    
+    def _handle_mouse_move(self, ts_ns, x, y, _c, _abs=abs):
+        """Processa movimento do mouse"""
         current_pos = {"x": x, "y": y}
+        last = self.last_position
         
-        # Registrar movimento se significativo
-        if self.last_position and (
-            abs(current_pos["x"] - self.last_position["x"]) > 2 or
-            abs(current_pos["y"] - self.last_position["y"]) > 2
+        # Registrar movimento se significativo e fora do intervalo mínimo (a posição
+        # mais recente continua sendo acompanhada a cada tick)
+        if last and ts_ns - self._last_move_ts_ns >= self._move_min_interval_ns and (
+            _abs(x - last["x"]) > 2 or
+            _abs(y - last["y"]) > 2
         ):
-            self._record_mouse_move(current_pos)
+            self._last_move_ts_ns = ts_ns
+            self._record_mouse_move(current_pos, ts_ns - self._t0_mono)
         
         self.last_position = current_pos
     
-    def _on_mouse_click(self, x, y, button, pressed):
-        """Callback para clique do mouse em toda a tela"""
-        if not self.is_monitoring or not pressed:
-            return
-            
-        timestamp = datetime.now()
+    def _handle_mouse_click(self, ts_ns, x, y, button, _names=BUTTON_NAMES,
+                            _type=EventType.MOUSE_CLICK):
+        """Processa clique do mouse"""
+        button_name = _names.get(button) or str(button).rsplit(".", 1)[-1].lower()
         
-        button_name = str(button).split(".")[-1].lower()
-        
-        event_obj = RealTimeEvent(
-            event_id=f"event_{len(self.events)}",
-            event_type=EventType.MOUSE_CLICK,
-            timestamp=timestamp,
+        self._record_event(
+            _type,
+            ts_ns - self._t0_mono,
             position={"x": x, "y": y},
             button=button_name,
-            metadata={
-                "screen_size": {"width": self.screen_width, "height": self.screen_height},
-                "monitors": self.monitors
-            }
+            metadata=self._event_metadata
         )
         
-        self.events.append(event_obj)
+        self._store_click(x, y)
         self.click_count += 1
-        logger.info(f"Clique capturado: {button_name} em ({x}, {y}) - Total: {self.click_count}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Clique capturado: %s em (%d, %d) - Total: %d", button_name, x, y, self.click_count)
     
-    def _on_mouse_scroll(self, x, y, dx, dy):
-        """Callback para scroll do mouse em toda a tela"""
-        if not self.is_monitoring:
-            return
-            
-        timestamp = datetime.now()
+    def _handle_mouse_scroll(self, ts_ns, x, y, dy, _type=EventType.SCROLL):
+        """Processa scroll do mouse"""
+        direction = "up" if dy > 0 else "down"
         
-        event_obj = RealTimeEvent(
-            event_id=f"event_{len(self.events)}",
-            event_type=EventType.SCROLL,
-            timestamp=timestamp,
+        self._record_event(
+            _type,
+            ts_ns - self._t0_mono,
             position={"x": x, "y": y},
-            scroll_direction="up" if dy > 0 else "down",
-            metadata={
-                "screen_size": {"width": self.screen_width, "height": self.screen_height},
-                "monitors": self.monitors
-            }
+            scroll_direction=direction,
+            metadata=self._event_metadata
         )
         
-        self.events.append(event_obj)
-        logger.info(f"Scroll capturado: {"up" if dy > 0 else "down"} em ({x}, {y})")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Scroll capturado: %s em (%d, %d)", direction, x, y)
     
-    def _on_key_press(self, key):
-        """Callback para tecla pressionada em toda a tela"""
-        if not self.is_monitoring:
-            return
-            
-        timestamp = datetime.now()
-        
-        try:
-            # Tentar obter o caractere da tecla
-            key_name = key.char
-        except AttributeError:
-            # Teclas especiais (shift, ctrl, etc)
-            key_name = str(key).split(".")[-1].lower()
-        
-        event_obj = RealTimeEvent(
-            event_id=f"event_{len(self.events)}",
-            event_type=EventType.KEY_PRESS,
-            timestamp=timestamp,
+    def _handle_key_press(self, ts_ns, key, _b, _c, _names=SPECIAL_KEY_NAMES,
+                          _type=EventType.KEY_PRESS):
+        """Processa tecla pressionada"""
+        # Caractere da tecla ou nome da tecla especial (shift, ctrl, etc)
+        key_name = (getattr(key, "char", None) or _names.get(key)
+                    or str(key).rsplit(".", 1)[-1].lower())
+        
+        self._record_event(
+            _type,
+            ts_ns - self._t0_mono,
             key=key_name,
-            metadata={
-                "screen_size": {"width": self.screen_width, "height": self.screen_height}
-            }
+            metadata=self._key_event_metadata
         )
         
-        self.events.append(event_obj)
         self.keypress_count += 1
-        logger.info(f"Tecla pressionada: {key_name} - Total: {self.keypress_count}")
+        # A tecla em si não vai para o log (evita gravar texto digitado)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Tecla pressionada - Total: %d", self.keypress_count)
+    
+    def _store_click(self, x, y):
+        """Guarda a posição do clique no buffer de coordenadas"""
+        n = self._n_clicks
+        if n == len(self._click_xy):
+            grown = np.empty((2 * n, 2), dtype=np.int32)
+            grown[:n] = self._click_xy
+            self._click_xy = grown
+        self._click_xy[n] = (x, y)
+        self._n_clicks = n + 1
+    
+    def _click_hotspots(self) -> List[Dict[str, Any]]:
+        """Regiões mais clicadas, agrupadas e contadas de forma vetorizada"""
+        if not self._n_clicks:
+            return []
+        
+        # Região de cada clique (canto superior esquerdo) codificada em um único inteiro
+        regions = self._click_xy[:self._n_clicks] // HOTSPOT_REGION_PX
+        base = regions.min(axis=0)
+        span_y = int(regions[:, 1].max() - base[1]) + 1
+        keys = (regions[:, 0] - base[0]).astype(np.int64) * span_y + (regions[:, 1] - base[1])
+        uniq, first_seen, counts = np.unique(keys, return_index=True, return_counts=True)
+        
+        # Mais cliques primeiro; empates pela ordem em que a região apareceu
+        if len(uniq) > HOTSPOT_TOP_K:
+            # Candidatas: contagem >= k-ésima maior (inclui empates, desfeitos abaixo)
+            kth = np.partition(counts, -HOTSPOT_TOP_K)[-HOTSPOT_TOP_K]
+            top = np.flatnonzero(counts >= kth)
+        else:
+            top = np.arange(len(uniq))
+        top = top[np.lexsort((first_seen[top], -counts[top]))][:HOTSPOT_TOP_K]
+        
+        hotspots = []
+        for key, count in zip(uniq[top].tolist(), counts[top].tolist()):
+            region_x = (int(base[0]) + key // span_y) * HOTSPOT_REGION_PX
+            region_y = (int(base[1]) + key % span_y) * HOTSPOT_REGION_PX
+            hotspots.append({"region": f"{region_x},{region_y}", "clicks": count})
+        return hotspots
+    
+    def _next_event_id(self) -> str:
+        """Gera o próximo id de evento (sequencial)"""
+        event_id = f"event_{self._event_seq}"
+        self._event_seq += 1
+        return event_id
+    
+    def _acquire_event(self) -> RealTimeEvent:
+        """Obtém um evento do pool (ou cria um novo se o pool estiver vazio)"""
+        if self._pool:
+            return self._pool.pop()
+        return RealTimeEvent(event_id="", event_type=EventType.MOUSE_MOVE, timestamp=0)
+    
+    def _release_event(self, event: RealTimeEvent):
+        """Devolve ao pool um evento que saiu do buffer"""
+        self._pool.append(event)
     
-    def _record_mouse_move(self, position):
+    def _record_event(self, event_type: EventType, timestamp: int, position=None, key=None,
+                      button=None, scroll_direction=None, metadata=None, _index=EVENT_TYPE_IDX):
+        """Preenche um evento do pool e o adiciona ao buffer"""
+        events = self.events
+        if len(events) == events.maxlen:
+            # Buffer cheio: o evento mais antigo seria descartado, então é reaproveitado
+            self._release_event(events.popleft())
+        
+        event = self._acquire_event()
+        event.event_id = self._next_event_id()
+        event.event_type = event_type
+        event.timestamp = timestamp
+        event.position = position
+        event.key = key
+        event.button = button
+        event.scroll_direction = scroll_direction
+        event.metadata = metadata if metadata is not None else {}
+        events.append(event)
+        self._counts[_index[event_type]] += 1
+        return event
+    
+    def event_datetime(self, event: RealTimeEvent) -> datetime:
+        """Horário de parede de um evento (convertido sob demanda, só na serialização)"""
+        return self.start_time + timedelta(microseconds=event.timestamp // 1000)
+    
+    def _session_duration_seconds(self) -> float:
+        """Duração do monitoramento medida pelo relógio monotônico"""
+        return (time.monotonic_ns() - self._t0_mono) / 1e9
+    
+    def _record_mouse_move(self, position, timestamp: Optional[int] = None,
+                           _type=EventType.MOUSE_MOVE):
         """Registra movimento do mouse"""
-        timestamp = datetime.now()
+        if timestamp is None:
+            timestamp = time.monotonic_ns() - self._t0_mono
         
-        event_obj = RealTimeEvent(
-            event_id=f"event_{len(self.events)}",
-            event_type=EventType.MOUSE_MOVE,
-            timestamp=timestamp,
+        self._record_event(
+            _type,
+            timestamp,
             position=position,
-            metadata={
-                "screen_size": {"width": self.screen_width, "height": self.screen_height},
-                "monitors": self.monitors
-            }
+            metadata=self._event_metadata
         )
-        self.events.append(event_obj)
             
     def get_click_and_key_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas detalhadas de cliques e teclas"""
@@ -238,7 +436,7 @@ class RealTimeMonitor:
                 "session_duration_seconds": 0.0
             }
             
-        duration_seconds = (datetime.now() - self.start_time).total_seconds()
+        duration_seconds = self._session_duration_seconds()
         duration_minutes = duration_seconds / 60
         
         return {
@@ -289,45 +487,24 @@ class RealTimeMonitor:
                 }
             }
             
-        duration = (datetime.now() - self.start_time).total_seconds()
+        duration = self._session_duration_seconds()
         
-        # Contar eventos por tipo
-        event_counts = defaultdict(int)
-        for event in self.events:
-            event_counts[event.event_type.value] += 1
+        # Contar eventos por tipo (contadores mantidos a cada evento registrado)
+        event_counts = {name: count for name, count in zip(EVENT_NAMES, self._counts) if count}
             
         # Calcular taxa de eventos por minuto
         events_per_minute = {}
         for event_type, count in event_counts.items():
             events_per_minute[event_type] = (count / duration * 60) if duration > 0 else 0
         
-        # Encontrar áreas mais clicadas
-        click_positions = [
-            event.position for event in self.events 
-            if event.event_type == EventType.MOUSE_CLICK and event.position
-        ]
-        
-        hotspots = []
-        if click_positions:
-            # Agrupar cliques por região (100x100 pixels para toda a tela)
-            region_clicks = defaultdict(int)
-            for pos in click_positions:
-                region_x = (pos["x"] // 100) * 100
-                region_y = (pos["y"] // 100) * 100
-                region_clicks[f"{region_x},{region_y}"] += 1
-                
-            hotspots = sorted(
-                [{"region": region, "clicks": count} 
-                 for region, count in region_clicks.items()],
-                key=lambda x: x["clicks"],
-                reverse=True
-            )[:5]  # Top 5 hotspots
+        # Encontrar áreas mais clicadas (regiões de 100x100 pixels para toda a tela)
+        hotspots = self._click_hotspots()
         
         return {
             "session_start": self.start_time.isoformat(),
             "session_duration_seconds": round(duration, 2),
-            "total_events": len(self.events),
-            "event_counts": dict(event_counts),
+            "total_events": self._event_seq,
+            "event_counts": event_counts,
             "events_per_minute": {k: round(v, 2) for k, v in events_per_minute.items()},
             "total_clicks": self.click_count,
             "total_keypresses": self.keypress_count,
@@ -348,20 +525,29 @@ class RealTimeMonitor:
             
         total_epm = sum(events_per_minute.values())
         
-        if total_epm > 100:
-            return "Muito Alta"
-        elif total_epm > 50:
-            return "Alta"
-        elif total_epm > 10:
-            return "Média"
-        elif total_epm > 0:
-            return "Baixa"
-        else:
-            return "Nenhuma"
+        # bisect_left: um valor igual ao limite fica na faixa de baixo (comparações estritas)
+        return ACTIVITY_LABELS[bisect.bisect_left(ACTIVITY_THRESH, total_epm)]
+
+
+def _json_default(obj):
+    """Converte tipos não nativos do JSON (Enum, datetime) na serialização"""
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _dumps(obj) -> str:
+    """Serializa para JSON (orjson indentado quando disponível, json compacto senão)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, separators=(",", ":"), default=_json_default)
 
 
 # Exemplo de uso:
 if __name__ == "__main__":
+    configure_queue_logging()
     monitor = RealTimeMonitor()
     
     # A lógica de reconhecimento facial foi movida para face_recognition_server.py
@@ -369,13 +555,17 @@ if __name__ == "__main__":
     # monitor.start_monitoring()
     
     try:
-        while True:
-            time.sleep(1) 
-            # monitor.show_live_stats() 
+        # Os listeners rodam em threads próprias: basta aguardar (sem laço de sleep)
+        if monitor.keyboard_listener is not None:
+            monitor.keyboard_listener.join()
+        else:
+            threading.Event().wait()
+        # Para estatísticas periódicas: stop = threading.Event()
+        # while not stop.wait(1.0): monitor.show_live_stats()
     except KeyboardInterrupt:
         print("Monitoramento interrompido pelo usuário.")
     finally:
         monitor.stop_monitoring()
         print("Resumo da sessão:")
-        print(json.dumps(monitor.get_session_summary(), indent=4))
+        print(_dumps(monitor.get_session_summary()))
 